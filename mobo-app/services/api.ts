@@ -1,6 +1,13 @@
 // mobo-app/services/api.ts
-import axios from "axios";
-import { getToken } from "../storage/secureStore";
+import axios, { AxiosError, AxiosRequestConfig } from "axios";
+import {
+  getToken,
+  setToken,
+  getRefreshToken,
+  setRefreshToken,
+  removeToken,
+  removeRefreshToken,
+} from "../storage/secureStore";
 
 export const API_BASE = "http://127.0.0.1:8000/api/v1";
 
@@ -19,4 +26,49 @@ client.interceptors.request.use(
   (err) => Promise.reject(err)
 );
 
+// Access tokens are short-lived: on 401, trade the refresh token for a new
+// pair once and retry. Concurrent 401s share the same refresh call.
+let refreshing: Promise<string | null> | null = null;
+
+export function refreshAccessToken(): Promise<string | null> {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const refresh_token = await getRefreshToken();
+      if (!refresh_token) return null;
+      try {
+        // plain axios: must not go through this client's interceptors
+        const res = await axios.post(`${API_BASE}/auth/refresh`, { refresh_token }, { timeout: 20000 });
+        await setToken(res.data.access_token);
+        if (res.data.refresh_token) await setRefreshToken(res.data.refresh_token);
+        return res.data.access_token as string;
+      } catch {
+        // refresh token expired or revoked: the user has to sign in again
+        await removeToken();
+        await removeRefreshToken();
+        return null;
+      }
+    })().finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
+client.interceptors.response.use(
+  (res) => res,
+  async (err: AxiosError) => {
+    const config = err.config as (AxiosRequestConfig & { _retried?: boolean }) | undefined;
+    const url = config?.url ?? "";
+    if (err.response?.status !== 401 || !config || config._retried || url.includes("/auth/")) {
+      return Promise.reject(err);
+    }
+    config._retried = true;
+    const token = await refreshAccessToken();
+    if (!token) return Promise.reject(err);
+    config.headers = config.headers ?? {};
+    (config.headers as any).Authorization = `Bearer ${token}`;
+    return client(config);
+  }
+);
+
 export default client;
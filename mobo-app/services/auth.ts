@@ -1,8 +1,19 @@
 // mobo-app/services/auth.ts
 import client from "./api";
-import { setToken, removeToken } from "../storage/secureStore";
+import {
+  setToken,
+  removeToken,
+  getRefreshToken,
+  setRefreshToken,
+  removeRefreshToken,
+} from "../storage/secureStore";
 
-type LoginResp = { access_token: string; token_type?: string };
+type LoginResp = {
+  access_token: string;
+  token_type?: string;
+  refresh_token?: string;
+  expires_in?: number;
+};
 
 // Login function
 export async function login(email: string, password: string) {
@@ -14,8 +25,8 @@ export async function login(email: string, password: string) {
     headers: { "Content-Type": "application/x-www-form-urlencoded" },
   });
 
-  const token = res.data.access_token;
-  await setToken(token); 
+  await setToken(res.data.access_token);
+  if (res.data.refresh_token) await setRefreshToken(res.data.refresh_token);
   return res.data;
 }
 // Register function
@@ -37,7 +48,14 @@ export async function fetchProfile() {
   return res.data;
 }
 
-// Logout
+// Logout: revoke server-side (best effort), then forget the tokens
 export async function logout() {
+  try {
+    const refresh_token = await getRefreshToken();
+    await client.post("/auth/logout", { refresh_token });
+  } catch {
+    // offline or token already expired: local sign-out is enough
+  }
   await removeToken();
+  await removeRefreshToken();
 }
@@ -1,5 +1,5 @@
 // mobo-app/services/incidents.ts
-import client from "./api";
+import client, { refreshAccessToken } from "./api";
 import { getToken } from "../storage/secureStore";
 const BASE = "http://127.0.0.1:8000/api/v1";
 
@@ -30,14 +30,21 @@ export interface IncidentCategory {
 // Create a new incident
 
 export const createIncidentForm = async (form: FormData) => {
-  const token = await getToken(); // your secure store helper
-  const res = await fetch(`${BASE}/incidents/create`, {
-    method: "POST",
-    headers: {
-      ...(token ? { Authorization: `Bearer ${token}` } : {}),
-    },
-    body: form,
-  });
+  const send = (token: string | null) =>
+    fetch(`${BASE}/incidents/create`, {
+      method: "POST",
+      headers: {
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: form,
+    });
+
+  let res = await send(await getToken()); // your secure store helper
+  if (res.status === 401) {
+    // access token expired: refresh once and resend
+    const fresh = await refreshAccessToken();
+    if (fresh) res = await send(fresh);
+  }
 
   if (!res.ok) {
     const payload = await res.json().catch(() => null);
@@ -30,3 +30,33 @@ export const removeToken = async () => {
     console.warn("Failed to remove token", e);
   }
 };
+
+const REFRESH_TOKEN_KEY = "refreshToken";
+
+// Save refresh token
+export const setRefreshToken = async (token: string) => {
+  try {
+    await AsyncStorage.setItem(REFRESH_TOKEN_KEY, token);
+  } catch (e) {
+    console.warn("Failed to set refresh token", e);
+  }
+};
+
+// Get refresh token
+export const getRefreshToken = async (): Promise<string | null> => {
+  try {
+    return await AsyncStorage.getItem(REFRESH_TOKEN_KEY);
+  } catch (e) {
+    console.warn("Failed to get refresh token", e);
+    return null;
+  }
+};
+
+// Remove refresh token
+export const removeRefreshToken = async () => {
+  try {
+    await AsyncStorage.removeItem(REFRESH_TOKEN_KEY);
+  } catch (e) {
+    console.warn("Failed to remove refresh token", e);
+  }
+};
@@ -0,0 +1,70 @@
+"""reports: daily rollup tables, incidents.closed_at
+
+Revision ID: 8c41e6b2f0d7
+Revises: 5d2f7a9c1e43
+Create Date: 2026-10-18 14:00:00.000000
+
+Run `python -m app.scripts.rebuild_rollups --start <first day>` afterwards
+to backfill the rollups from existing data.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e6b2f0d7'
+down_revision: Union[str, Sequence[str], None] = '5d2f7a9c1e43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('closed_at', sa.DateTime(), nullable=True))
+
+    op.create_table('rollup_incidents_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('barangay_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('resolved', sa.Integer(), nullable=False),
+    sa.Column('rejected', sa.Integer(), nullable=False),
+    sa.Column('resolution_seconds', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'department_id', 'barangay_id', 'category_id', name=op.f('pk_rollup_incidents_daily'))
+    )
+    op.create_table('rollup_appointments_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('booked', sa.Integer(), nullable=False),
+    sa.Column('cancelled', sa.Integer(), nullable=False),
+    sa.Column('checked_in', sa.Integer(), nullable=False),
+    sa.Column('done', sa.Integer(), nullable=False),
+    sa.Column('no_show', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'department_id', 'service_id', name=op.f('pk_rollup_appointments_daily'))
+    )
+    op.create_table('rollup_queue_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('window_id', sa.Integer(), nullable=False),
+    sa.Column('issued', sa.Integer(), nullable=False),
+    sa.Column('called', sa.Integer(), nullable=False),
+    sa.Column('served', sa.Integer(), nullable=False),
+    sa.Column('no_show', sa.Integer(), nullable=False),
+    sa.Column('wait_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('service_seconds', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'department_id', 'window_id', name=op.f('pk_rollup_queue_daily'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_queue_daily')
+    op.drop_table('rollup_appointments_daily')
+    op.drop_table('rollup_incidents_daily')
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.drop_column('closed_at')
@@ -0,0 +1,99 @@
+"""retention: archive tables for notifications, alert_reads, queue_tickets
+
+Revision ID: a6d3c9e1b2f4
+Revises: 8c41e6b2f0d7
+Create Date: 2026-10-18 17:00:00.000000
+
+On Postgres the archive tables are range-partitioned by archived_at; monthly
+partitions are created by app.scripts.run_retention (a default partition is
+created here so inserts never fail).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3c9e1b2f4'
+down_revision: Union[str, Sequence[str], None] = '8c41e6b2f0d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONED = {'postgresql_partition_by': 'RANGE (archived_at)'}
+
+
+def _default_partition(table: str) -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notifications_archive',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('type', sa.String(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('incident_id', sa.String(length=36), nullable=True),
+    sa.Column('announcement_id', sa.String(length=36), nullable=True),
+    sa.Column('alert_id', sa.String(length=36), nullable=True),
+    sa.Column('appointment_id', sa.String(length=36), nullable=True),
+    sa.Column('queue_ticket_id', sa.String(length=36), nullable=True),
+    sa.Column('read', sa.Boolean(), nullable=True),
+    sa.Column('read_at', sa.DateTime(), nullable=True),
+    sa.Column('delivered_at', sa.DateTime(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=True),
+    sa.Column('action', sa.String(), nullable=True),
+    sa.Column('deeplink', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'archived_at', name=op.f('pk_notifications_archive')),
+    **PARTITIONED
+    )
+    op.create_index('ix_notifications_archive_user_id', 'notifications_archive', ['user_id'], unique=False)
+    _default_partition('notifications_archive')
+
+    op.create_table('alert_reads_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('alert_id', sa.String(length=36), nullable=True),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('read_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'archived_at', name=op.f('pk_alert_reads_archive')),
+    **PARTITIONED
+    )
+    op.create_index('ix_alert_reads_archive_user_id', 'alert_reads_archive', ['user_id'], unique=False)
+    _default_partition('alert_reads_archive')
+
+    op.create_table('queue_tickets_archive',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=True),
+    sa.Column('service_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('number', sa.Integer(), nullable=True),
+    sa.Column('appointment_id', sa.String(length=36), nullable=True),
+    sa.Column('window_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('called_at', sa.DateTime(), nullable=True),
+    sa.Column('served_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'archived_at', name=op.f('pk_queue_tickets_archive')),
+    **PARTITIONED
+    )
+    op.create_index('ix_queue_tickets_archive_date', 'queue_tickets_archive', ['date'], unique=False)
+    _default_partition('queue_tickets_archive')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # partitions go with their parent
+    op.drop_index('ix_queue_tickets_archive_date', table_name='queue_tickets_archive')
+    op.drop_table('queue_tickets_archive')
+    op.drop_index('ix_alert_reads_archive_user_id', table_name='alert_reads_archive')
+    op.drop_table('alert_reads_archive')
+    op.drop_index('ix_notifications_archive_user_id', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
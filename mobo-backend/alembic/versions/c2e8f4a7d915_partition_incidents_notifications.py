@@ -0,0 +1,56 @@
+"""partition incidents and notifications by created_at month (Postgres, opt-in)
+
+Revision ID: c2e8f4a7d915
+Revises: a6d3c9e1b2f4
+Create Date: 2026-10-18 18:00:00.000000
+
+Only runs on Postgres with PG_PARTITIONING=true; everywhere else this is a
+no-op. Rows are copied into a RANGE(created_at) parent with one partition per
+month (see app/db/partitions.py), so run it in a maintenance window.
+
+The primary keys become (id, created_at), which Postgres requires of a
+partitioned table, so the foreign keys that point at incidents
+(incident_photos, incident_comments, notifications) are dropped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+from app.db import partitions
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8f4a7d915'
+down_revision: Union[str, Sequence[str], None] = 'a6d3c9e1b2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('incidents', 'notifications')
+
+INCIDENT_FKS = [
+    (t, f'fk_{t}_incident_id_incidents', 'FOREIGN KEY (incident_id) REFERENCES incidents(id)')
+    for t in ('incident_photos', 'incident_comments', 'notifications')
+]
+
+
+def _enabled() -> bool:
+    return op.get_bind().dialect.name == 'postgresql' and settings.PG_PARTITIONING
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _enabled():
+        return
+    for table in TABLES:
+        partitions.convert_to_partitioned(op.get_bind(), table, 'created_at', settings.PARTITION_MONTHS_AHEAD)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+    partitions.convert_to_plain(conn, 'notifications')
+    if partitions.is_partitioned(conn, 'incidents'):
+        partitions.convert_to_plain(conn, 'incidents', INCIDENT_FKS)
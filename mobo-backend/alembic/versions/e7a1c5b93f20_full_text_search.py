@@ -0,0 +1,32 @@
+"""full-text search for incidents and announcements
+
+Revision ID: e7a1c5b93f20
+Revises: c2e8f4a7d915
+Create Date: 2026-10-18 19:00:00.000000
+
+Postgres: search_vector tsvector columns + GIN indexes + triggers.
+SQLite: FTS5 external-content tables + sync triggers.
+See app/core/search.py; existing rows are indexed here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core import search
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c5b93f20'
+down_revision: Union[str, Sequence[str], None] = 'c2e8f4a7d915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    search.install(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    search.uninstall(op.get_bind())
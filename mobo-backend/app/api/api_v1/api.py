@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.dependencies.utils import get_body_field
+from fastapi.routing import APIRoute, request_response
+from fastapi.utils import generate_unique_id
+from starlette.routing import compile_path
 from app.api.api_v1.endpoints import (
     auth,
     barangays,
@@ -14,30 +18,57 @@ from app.api.api_v1.endpoints import (
     appointments,
     admin_appointments,
     officeWindow,
+    diagnostics,
+    reports,
+    media,
+    home,
+    batch,
 )
 
-api_router = APIRouter()
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(incidents.router, prefix="/incidents", tags=["incidents"])
-api_router.include_router(
-    announcements.router, prefix="/announcements", tags=["announcements"]
-)
-api_router.include_router(
-    notifications.router, prefix="/notifications", tags=["notifications"]
-)
-api_router.include_router(profile.router, prefix="/profile", tags=["profile"])
-api_router.include_router(
-    departments.router, prefix="/departments", tags=["departments"]
-)
-api_router.include_router(
-    incident_categories.router,
-    prefix="/incident_categories",
-    tags=["incident_categories"],
-)
-api_router.include_router(admin_staff.router)
-api_router.include_router(barangays.router, prefix="/barangays", tags=["barangays"])
-api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
-api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
-api_router.include_router(admin_appointments.router, prefix="/admin_appointments", tags=["admin_appointments"])
-api_router.include_router(officeWindow.router, prefix="/officeWindow", tags=["officeWindow"])
\ No newline at end of file
+api_router = APIRouter(prefix="/api/v1")
+
+
+def _mount(router: APIRouter, prefix: str = "", tags=()) -> None:
+    """
+    api_router.include_router() without building every route a second time.
+    include_router re-creates each APIRoute (dependency analysis, response
+    model cloning), which was about a quarter of worker import time; here the
+    already-built routes are moved over with the prefix, tags and the
+    path-derived operation id / body model name that include_router would
+    have given them.
+    """
+    for route in router.routes:
+        route.path = api_router.prefix + prefix + route.path
+        route.path_regex, route.path_format, route.param_convertors = compile_path(route.path)
+        if isinstance(route, APIRoute):
+            route.tags = list(tags) + route.tags
+            if route.operation_id is None:
+                route.unique_id = generate_unique_id(route)
+            for field in (route.response_field, route.secure_cloned_response_field):
+                if field is not None:
+                    field.name = field.alias = "Response_" + route.unique_id
+            if route.body_field is not None:
+                route.body_field = get_body_field(dependant=route.dependant, name=route.unique_id)
+            route.app = request_response(route.get_route_handler())
+        api_router.routes.append(route)
+
+
+_mount(auth.router, prefix="/auth", tags=["auth"])
+_mount(users.router, prefix="/users", tags=["users"])
+_mount(incidents.router, prefix="/incidents", tags=["incidents"])
+_mount(announcements.router, prefix="/announcements", tags=["announcements"])
+_mount(notifications.router, prefix="/notifications", tags=["notifications"])
+_mount(profile.router, prefix="/profile", tags=["profile"])
+_mount(departments.router, prefix="/departments", tags=["departments"])
+_mount(incident_categories.router, prefix="/incident_categories", tags=["incident_categories"])
+_mount(admin_staff.router)
+_mount(barangays.router, prefix="/barangays", tags=["barangays"])
+_mount(alerts.router, prefix="/alerts", tags=["alerts"])
+_mount(appointments.router, prefix="/appointments", tags=["appointments"])
+_mount(admin_appointments.router, prefix="/admin_appointments", tags=["admin_appointments"])
+_mount(officeWindow.router, prefix="/officeWindow", tags=["officeWindow"])
+_mount(diagnostics.router)
+_mount(reports.router)
+_mount(media.router)
+_mount(home.router)
+_mount(batch.router)
@@ -1,11 +1,12 @@
 # app/api/api_v1/endpoints/admin_appointments.py
-from datetime import time as dt_time, date as dt_date
+from datetime import datetime, time as dt_time, date as dt_date
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.session import get_db_session
-from app import models, schemas
+from app import deps, models, schemas
+from app.core import exports
 
 router = APIRouter()
 
@@ -19,6 +20,23 @@ def to_model(pyd_model, obj):
     # v1
     return pyd_model.from_orm(obj)
 
+@router.get("/export", summary="Stream appointments as CSV or NDJSON")
+def export_appointments(
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    start: Optional[datetime] = Query(None, description="slot_start >= start"),
+    end: Optional[datetime] = Query(None, description="slot_start < end"),
+    department_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    admin: deps.Identity = Depends(deps.get_current_admin),
+):
+    if not admin.is_admin:
+        if admin.department_id is None:
+            raise HTTPException(status_code=400, detail="Staff user has no department assigned.")
+        department_id = admin.department_id
+    return exports.export_response(
+        "appointments", format, exports.ExportFilters(start, end, department_id, status)
+    )
+
 @router.get("/schedules", response_model=List[schemas.ScheduleOut])
 def list_schedules(
     department_id: Optional[int] = Query(None),
@@ -92,7 +110,6 @@ def create_service(
         db.rollback()
         raise HTTPException(status_code=400, detail="Integrity error while creating service") from e
 
-    db.refresh(item)
     # Explicit conversion (works on v1/v2)
     return to_model(schemas.ServiceOut, item)
 
@@ -148,8 +165,5 @@ def create_schedules(
         db.rollback()
         raise HTTPException(status_code=409, detail="Schedule window conflicts or duplicate") from e
 
-    for c in created:
-        db.refresh(c)
-
     return [to_model(schemas.ScheduleOut, c) for c in created]
 
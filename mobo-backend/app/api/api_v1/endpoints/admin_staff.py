@@ -1,12 +1,16 @@
+import logging
 from typing import Any, Optional, List, Tuple
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from fastapi import Body
+from app.db import loading
 from app.db.session import get_db_session
-from app import models, schemas, deps
+from app import models, schemas, deps, crud
+from app.core.login import normalize_email
 from app.core.security import hash_password  # if you use it in creation
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get(
@@ -25,7 +29,7 @@ def get_staff(
 ):
     # Role gating
     role_name = (getattr(getattr(current_user, "role", None), "name", None) or "").lower()
-    print("Current user role:", role_name)
+    logger.debug("get_staff: role=%s", role_name)
     if role_name == "admin":
         allowed_roles = ["admin", "staff"]
     elif role_name == "staff":
@@ -64,7 +68,7 @@ def get_staff(
     subq = base.with_entities(models.User.id).distinct().subquery()
     total = db.query(func.count()).select_from(subq).scalar() or 0
 
-    rows: List[Tuple[models.User, Optional[str]]] = ordered.limit(limit).offset(offset).all()
+    rows: List[Tuple[models.User, Optional[str]]] = ordered.options(*loading.STAFF_ROLE).limit(limit).offset(offset).all()
     items = [
         schemas.UserWithDeptOut(
             id=u.id,
@@ -104,13 +108,13 @@ def create_department_staff(
         db.add(staff_role)
         db.flush()
 
-    exists = db.query(models.User).filter(models.User.email == payload.email).first()
+    exists = crud.get_user_by_email(db, payload.email)
     if exists:
         raise HTTPException(status_code=409, detail="Email already in use")
 
     user = models.User(
         name=payload.name,
-        email=payload.email,
+        email=normalize_email(payload.email),
         phone=payload.phone,
         password=hash_password(payload.password),  # store HASH
         role_id=staff_role.id,
@@ -119,7 +123,6 @@ def create_department_staff(
     )
     db.add(user)
     db.commit()
-    db.refresh(user)
 
     return schemas.UserWithDeptOut(
         id=user.id,
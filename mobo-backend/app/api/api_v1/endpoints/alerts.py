@@ -7,7 +7,8 @@ from datetime import datetime
 
 from app.deps import get_current_user, get_current_admin
 from app.db import session as dbsession
-from app import models, schemas
+from app import crud, encoders, models, schemas
+from app.core import serialization
 
 router = APIRouter()
 
@@ -49,7 +50,6 @@ def create_alert(
     )
     db.add(a)
     db.commit()
-    db.refresh(a)
 
     # OPTIONAL: Fan-out to your existing notifications table/push system here.
     # If you have a Notifications model, you could:
@@ -79,12 +79,6 @@ def _resolve_barangay_name(db: Session, barangay: Optional[str], barangay_id: Op
         return b.name
     return barangay
 
-def _best_effort_barangay_ids(db: Session, names: List[str]) -> dict[str, int]:
-    if not names:
-        return {}
-    lower_names = [n.lower() for n in names if n]
-    rows = db.query(models.Barangay).filter(func.lower(models.Barangay.name).in_(lower_names)).all()
-    return {r.name.lower(): r.id for r in rows}
 
 # ---------- LIST ----------
 @router.get("/", response_model=List[schemas.AlertOut])
@@ -116,25 +110,12 @@ def list_alerts(
         q = q.filter(func.lower(models.Alert.barangay) == barangay.lower())
 
     rows = q.order_by(models.Alert.created_at.desc()).limit(limit).all()
-    id_by_name = _best_effort_barangay_ids(db, [r.barangay for r in rows if r.barangay])
-
-    return [
-        schemas.AlertOut(
-            id=r.id,
-            title=r.title,
-            body=r.body,
-            severity=r.severity,
-            category=r.category,
-            barangay=r.barangay,
-            barangay_id=id_by_name.get((r.barangay or "").lower()),
-            purok=r.purok,
-            source=r.source,
-            valid_until=r.valid_until,
-            created_at=r.created_at,
-            updated_at=r.updated_at,
-        )
-        for r in rows
-    ]
+    id_by_name = crud.barangay_ids_by_name(db, [r.barangay for r in rows if r.barangay])
+
+    out = encoders.ALERT_OUT.many(rows)
+    for d in out:
+        d["barangay_id"] = id_by_name.get((d["barangay"] or "").lower())
+    return serialization.respond(out)
 
 # ---------- GET ONE ----------
 @router.get("/{alert_id}", response_model=schemas.AlertOut)
@@ -146,7 +127,7 @@ def get_alert(
     r = db.query(models.Alert).filter(models.Alert.id == alert_id).first()
     if not r:
         raise HTTPException(404, "Alert not found")
-    bmap = _best_effort_barangay_ids(db, [r.barangay] if r.barangay else [])
+    bmap = crud.barangay_ids_by_name(db, [r.barangay] if r.barangay else [])
     return schemas.AlertOut(
         id=r.id, title=r.title, body=r.body, severity=r.severity, category=r.category,
         barangay=r.barangay, barangay_id=bmap.get((r.barangay or "").lower()),
@@ -174,9 +155,8 @@ def create_alert(
     )
     db.add(r)
     db.commit()
-    db.refresh(r)
 
-    bmap = _best_effort_barangay_ids(db, [resolved_name] if resolved_name else [])
+    bmap = crud.barangay_ids_by_name(db, [resolved_name] if resolved_name else [])
     return schemas.AlertOut(
         id=r.id, title=r.title, body=r.body, severity=r.severity, category=r.category,
         barangay=r.barangay, barangay_id=bmap.get((resolved_name or "").lower()),
@@ -207,9 +187,8 @@ def update_alert(
     if payload.source is not None: r.source = payload.source
     if payload.valid_until is not None: r.valid_until = payload.valid_until
     db.commit()
-    db.refresh(r)
 
-    bmap = _best_effort_barangay_ids(db, [r.barangay] if r.barangay else [])
+    bmap = crud.barangay_ids_by_name(db, [r.barangay] if r.barangay else [])
     return schemas.AlertOut(
         id=r.id, title=r.title, body=r.body, severity=r.severity, category=r.category,
         barangay=r.barangay, barangay_id=bmap.get((r.barangay or "").lower()),
@@ -293,7 +272,6 @@ def update_prefs(
     if payload.silent_end_min is not None: p.silent_end_min = payload.silent_end_min
 
     db.commit()
-    db.refresh(p)
 
     barangay_id = None
     if p.barangay:
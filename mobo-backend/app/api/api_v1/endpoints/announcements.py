@@ -1,130 +1,94 @@
 # app/routers/announcements.py
-import os, shutil, uuid, base64, mimetypes
-from urllib.parse import urlparse, unquote
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+import logging
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import uuid
-from pathlib import Path
-import shutil
 
 from app.db.session import get_db_session
+from app.db.unit_of_work import UnitOfWork, get_unit_of_work
 from app.deps import get_current_admin, get_current_user
-from app import crud, models, schemas
+from app import crud, encoders, models, schemas
+from app.core import idempotency, metrics, search, serialization, storage
+from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Resolve uploads dir robustly (works on Windows too)
-PROJECT_ROOT = Path(__file__).resolve().parents[2]  # app/routers/ -> app -> <root>
-UPLOAD_DIR = PROJECT_ROOT / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-def _path_from_image_url(image_url: Optional[str]) -> Optional[Path]:
-    """
-    Accepts absolute or relative URLs. Returns a Path inside UPLOAD_DIR if possible.
-    Handles %20, extra path parts, etc.
-    """
-    if not image_url:
-        return None
 
-    # Parse and keep only path
-    p = urlparse(image_url).path if "://" in image_url else image_url
-    # Expect something like "/uploads/<filename>" or "uploads/<filename>"
-    if p.startswith("/"):
-        p = p[1:]
-    # normalize and ensure it begins with "uploads/"
-    if not p.lower().startswith("uploads/"):
+def _store_image(file: Optional[UploadFile], image_key: Optional[str]) -> Optional[str]:
+    """Save an uploaded image (or adopt one uploaded via POST /media/uploads); returns the image_url to store."""
+    store = storage.get_storage()
+    if file:
+        key = storage.new_key("announcements", None, file.filename, file.content_type)
+        metrics.UPLOAD_BYTES.labels("announcement_image").inc(store.save(key, file.file, file.content_type))
+    elif image_key:
+        key = image_key
+        if not key.startswith("announcements/") or ".." in key or not store.exists(key):
+            raise HTTPException(status_code=400, detail=f"Upload not found: {key}")
+    else:
         return None
+    # "/uploads/<key>" is what older rows hold too; storage.key_for() maps it back
+    return f"{settings.MEDIA_BASE_URL.rstrip('/')}/{key}"
 
-    # Extract only the final filename part, decode %xx
-    filename = os.path.basename(p)  # protects against traversal
-    filename = unquote(filename)    # turn %20 into spaces
-
-    candidate = UPLOAD_DIR / filename
-    if candidate.is_file():
-        return candidate
-
-    # Fallback: try to match by name ignoring spaces normalization
-    # (in case a previous save normalized spaces/characters)
-    try:
-        for f in UPLOAD_DIR.iterdir():
-            if f.name == filename:
-                return f
-    except Exception:
-        pass
-
-    return None
 
-def _file_to_data_uri(path: Path) -> Optional[str]:
-    try:
-        raw = path.read_bytes()
-        mime, _ = mimetypes.guess_type(str(path))
-        mime = mime or "image/jpeg"
-        b64 = base64.b64encode(raw).decode("utf-8")
-        return f"data:{mime};base64,{b64}"
-    except Exception:
-        return None
-
-def _embed_image_data_uri(image_url: Optional[str]) -> Optional[str]:
-    path = _path_from_image_url(image_url)
-    if not path:
-        return None
-    return _file_to_data_uri(path)
+_ANNOUNCEMENT_FIELDS = serialization.Fieldset(
+    encoders.ANNOUNCEMENT_OUT, models.Announcement, sources={"image_data_uri": ("image_url",)}
+)
 
 @router.get("/latest", response_model=List[schemas.AnnouncementOut])
-def latest(db: Session = Depends(get_db_session), limit: int = 5):
-    items = crud.latest_announcements(db, limit=limit)
-    out: List[schemas.AnnouncementOut] = []
-    for a in items:
-        d = schemas.AnnouncementOut.from_orm(a).dict()
-        d["image_data_uri"] = _embed_image_data_uri(a.image_url)
-        out.append(schemas.AnnouncementOut(**d))
-    return out
+def latest(
+    db: Session = Depends(get_db_session),
+    limit: int = 5,
+    fields: Optional[str] = Query(None, description="Comma-separated AnnouncementOut fields (id is always included)"),
+):
+    wanted = _ANNOUNCEMENT_FIELDS.parse(fields)
+    items = crud.latest_announcements(db, limit=limit, options=_ANNOUNCEMENT_FIELDS.load_options(wanted))
+    return serialization.respond(_ANNOUNCEMENT_FIELDS.encoder(wanted).many(items))
+
+@router.get("/search", response_model=schemas.AnnouncementSearchPage)
+def search_announcements(
+    q: str = Query(..., min_length=1, max_length=200),
+    sort: str = Query("rank", regex="^(rank|recent)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db_session),
+):
+    A = models.Announcement
+    return search.search(db, search.ANNOUNCEMENTS, q, [A.is_active.isnot(False)], sort=sort, cursor=cursor, limit=limit)
 
 @router.get("/{announcement_id}", response_model=schemas.AnnouncementOut)
 def get_announcement(announcement_id: str, db: Session = Depends(get_db_session)):
     a = crud.get_announcement_by_id(db, announcement_id)
     if not a:
         raise HTTPException(status_code=404, detail="Announcement not found")
-    d = schemas.AnnouncementOut.from_orm(a).dict()
-    d["image_data_uri"] = _embed_image_data_uri(a.image_url)
-    return schemas.AnnouncementOut(**d)
+    return serialization.respond(encoders.ANNOUNCEMENT_OUT(a))
 
-# ---------- Admin: create / update keep storing the file on disk ----------
+# ---------- Admin: create / update ----------
 
 @router.post("/", response_model=schemas.AnnouncementOut)
+@idempotency.idempotent
 def create_announcement(
     title: str = Form(...),
     body: str = Form(...),
     file: UploadFile = File(None),
-    db: Session = Depends(get_db_session),
+    image_key: Optional[str] = Form(None),  # key from POST /media/uploads instead of `file`
+    uow: UnitOfWork = Depends(get_unit_of_work),
     admin=Depends(get_current_admin),
 ):
-    image_url = None
-    if file:
-        # Normalize filename a bit to avoid weird path chars
-        clean_name = file.filename.replace("\\", "_").replace("/", "_")
-        filename = f"announcement_{uuid.uuid4()}_{clean_name}"
-        path = UPLOAD_DIR / filename
-        with path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
-        image_url = f"/uploads/{filename}"
+    db = uow.db
+    image_url = _store_image(file, image_key)
 
     a = crud.create_announcement(db, author_id=admin.id, title=title, body=body, image_url=image_url)
-    d = schemas.AnnouncementOut.from_orm(a).dict()
-    d["image_data_uri"] = _embed_image_data_uri(a.image_url)
-    try:
+    d = encoders.ANNOUNCEMENT_OUT(a)
+    with uow.best_effort(f"notification for announcement {a.id}"):
         crud.create_notification(
             db,
             user_id=a.author_id,  # use reporter_id from the updated dict
             announcement_id=a.id,  # use incident id
             message=title or "",
         )
-
-    except Exception:
-        print("[update_status] Failed to create announcement notification")
-        db.rollback()
-    return schemas.AnnouncementOut(**d)
+    uow.commit()
+    return serialization.respond(d)
 
 @router.put("/{announcement_id}", response_model=schemas.AnnouncementOut)
 def update_announcement(
@@ -132,40 +96,33 @@ def update_announcement(
     title: Optional[str] = Form(None),
     body: Optional[str] = Form(None),
     file: UploadFile = File(None),
-    db: Session = Depends(get_db_session),
+    image_key: Optional[str] = Form(None),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     admin=Depends(get_current_admin),
 ):
+    db = uow.db
     fields = {}
     if title is not None:
         fields["title"] = title
     if body is not None:
         fields["body"] = body
-    if file:
-        clean_name = file.filename.replace("\\", "_").replace("/", "_")
-        filename = f"announcement_{uuid.uuid4()}_{clean_name}"
-        path = UPLOAD_DIR / filename
-        with path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
-        fields["image_url"] = f"/uploads/{filename}"
+    if file or image_key:
+        fields["image_url"] = _store_image(file, image_key)
 
     a = crud.update_announcement(db, announcement_id, **fields)
     if not a:
         raise HTTPException(status_code=404, detail="Announcement not found")
 
-    d = schemas.AnnouncementOut.from_orm(a).dict()
-    d["image_data_uri"] = _embed_image_data_uri(a.image_url)
-    try:
+    d = encoders.ANNOUNCEMENT_OUT(a)
+    with uow.best_effort(f"notification for announcement {a.id}"):
         crud.create_notification(
             db,
             user_id=a.author_id,  # use reporter_id from the updated dict
             announcement_id=a.id,  # use incident id
             message=title or "",
         )
-
-    except Exception:
-        print("[update_status] Failed to create announcement notification")
-        db.rollback()
-    return schemas.AnnouncementOut(**d)
+    uow.commit()
+    return serialization.respond(d)
 
 def _author_name(db: Session, c) -> Optional[str]:
     # Prefer the eager-loaded relationship
@@ -202,6 +159,7 @@ def list_comments(announcement_id: str, db: Session = Depends(get_db_session), u
     return [ser(c) for c in tree]
 
 @router.post("/{announcement_id}/comments", response_model=schemas.AnnouncementCommentOut)
+@idempotency.idempotent
 def post_comment(
     announcement_id: str,
     payload: schemas.AnnouncementCommentCreate,
@@ -1,5 +1,6 @@
 # app/api/api_v1/endpoints/appointments.py
 from __future__ import annotations
+import logging
 from datetime import datetime, date as ddate, time as dtime, timedelta
 from typing import List, Optional
 
@@ -9,8 +10,11 @@ from sqlalchemy import func, and_
 
 from app.db.session import get_db_session
 from app.deps import get_current_user
+from app.core.queue_analytics import queue_analytics
+from app.core import idempotency, rollups, serialization
 from app import models, schemas, crud
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # ---------------------------
@@ -93,8 +97,6 @@ def get_slots(
     svc = db.query(models.AppointmentService).get(service_id)
     if not svc or not svc.is_active:
         raise HTTPException(404, "Service not found")
-    debugdata = db.query(models.AppointmentSchedule).all()
-    print(f"data {debugdata}")
     schedules = (
         db.query(models.AppointmentSchedule)
         .filter(
@@ -105,6 +107,7 @@ def get_slots(
         )
         .all()
     )
+    logger.debug("slots: service=%s day=%s schedules=%d", service_id, day, len(schedules))
     out: list[schemas.SlotOut] = []
     for s in schedules:
         step_min = s.slot_minutes or svc.duration_min or 15
@@ -132,6 +135,7 @@ def get_slots(
 # ---------------------------
 
 @router.post("", response_model=schemas.AppointmentOut)
+@idempotency.idempotent
 def book(
     payload: schemas.AppointmentCreate,
     db: Session = Depends(get_db_session),
@@ -175,19 +179,27 @@ def book(
     )
     
     db.add(appt)
+    rollups.record_appointment(db, appt, "booked")
     db.commit()
-    db.refresh(appt)
     return _to_model(schemas.AppointmentOut, appt)
 
+_APPOINTMENT_FIELDS = serialization.Fieldset(serialization.Encoder(schemas.AppointmentOut), models.Appointment)
+
 @router.get("/me", response_model=List[schemas.AppointmentOut])
-def my_appointments(db: Session = Depends(get_db_session), user = Depends(get_current_user)):
+def my_appointments(
+    db: Session = Depends(get_db_session),
+    user = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Comma-separated AppointmentOut fields (id is always included)"),
+):
+    wanted = _APPOINTMENT_FIELDS.parse(fields)
     rows = (
         db.query(models.Appointment)
+        .options(*_APPOINTMENT_FIELDS.load_options(wanted))
         .filter(models.Appointment.user_id == user.id)
         .order_by(models.Appointment.slot_start.desc())
         .all()
     )
-    return [_to_model(schemas.AppointmentOut, r) for r in rows]
+    return serialization.respond(_APPOINTMENT_FIELDS.encoder(wanted).many(rows))
 
 @router.post("/{appointment_id}/cancel")
 def cancel(
@@ -201,6 +213,7 @@ def cancel(
     if appt.status not in ("booked",):
         raise HTTPException(400, "Cannot cancel this appointment")
     appt.status = "cancelled"
+    rollups.record_appointment(db, appt, "cancelled")
     db.commit()
     return {"ok": True}
 
@@ -209,6 +222,7 @@ def cancel(
 # ---------------------------
 
 @router.post("/{appointment_id}/checkin", response_model=schemas.QueueTicketOut)
+@idempotency.idempotent
 def checkin(
     appointment_id: str,
     payload: schemas.CheckinPayload,
@@ -246,10 +260,11 @@ def checkin(
     appt.queue_number = next_num
     appt.queue_date = qdate
     appt.status = "checked_in"
+    rollups.record_appointment(db, appt, "checked_in")
+    rollups.record_ticket(db, ticket, "issued")
 
     db.commit()
-    db.refresh(ticket)
-    db.refresh(appt)
+    queue_analytics.on_issued(ticket)
     return _to_model(schemas.QueueTicketOut, ticket)
 
 @router.get("/queue/now", response_model=schemas.QueueNowOut)
@@ -257,36 +272,26 @@ def queue_now(
     department_id: int = Query(...),
     db: Session = Depends(get_db_session),
 ):
-    qdate = datetime.combine(datetime.utcnow().date(), dtime(0,0))
-
-    now_serving = (
-        db.query(models.QueueTicket.number)
-        .filter(models.QueueTicket.department_id == department_id,
-                models.QueueTicket.date == qdate,
-                models.QueueTicket.status == "serving")
-        .order_by(models.QueueTicket.called_at.desc())
-        .limit(1)
-        .scalar()
-    )
-
-    waiting = (
-        db.query(func.count(models.QueueTicket.id))
-        .filter(models.QueueTicket.department_id == department_id,
-                models.QueueTicket.date == qdate,
-                models.QueueTicket.status == "waiting")
-        .scalar()
-        or 0
-    )
-
-    # (Optional) compute a simple average; set None for now
-    avg = None
+    return schemas.QueueNowOut(**crud.queue_status(db, department_id))
 
-    return schemas.QueueNowOut(
-        department_id=department_id,
-        date=qdate,
-        now_serving=now_serving,
-        waiting=waiting,
-        average_wait_min=avg,
+@router.get("/queue/tickets/{ticket_id}/eta", response_model=schemas.QueueTicketEtaOut)
+def ticket_eta(
+    ticket_id: str,
+    db: Session = Depends(get_db_session),
+):
+    """Position and estimated call time for one ticket, from the in-memory queue stats."""
+    t = db.query(models.QueueTicket).get(ticket_id)
+    if not t:
+        raise HTTPException(404, "Ticket not found")
+    queue_analytics.maybe_sync(db, t.department_id)
+    est = queue_analytics.estimate(t)
+    return schemas.QueueTicketEtaOut(
+        ticket_id=t.id,
+        department_id=t.department_id,
+        number=t.number,
+        status=t.status,
+        average_wait_min=queue_analytics.average_wait_min(t.department_id, t.service_id),
+        **est,
     )
 
 
@@ -298,15 +303,4 @@ def my_current_appointment(
     db: Session = Depends(get_db_session),
     user=Depends(get_current_user),
 ):
-    now = datetime.utcnow()
-    appt = (
-        db.query(models.Appointment)
-        .filter(
-            models.Appointment.user_id == user.id,
-            models.Appointment.status.in_(["booked", "checked_in", "serving"]),
-            models.Appointment.slot_end >= now,
-        )
-        .order_by(models.Appointment.slot_start.asc())
-        .first()
-    )
-    return appt
\ No newline at end of file
+    return crud.current_appointment(db, user.id)
\ No newline at end of file
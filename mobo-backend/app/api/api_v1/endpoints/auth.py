@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 from app import schemas, crud, models
 from app.db.session import get_db_session
 from fastapi.security import OAuth2PasswordRequestForm
-from app.core.security import verify_password, create_access_token
+from app.core import login, tokens
+from app.core.security import decode_token
+from app.deps import oauth2_scheme
+from jose import JWTError
 
 router = APIRouter()
 
-
-from sqlalchemy.orm import joinedload
-
 UPLOAD_DIR = "uploads"
 
 
@@ -20,7 +22,6 @@ UPLOAD_DIR = "uploads"
 )
 def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db_session)):
     # Check if email exists
-    print("test")
     existing = crud.get_user_by_email(db, email=user_in.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -32,7 +33,6 @@ def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db_sess
             role_obj = models.Role(name=role_name)
             db.add(role_obj)
             db.commit()
-            db.refresh(role_obj)
 
     # Get the role object from the payload
     role_obj = db.query(models.Role).filter(models.Role.name == user_in.role).first()
@@ -51,27 +51,69 @@ def register_user(user_in: schemas.UserCreate, db: Session = Depends(get_db_sess
         role_id=role_obj.id,
     )
 
-    # Load role relationship
-    user = (
-        db.query(models.User)
-        .options(joinedload(models.User.role))
-        .filter_by(id=user.id)
-        .first()
-    )
-
+    # user.role: role_obj above is already in the session, so no query
     # Convert SQLAlchemy Role object to dict for Pydantic
     user_dict = user.__dict__.copy()
     user_dict["role"] = {"id": str(user.role.id), "name": user.role.name}
     return user_dict
 
 
+def _save_rehash(db: Session, user: models.User, new_hash: str) -> None:
+    user.password = new_hash
+    db.commit()
+
+
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db_session),
 ):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password):
+    # async so bcrypt waits in the process pool instead of holding a threadpool thread
+    email = login.normalize_email(form_data.username)
+    login.check_rate_limits(email, request.client.host if request.client else None)
+
+    user = await run_in_threadpool(crud.get_user_by_email, db, email)
+    if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
-    token = create_access_token(str(user.id))
-    return {"access_token": token, "token_type": "bearer"}
+    ok, new_hash = await login.verify_password_async(form_data.password, user.password)
+    if not ok:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    if user.is_active is False:
+        raise HTTPException(status_code=400, detail="Account is disabled")
+    if new_hash:
+        await run_in_threadpool(_save_rehash, db, user, new_hash)
+    return await run_in_threadpool(tokens.issue_tokens, db, user)
+
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(payload: schemas.RefreshRequest, db: Session = Depends(get_db_session)):
+    """Trade a refresh token for a new access token (and a new refresh token)."""
+    try:
+        return tokens.rotate_refresh_token(db, payload.refresh_token)
+    except tokens.RefreshError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    payload: Optional[schemas.LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db_session),
+):
+    """
+    Revoke this session's refresh token and the calling access token.
+    all_devices=true signs the user out everywhere.
+    """
+    try:
+        claims = decode_token(token)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    payload = payload or schemas.LogoutRequest()
+    if payload.all_devices:
+        tokens.revoke_user_tokens(db, claims["sub"])
+    elif payload.refresh_token:
+        tokens.revoke_refresh_token(db, payload.refresh_token)
+    tokens.revoke_access_token(db, claims)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -89,7 +89,6 @@ def create_barangay(
 
     db.add(b)
     db.commit()
-    db.refresh(b)
 
     return schemas.BarangayOut(id=b.id, name=b.name, code=getattr(b, "code", None))
 
@@ -134,7 +133,6 @@ def update_barangay(
             setattr(b, "code", new_code)
 
     db.commit()
-    db.refresh(b)
     return schemas.BarangayOut(id=b.id, name=b.name, code=getattr(b, "code", None))
 
 
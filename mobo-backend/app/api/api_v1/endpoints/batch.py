@@ -0,0 +1,28 @@
+# app/api/api_v1/endpoints/batch.py
+"""POST /batch: several API calls in one HTTP request (see app/core/batch.py)."""
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app import deps, schemas
+from app.core import batch, serialization
+from app.core.config import settings
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post("", response_model=schemas.BatchOut, summary="Run several API requests in one round trip")
+async def run_batch(
+    payload: schemas.BatchRequest,
+    request: Request,
+    token: str = Depends(deps.oauth2_scheme),
+    claims: dict = Depends(deps.get_token_payload),
+):
+    if not payload.requests:
+        raise HTTPException(422, "requests is empty")
+    if len(payload.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(422, f"At most {settings.BATCH_MAX_REQUESTS} requests per batch")
+    reset = deps.verified_token.set((token, claims))
+    try:
+        responses = await batch.run(request.scope, [r.dict() for r in payload.requests], settings.BATCH_CONCURRENCY)
+    finally:
+        deps.verified_token.reset(reset)
+    return serialization.respond({"responses": responses})
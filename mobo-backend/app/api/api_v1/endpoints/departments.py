@@ -111,5 +111,4 @@ def create_department(payload: schemas.DepartmentCreate, db: Session = Depends(g
     dept = Department(name=payload.name, description=payload.description)
     db.add(dept)
     db.commit()
-    db.refresh(dept)
     return dept
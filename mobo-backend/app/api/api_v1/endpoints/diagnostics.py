@@ -0,0 +1,30 @@
+# app/api/api_v1/endpoints/diagnostics.py
+from typing import Any
+from fastapi import APIRouter, Depends, Query, status
+
+from app import deps
+from app.core.config import settings
+from app.core.instrumentation import route_stats
+
+router = APIRouter(prefix="/admin/diagnostics", tags=["admin"])
+
+
+@router.get("/queries", summary="Per-route SQL query counts and DB time (this worker)")
+def query_stats(
+    _: Any = Depends(deps.require_admin),
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = Query("queries", regex="^(queries|avg_queries|max_queries|db_ms|avg_db_ms|slow_queries|requests)$"),
+):
+    rows = route_stats.snapshot()
+    rows.sort(key=lambda r: r[sort], reverse=True)
+    return {
+        "enabled": settings.QUERY_INSTRUMENTATION,
+        "slow_query_ms": settings.SLOW_QUERY_MS,
+        "routes": rows[:limit],
+    }
+
+
+@router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_query_stats(_: Any = Depends(deps.require_admin)):
+    route_stats.reset()
+    return None
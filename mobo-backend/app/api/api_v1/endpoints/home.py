@@ -0,0 +1,156 @@
+# app/api/api_v1/endpoints/home.py
+"""
+GET /home: what HomeScreen shows on launch, in one round trip instead of six
+(profile, latest announcements, recent alerts with the caller's read ids,
+unread notification count, current appointment with its queue).
+
+The caller is authenticated once, from the token claims. The sections are
+independent reads, so each runs in its own worker thread with its own
+session; the response takes about as long as the slowest section rather
+than the sum. A section that fails comes back null and is named in `errors`
+instead of failing the whole screen.
+
+Every section has an ETag in `etags`. A client that sends them back as
+`?have=alerts:<etag>,profile:<etag>` gets unchanged sections left out (and
+listed in `unchanged`); the document as a whole has an ETag for
+If-None-Match -> 304.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, deps, encoders, models, schemas
+from app.core import serialization
+from app.core.queue_analytics import queue_analytics
+from app.db import loading
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/home", tags=["home"])
+
+_APPOINTMENT_OUT = serialization.Encoder(schemas.AppointmentOut)
+
+
+def _profile(db: Session, identity: deps.Identity, **_):
+    user = db.query(models.User).options(*loading.USER_WITH_ROLE).filter(models.User.id == identity.id).first()
+    return encoders.USER_OUT(user) if user else None
+
+
+def _announcements(db: Session, identity: deps.Identity, announcements_limit: int, **_):
+    return encoders.ANNOUNCEMENT_OUT.many(crud.latest_announcements(db, limit=announcements_limit))
+
+
+def _alerts(db: Session, identity: deps.Identity, alerts_limit: int, **_):
+    rows = db.query(models.Alert).order_by(models.Alert.created_at.desc()).limit(alerts_limit).all()
+    id_by_name = crud.barangay_ids_by_name(db, [r.barangay for r in rows if r.barangay])
+    items = encoders.ALERT_OUT.many(rows)
+    for d in items:
+        d["barangay_id"] = id_by_name.get((d["barangay"] or "").lower())
+    ids = [r.id for r in rows]
+    read = set()
+    if ids:
+        read = {
+            r[0] for r in db.query(models.AlertRead.alert_id)
+            .filter(models.AlertRead.user_id == identity.id, models.AlertRead.alert_id.in_(ids))
+        }
+    return {"items": items, "read_ids": [i for i in ids if i in read], "unread": len(ids) - len(read)}
+
+
+def _notifications(db: Session, identity: deps.Identity, **_):
+    return {"unread": crud.count_unread_notifications(db, identity.id)}
+
+
+def _appointment(db: Session, identity: deps.Identity, **_):
+    appt = crud.current_appointment(db, identity.id)
+    if appt is None:
+        return None
+    out = {"appointment": _APPOINTMENT_OUT(appt), "queue": crud.queue_status(db, appt.department_id), "ticket": None}
+    if appt.queue_number is not None:
+        t = (
+            db.query(models.QueueTicket)
+            .filter(models.QueueTicket.appointment_id == appt.id)
+            .order_by(models.QueueTicket.created_at.desc())
+            .first()
+        )
+        if t is not None:
+            queue_analytics.maybe_sync(db, t.department_id)
+            out["ticket"] = {
+                "ticket_id": t.id, "department_id": t.department_id, "number": t.number, "status": t.status,
+                "average_wait_min": queue_analytics.average_wait_min(t.department_id, t.service_id),
+                **queue_analytics.estimate(t),
+            }
+    return out
+
+
+SECTIONS: Dict[str, Callable] = {
+    "profile": _profile,
+    "announcements": _announcements,
+    "alerts": _alerts,
+    "notifications": _notifications,
+    "appointment": _appointment,
+}
+
+
+def _etag(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+async def _run(name: str, fn: Callable, identity: deps.Identity, params: dict):
+    def work():
+        db = SessionLocal()
+        try:
+            return fn(db, identity, **params)
+        finally:
+            db.close()
+
+    t0 = time.perf_counter()
+    try:
+        value, failed = await run_in_threadpool(work), False
+    except Exception:
+        logger.exception("home section %s failed", name)
+        value, failed = None, True
+    return name, value, failed, (time.perf_counter() - t0) * 1000.0
+
+
+@router.get("", response_model=schemas.HomeOut, summary="Everything the home screen needs, in one call")
+async def home(
+    request: Request,
+    have: Optional[str] = Query(None, description="section:etag pairs the client already has, comma-separated"),
+    announcements_limit: int = Query(5, ge=1, le=20),
+    alerts_limit: int = Query(20, ge=1, le=100),
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    params = {"announcements_limit": announcements_limit, "alerts_limit": alerts_limit}
+    results = await asyncio.gather(*(_run(name, fn, identity, params) for name, fn in SECTIONS.items()))
+
+    known = dict(p.split(":", 1) for p in (have or "").split(",") if ":" in p)
+    doc = {"etags": {}, "unchanged": [], "errors": []}
+    timings = []
+    for name, value, failed, ms in results:
+        timings.append(f"home-{name};dur={ms:.1f}")
+        if failed:
+            doc[name] = None
+            doc["errors"].append(name)
+            continue
+        tag = _etag(serialization.dumps(value))
+        doc["etags"][name] = tag
+        if known.get(name) == tag:
+            doc[name] = None
+            doc["unchanged"].append(name)
+        else:
+            doc[name] = value
+
+    etag = '"%s"' % _etag("|".join(f"{k}:{v}" for k, v in sorted(doc["etags"].items())).encode("ascii"))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Server-Timing": ", ".join(timings)}
+    # weak comparison: the compression middleware marks the tag W/ on gzipped bodies
+    sent = [t.strip()[2:] if t.strip().startswith("W/") else t.strip()
+            for t in request.headers.get("if-none-match", "").split(",")]
+    if not doc["errors"] and etag in sent:
+        return Response(status_code=304, headers=headers)
+    return serialization.respond(doc, headers=headers)
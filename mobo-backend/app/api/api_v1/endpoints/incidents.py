@@ -1,5 +1,5 @@
 # app/api/api_v1/endpoints/incidents.py
-import pathlib
+import logging
 from app import deps
 from fastapi import (
     APIRouter,
@@ -15,25 +15,39 @@ from fastapi import (
 )
 import uuid
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Any, List, Optional
-import os, shutil
+import shutil
+from app.db import loading
 from app.db.session import get_db_session
+from app.db.unit_of_work import UnitOfWork, get_unit_of_work
 from app.deps import get_current_user, get_current_admin
 from datetime import datetime
 from app import crud, schemas, models
-import base64
-from pathlib import Path
+from app.core import exports, idempotency, metrics, search, serialization, storage
 from sqlalchemy import inspect as sa_inspect
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
-UPLOAD_DIR = "uploads/incidents"
-BASE_URL = "http://localhost:8081"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+MAX_PHOTO_KEYS = 10
 
 
+def _attach_uploaded(db: Session, inc, owner_id: str, keys: List[str]) -> List[str]:
+    """Record photos the client uploaded straight to storage (POST /media/uploads)."""
+    store = storage.get_storage()
+    urls = []
+    for key in keys[:MAX_PHOTO_KEYS]:
+        if not key.startswith(f"incidents/{owner_id}/") or ".." in key:
+            raise HTTPException(status_code=400, detail=f"Not your upload: {key}")
+        if not store.exists(key):
+            raise HTTPException(status_code=400, detail=f"Upload not found: {key}")
+        crud.add_incident_photo(db=db, incident_id=inc.id, storage_path=key)
+        urls.append(store.url(key))
+    return urls
 
 
 @router.post("/create", response_model=schemas.IncidentOut)
+@idempotency.idempotent
 async def create_incident(
     request: Request,
     title: str = Form(...),
@@ -46,9 +60,12 @@ async def create_incident(
     landmark: Optional[str] = Form(None),
     department_id: Optional[int] = Form(None),
     files: List[UploadFile] = File([]),
-    db: Session = Depends(get_db_session),
+    photo_keys: List[str] = Form([]),  # keys of photos already uploaded via POST /media/uploads
+    uow: UnitOfWork = Depends(get_unit_of_work),
     current_user=Depends(get_current_user),
 ):
+    # incident, photos and notification go in one transaction (app/db/unit_of_work.py)
+    db = uow.db
     # --- Create incident record ---
     department_to_assign = department_id
     if category_id and not department_id:
@@ -76,34 +93,33 @@ async def create_incident(
     saved_photos_urls = []
 
     # --- Save uploaded files ---
+    store = storage.get_storage()
     for upload in files:
-        filename = f"{inc.id}_{pathlib.Path(upload.filename).name}"
-        safe_path = os.path.join(UPLOAD_DIR, filename)
-        with open(safe_path, "wb") as f:
-            f.write(await upload.read())
+        key = storage.new_key("incidents", current_user.id, upload.filename, upload.content_type)
+        size = await run_in_threadpool(store.save, key, upload.file, upload.content_type)
+        metrics.UPLOAD_BYTES.labels("incident_photo").inc(size)
 
         # Save DB record
-        photo_record = crud.add_incident_photo(
+        crud.add_incident_photo(
             db=db,
             incident_id=inc.id,
-            storage_path=safe_path,
-            url=f"{BASE_URL}/uploads/incidents/{filename}",
+            storage_path=key,  # URLs are signed per response, never stored
         )
-        saved_photos_urls.append(photo_record.url)
+        saved_photos_urls.append(store.url(key))
+    if photo_keys:
+        saved_photos_urls += await run_in_threadpool(_attach_uploaded, db, inc, current_user.id, photo_keys)
 
     # --- Optional notification ---
-    try:
+    with uow.best_effort(f"notification for incident {inc.id}"):
         crud.create_notification(
             db,
             user_id=current_user.id,
             incident_id=inc.id,
             message=f"Incident {inc.title} submitted",
         )
-    except Exception:
-        db.rollback()
+    uow.commit()
 
-    # --- Refresh and resolve names ---
-    db.refresh(inc)
+    # --- Resolve names ---
     type_name = None
     department_name = None
     if inc.incident_type:
@@ -122,7 +138,7 @@ async def create_incident(
         "description": inc.description,
         "address": inc.address,
         "purok": inc.purok,
-        "barangay": inc.barangay,
+        "barangay": inc.barangay_name,
         "street": inc.street,
         "landmark": inc.landmark,
         "department": inc.department,
@@ -136,6 +152,72 @@ async def create_incident(
     }
 
 
+# crud.list_incidents_all already builds IncidentOut-shaped dicts
+_INCIDENT_OUT = serialization.Encoder(schemas.IncidentOut)
+# ORM rows: renamed columns, barangay as its name, photos as URLs
+_MY_INCIDENT_OUT = serialization.Encoder(schemas.IncidentOut, getters={
+    "type": lambda inc: inc.incident_type,
+    "barangay": lambda inc: inc.barangay_name,
+    "photos": lambda inc: [u for u in (storage.client_ref(p.storage_path or p.url) for p in inc.photos) if u],
+    "reportedAt": lambda inc: inc.created_at,
+})
+# ?fields=: IncidentOut fields -> the incidents columns each one is built from
+_INCIDENT_SOURCES = {
+    "type": ("incident_type",),
+    "type_name": ("incident_type",),
+    "barangay": ("barangay_id",),
+    "department_name": ("department",),
+    "photos": (),
+    "reporterName": ("reporter_id",),
+    "reporterPhone": ("reporter_id",),
+    "reportedAt": ("created_at",),
+}
+_INCIDENT_FIELDS = serialization.Fieldset(_INCIDENT_OUT, models.Incident, sources=_INCIDENT_SOURCES)
+_MY_INCIDENT_FIELDS = serialization.Fieldset(_MY_INCIDENT_OUT, models.Incident, sources=_INCIDENT_SOURCES)
+FIELDS_QUERY = Query(None, description="Comma-separated IncidentOut fields to return (id is always included); default all")
+
+# before /{incident_id}, which would otherwise take "me" for an id
+@router.get("/me", response_model=List[schemas.IncidentOut])
+def my_incidents(
+    db: Session = Depends(get_db_session),
+    current_user=Depends(get_current_user),
+    skip: int = 0,
+    limit: int = 50,
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    wanted = _MY_INCIDENT_FIELDS.parse(fields)
+    rows = crud.list_incidents_for_user(
+        db, current_user.id, skip=skip, limit=limit,
+        options=_MY_INCIDENT_FIELDS.load_options(wanted) + loading.incident_list(wanted),
+    )
+    return serialization.respond(_MY_INCIDENT_FIELDS.encoder(wanted).many(rows))
+
+
+@router.get("/search", response_model=schemas.IncidentSearchPage, summary="Full-text search over incidents")
+def search_incidents(
+    q: str = Query(..., min_length=1, max_length=200),
+    department_id: Optional[int] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    sort: str = Query("rank", regex="^(rank|recent)$"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db_session),
+    admin: deps.Identity = Depends(get_current_admin),
+):
+    # declared before /{incident_id} so "search" isn't taken for an id
+    if not admin.is_admin:
+        if admin.department_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Staff user has no department assigned.")
+        department_id = admin.department_id
+    I = models.Incident
+    where = []
+    if department_id is not None:
+        where.append(I.department == department_id)
+    if status_filter:
+        where.append(I.status == status_filter)
+    return search.search(db, search.INCIDENTS, q, where, sort=sort, cursor=cursor, limit=limit)
+
+
 @router.get("/{incident_id}", response_model=schemas.IncidentOut)
 def get_incident(
     incident_id: str,
@@ -168,12 +250,9 @@ def get_incident(
         # --- Prepare photos list from IncidentPhoto ---
     photos_list = []
     for p in inc.photos:
-        if p.url:
-            file_path = Path("uploads/incidents") / Path(p.url).name
-            if file_path.exists():
-                with open(file_path, "rb") as f:
-                    encoded = base64.b64encode(f.read()).decode("utf-8")
-                    photos_list.append(f"data:image/jpeg;base64,{encoded}")
+        uri = storage.client_ref(p.storage_path or p.url)
+        if uri:
+            photos_list.append(uri)
 
     # --- Build response ---
     return {
@@ -185,7 +264,7 @@ def get_incident(
         "description": inc.description,
         "address": inc.address,
         "purok": inc.purok,
-        "barangay": inc.barangay,
+        "barangay": inc.barangay_name,
         "street": inc.street,
         "landmark": inc.landmark,
         "department": inc.department,
@@ -199,15 +278,6 @@ def get_incident(
     }
 
 
-@router.get("/me", response_model=List[schemas.IncidentOut])
-def my_incidents(
-    db: Session = Depends(get_db_session),
-    current_user=Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 50,
-):
-    return crud.list_incidents_for_user(db, current_user.id, skip=skip, limit=limit)
-
 # Admin: list all incidents ordered by date
 @router.get("/admin/all", response_model=List[schemas.IncidentOut])
 def all_incidents(
@@ -215,12 +285,21 @@ def all_incidents(
     current_user: models.User = Depends(deps.get_current_user),  # <-- use current user
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    since: Optional[datetime] = Query(None, description="created_at >= since"),
+    before: Optional[datetime] = Query(None, description="created_at < before (page cursor)"),
+    fields: Optional[str] = FIELDS_QUERY,
 ):
     role_name = (getattr(getattr(current_user, "role", None), "name", None) or "").lower()
+    wanted = _INCIDENT_FIELDS.parse(fields)
+    sparse = dict(fields=wanted, options=_INCIDENT_FIELDS.load_options(wanted) + loading.incident_list(wanted))
+    out = _INCIDENT_FIELDS.encoder(wanted)
 
     if role_name == "admin":
         # admins see everything
-        return crud.list_incidents_all(db, skip=skip, limit=limit, department_id=None)
+        rows = crud.list_incidents_all(
+            db, skip=skip, limit=limit, department_id=None, since=since, before=before, **sparse
+        )
+        return serialization.respond(out.many(rows))
 
     if role_name == "staff":
         # staff must be assigned to a department
@@ -229,9 +308,11 @@ def all_incidents(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Staff user has no department assigned."
             )
-        return crud.list_incidents_all(
-            db, skip=skip, limit=limit, department_id=current_user.department_id
+        rows = crud.list_incidents_all(
+            db, skip=skip, limit=limit, department_id=current_user.department_id,
+            since=since, before=before, **sparse
         )
+        return serialization.respond(out.many(rows))
 
     # others are forbidden
     raise HTTPException(
@@ -239,15 +320,33 @@ def all_incidents(
         detail="You don't have permission to view incidents."
     )
 
+@router.get("/admin/export", summary="Stream incidents as CSV or NDJSON (photo URLs, no bytes)")
+def export_incidents(
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    start: Optional[datetime] = Query(None, description="created_at >= start"),
+    end: Optional[datetime] = Query(None, description="created_at < end"),
+    department_id: Optional[int] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    admin: deps.Identity = Depends(get_current_admin),
+):
+    if not admin.is_admin:
+        # staff only ever export their own department
+        if admin.department_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Staff user has no department assigned.")
+        department_id = admin.department_id
+    return exports.export_response(
+        "incidents", format, exports.ExportFilters(start, end, department_id, status_filter)
+    )
+
 # file: your router (where you had the endpoint)
 @router.put("/admin/{incident_id}/status", response_model=schemas.IncidentOut)
 def update_status(
     incident_id: str,
     payload: schemas.IncidentStatusUpdate,
-    db: Session = Depends(get_db_session),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     admin=Depends(get_current_admin),
 ) -> Any:
-    print("admin user:", admin.id, getattr(admin, "name", None), admin)
+    db = uow.db
     # update incident (pass departmentId through)
     updated = crud.update_incident_status(
         db,
@@ -259,19 +358,16 @@ def update_status(
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Incident not found")
-    print("Updated incident:", updated)
+    logger.info("incident %s status -> %s by %s", incident_id, payload.new_status, admin.id)
     # create notification
-    try:
+    with uow.best_effort(f"update_status: notification for incident {incident_id}"):
         crud.create_notification(
             db,
             user_id=updated["reporter_id"],  # use reporter_id from the updated dict
             incident_id=updated["id"],  # use incident id
             message=payload.comment or "",
         )
-
-    except Exception:
-        print("[update_status] Failed to create notification")
-        db.rollback()
+    uow.commit()
 
     return updated
 
@@ -285,6 +381,25 @@ def _comment_text_key() -> str:
             return k
     raise HTTPException(status_code=500, detail="IncidentComment has no text column.")
 
+@router.post("/{incident_id}/photos", summary="Attach photos uploaded directly to storage")
+@idempotency.idempotent
+def attach_photos(
+    incident_id: str,
+    payload: schemas.IncidentPhotoAttach,
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    current_user=Depends(get_current_user),
+):
+    db = uow.db
+    inc = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
+    if not inc:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    if inc.reporter_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the reporter can add photos")
+    urls = _attach_uploaded(db, inc, current_user.id, payload.keys)
+    uow.commit()  # all of them or none
+    return {"photos": urls}
+
+
 @router.get("/{incident_id}/comments", response_model=List[schemas.IncidentCommentOut])
 def list_comments(
     incident_id: str,
@@ -340,12 +455,14 @@ def list_comments(
     status_code=status.HTTP_201_CREATED,
     summary="Add a comment / follow-up to an incident",
 )
+@idempotency.idempotent
 def post_comment(
     incident_id: str,
     payload: schemas.IncidentCommentCreate,
-    db: Session = Depends(get_db_session),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     current_user: models.User = Depends(deps.get_current_user),
 ):
+    db = uow.db
     # 1) incident exists?
     inc = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
     if not inc:
@@ -375,23 +492,18 @@ def post_comment(
         **{text_key: msg},
     )
     db.add(c)
-    db.commit()
-    db.refresh(c)
 
     # 5) author name (optional join avoided here for speed)
     author_name = getattr(current_user, "name", None)
-    # create notification
-    try:
+    # create notification (same transaction as the comment)
+    with uow.best_effort(f"post_comment: notification for incident {incident_id}"):
         crud.create_notification(
             db,
             user_id=inc.reporter_id,  # use reporter_id from the updated dict
             incident_id=incident_id,  # use incident id
             message=payload.comment or "",
         )
-
-    except Exception:
-        print("[update_status] Failed to create notification")
-        db.rollback()
+    uow.commit()
     return schemas.IncidentCommentOut(
         id=str(c.id),
         incident_id=str(c.incident_id),
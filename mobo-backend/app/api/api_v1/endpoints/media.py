@@ -0,0 +1,140 @@
+# app/api/api_v1/endpoints/media.py
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from app import deps, schemas
+from app.core import idempotency, resumable, storage
+from app.core.config import settings
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+_PREFIX = {"incident_photo": "incidents", "announcement_image": "announcements"}
+
+
+def _check_request(payload: schemas.MediaUploadRequest, identity: deps.Identity) -> None:
+    if payload.kind == "announcement_image" and identity.role not in ("admin", "staff"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    if payload.size > settings.MEDIA_UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+
+
+def _key_owner(payload: schemas.MediaUploadRequest, identity: deps.Identity) -> Optional[str]:
+    return identity.id if payload.kind == "incident_photo" else None
+
+
+def _offset_headers(st: dict) -> dict:
+    return {
+        "Upload-Offset": str(st["offset"]),
+        "Upload-Length": str(st["length"]),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("/uploads", response_model=schemas.MediaUploadTicket, summary="Presigned direct-to-storage upload")
+def create_upload(
+    payload: schemas.MediaUploadRequest,
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    """
+    Returns a form the client POSTs the file to (url + fields, file last),
+    then passes `key` to POST /incidents/create (photo_keys),
+    POST /incidents/{id}/photos or the announcement form (image_key).
+    """
+    store = storage.get_storage()
+    if not store.direct_uploads:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Direct uploads need STORAGE_BACKEND=s3")
+    _check_request(payload, identity)
+
+    key = storage.new_key(_PREFIX[payload.kind], _key_owner(payload, identity), payload.filename, payload.content_type)
+    expires = settings.MEDIA_UPLOAD_EXPIRE_SECONDS
+    form = store.presign_upload(key, payload.content_type, settings.MEDIA_UPLOAD_MAX_BYTES, expires)
+    return {"key": key, "expires_at": datetime.utcnow() + timedelta(seconds=expires), **form}
+
+
+# --- Resumable uploads (app/core/resumable.py) ---
+
+@router.post("/resumable", response_model=schemas.ResumableUploadOut, status_code=status.HTTP_201_CREATED,
+             summary="Start a resumable upload")
+def create_resumable(
+    payload: schemas.MediaUploadRequest,
+    request: Request,
+    response: Response,
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    _check_request(payload, identity)
+    st = resumable.create(
+        identity.id, _PREFIX[payload.kind], _key_owner(payload, identity),
+        payload.content_type, payload.size, payload.filename,
+    )
+    response.headers["Location"] = str(request.url_for("resumable_status", upload_id=st["id"]))
+    response.headers.update(_offset_headers(st))
+    return st
+
+
+@router.get("/resumable/{upload_id}", response_model=schemas.ResumableUploadOut,
+            name="resumable_status", summary="Where to resume (Upload-Offset)")
+def resumable_status(
+    upload_id: str,
+    response: Response,
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    try:
+        st = resumable.status(upload_id, identity.id)
+    except resumable.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    response.headers.update(_offset_headers(st))
+    return st
+
+
+# HEAD is what tus-style clients send; same handler, its own operation id
+router.add_api_route(
+    "/resumable/{upload_id}", resumable_status, methods=["HEAD"], response_model=schemas.ResumableUploadOut,
+    name="resumable_status_head", operation_id="resumable_status_head", summary="Where to resume (Upload-Offset)",
+)
+
+
+@router.patch("/resumable/{upload_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Append bytes at Upload-Offset")
+async def append_resumable(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    try:
+        st = await resumable.append(upload_id, identity.id, upload_offset, request.stream())
+    except resumable.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ClientDisconnect:
+        # what arrived is on disk; the client HEADs for the offset when it reconnects
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=_offset_headers(st))
+
+
+@router.post("/resumable/{upload_id}/complete", response_model=schemas.MediaUploadDone,
+             summary="Finish a resumable upload; returns the storage key")
+@idempotency.idempotent
+async def complete_resumable(
+    upload_id: str,
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    try:
+        key = await run_in_threadpool(resumable.complete, upload_id, identity.id)
+    except resumable.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"key": key, "url": storage.get_storage().url(key)}
+
+
+@router.delete("/resumable/{upload_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Abort a resumable upload")
+def abort_resumable(
+    upload_id: str,
+    identity: deps.Identity = Depends(deps.get_current_identity),
+):
+    try:
+        resumable.abort(upload_id, identity.id)
+    except resumable.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,43 +1,52 @@
 # app/api/api_v1/endpoints/notifications.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.session import get_db_session
-from app.deps import get_current_user
+from app.db import writes
+from app.deps import get_current_identity
 from app import crud, schemas, models
+from app.core import serialization
 
 router = APIRouter()
 
+_NOTIFICATION_OUT = serialization.Encoder(schemas.NotificationOut)
+_NOTIFICATION_FIELDS = serialization.Fieldset(_NOTIFICATION_OUT, models.Notification)
+
 
 @router.get("/", response_model=List[schemas.NotificationOut])
 def my_notifications(
     db: Session = Depends(get_db_session),
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_identity),
     skip: int = 0,
     limit: int = 50,
+    since: Optional[datetime] = Query(None, description="Only notifications created at/after this"),
+    before: Optional[datetime] = Query(None, description="Page cursor: created_at of the last item seen"),
+    fields: Optional[str] = Query(None, description="Comma-separated NotificationOut fields (id is always included)"),
 ):
-    return crud.list_notifications_for_user(db, current_user.id, skip=skip, limit=limit)
+    wanted = _NOTIFICATION_FIELDS.parse(fields)
+    rows = crud.list_notifications_for_user(
+        db, current_user.id, skip=skip, limit=limit, since=since, before=before,
+        options=_NOTIFICATION_FIELDS.load_options(wanted),
+    )
+    return serialization.respond(_NOTIFICATION_FIELDS.encoder(wanted).many(rows))
 
 
 @router.post("/{notification_id}/read", response_model=schemas.NotificationOut)
 def mark_read(
     notification_id: str,
     db: Session = Depends(get_db_session),
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_identity),
 ):
-    n = (
-        db.query(models.Notification)
-        .filter(
-            models.Notification.id == notification_id,
-            models.Notification.user_id == current_user.id,
-        )
-        .first()
+    n = writes.update_returning(
+        db, models.Notification,
+        [models.Notification.id == notification_id, models.Notification.user_id == current_user.id],
+        {"read": True},
     )
     if not n:
         raise HTTPException(status_code=404, detail="Notification not found")
-    n.read = True
     db.commit()
-    db.refresh(n)
     return n
 
 
@@ -45,14 +54,6 @@ def mark_read(
 @router.get("/unread_count")
 def unread_count(
     db: Session = Depends(get_db_session),
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_identity),
 ):
-    count = (
-        db.query(models.Notification)
-        .filter(
-            models.Notification.user_id == current_user.id,
-            models.Notification.read == False,
-        )
-        .count()
-    )
-    return {"count": count}
+    return {"count": crud.count_unread_notifications(db, current_user.id)}
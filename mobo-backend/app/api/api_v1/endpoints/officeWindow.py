@@ -55,7 +55,6 @@ def admin_create_window(
     except IntegrityError:
         db.rollback()
         raise HTTPException(400, "Failed to create window")
-    db.refresh(w)
     return _to_model(schemas.OfficeWindowOut, w)
 
 @router.patch("/queue/windows/{window_id}", response_model=schemas.OfficeWindowOut)
@@ -91,7 +90,6 @@ def admin_update_window(
     except IntegrityError:
         db.rollback()
         raise HTTPException(400, "Failed to update window")
-    db.refresh(w)
     return _to_model(schemas.OfficeWindowOut, w)
 
 @router.delete("/queue/windows/{window_id}", status_code=204)
@@ -28,5 +28,4 @@ def update_profile(
     current_user.name = name
     db.add(current_user)
     db.commit()
-    db.refresh(current_user)
     return current_user
@@ -0,0 +1,96 @@
+# app/api/api_v1/endpoints/reports.py
+"""
+Admin dashboards. Every endpoint reads only the daily rollup tables
+(app.core.rollups), never the incidents/appointments/queue_tickets tables.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import deps, models
+from app.db.session import get_db_session
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+MAX_RANGE_DAYS = 366
+
+
+def _range(start: Optional[date], end: Optional[date]):
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(400, "start must be on or before end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(400, f"range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+def _aggregate(db: Session, model, group_by: str, counters: List[str], start: date, end: date) -> List[Dict[str, Any]]:
+    cols = [func.coalesce(func.sum(getattr(model, c)), 0).label(c) for c in counters]
+    if group_by == "total":
+        q = db.query(*cols)
+    else:
+        key = getattr(model, group_by)
+        q = db.query(key.label(group_by), *cols).group_by(key).order_by(key)
+    rows = q.filter(model.day >= start, model.day <= end).all()
+    return [dict(r._mapping) for r in rows]
+
+
+def _ratio(num: int, den: int, scale: float = 1.0) -> Optional[float]:
+    return round(num / den * scale, 2) if den else None
+
+
+@router.get("/incidents", summary="Incidents reported and closed per day/department/barangay/category")
+def incident_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    group_by: str = Query("day", regex="^(day|department_id|barangay_id|category_id|total)$"),
+    db: Session = Depends(get_db_session),
+    _: Any = Depends(deps.require_admin),
+):
+    start, end = _range(start, end)
+    rows = _aggregate(db, models.IncidentDailyRollup, group_by,
+                      ["created", "resolved", "rejected", "resolution_seconds"], start, end)
+    for r in rows:
+        r["avg_resolution_hours"] = _ratio(r.pop("resolution_seconds"), r["resolved"], 1 / 3600)
+    return {"start": start, "end": end, "group_by": group_by, "rows": rows}
+
+
+@router.get("/appointments", summary="Appointment outcomes and no-show rate per day/department/service")
+def appointment_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    group_by: str = Query("day", regex="^(day|department_id|service_id|total)$"),
+    db: Session = Depends(get_db_session),
+    _: Any = Depends(deps.require_admin),
+):
+    start, end = _range(start, end)
+    rows = _aggregate(db, models.AppointmentDailyRollup, group_by,
+                      ["booked", "cancelled", "checked_in", "done", "no_show"], start, end)
+    for r in rows:
+        r["no_show_rate"] = _ratio(r["no_show"], r["done"] + r["no_show"])
+    return {"start": start, "end": end, "group_by": group_by, "rows": rows}
+
+
+@router.get("/queues", summary="Queue throughput, wait and service times per day/department/window")
+def queue_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    group_by: str = Query("day", regex="^(day|department_id|window_id|total)$"),
+    db: Session = Depends(get_db_session),
+    _: Any = Depends(deps.require_admin),
+):
+    start, end = _range(start, end)
+    rows = _aggregate(db, models.QueueDailyRollup, group_by,
+                      ["issued", "called", "served", "no_show", "wait_seconds", "service_seconds"], start, end)
+    days = (end - start).days + 1
+    for r in rows:
+        r["avg_wait_min"] = _ratio(r.pop("wait_seconds"), r["called"], 1 / 60)
+        r["avg_service_min"] = _ratio(r.pop("service_seconds"), r["served"], 1 / 60)
+        r["no_show_rate"] = _ratio(r["no_show"], r["served"] + r["no_show"])
+        if group_by != "day":
+            r["served_per_day"] = round(r["served"] / days, 2)
+    return {"start": start, "end": end, "group_by": group_by, "rows": rows}
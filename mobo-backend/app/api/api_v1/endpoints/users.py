@@ -4,11 +4,12 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db_session
 from app.deps import get_current_user, get_current_admin
-from app import crud, schemas
+from app import crud, encoders, schemas
+from app.core import serialization
 
 router = APIRouter()
 
-
+# same shape as GET /users/me; role must be eager-loaded (loading.USER_WITH_ROLE)
 @router.get("/me", response_model=schemas.UserOut)
 def me(current_user=Depends(get_current_user)):
     return {
@@ -37,4 +38,4 @@ def admin_list_users(
     skip: int = 0,
     limit: int = 100,
 ):
-    return crud.list_users(db, skip=skip, limit=limit)
+    return serialization.respond(encoders.USER_OUT.many(crud.list_users(db, skip=skip, limit=limit)))
@@ -0,0 +1,178 @@
+# app/core/batch.py
+"""
+In-process dispatch for POST /api/v1/batch.
+
+Admin screens fire many small requests (each window's current ticket, each
+incident's comments, each alert read). A batch carries them in one HTTP
+request:
+
+    {"requests": [
+        {"method": "GET", "path": "/officeWindow/queue/windows/3/current"},
+        {"method": "GET", "path": "/incidents/<id>/comments?limit=20"},
+        {"method": "POST", "path": "/alerts/<id>/read"}
+    ]}
+
+Paths are relative to /api/v1. Each sub-request goes through the app's
+router and exception handlers like a normal request (same dependencies,
+validation and permission checks), but not through the middleware stack:
+the batch itself is the one request that gets logged, measured, compressed
+and CORS-wrapped. Its Server-Timing covers all sub-requests.
+
+- The bearer token is verified once for the whole batch (deps.verified_token);
+  sub-requests reuse its claims instead of decoding and checking revocation
+  again.
+- Runs of consecutive GET/HEAD sub-requests execute concurrently (at most
+  BATCH_CONCURRENCY at a time); any other method waits for what came before
+  it and runs alone, so a write is seen by the reads listed after it.
+- Every sub-request uses its own DB session: SQLAlchemy sessions are not
+  safe to share between the concurrent reads.
+- Responses come back in request order. A failing sub-request only fails
+  its own entry. Idempotency-Key is not honoured inside a batch, and
+  nested batches are rejected.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import anyio
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from app.core import metrics
+from app.core.instrumentation import route_template
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+BATCH_PATH = API_PREFIX + "/batch"
+READ_METHODS = {"GET", "HEAD"}
+# forwarded from the batch request to every sub-request
+_INHERITED = {b"authorization", b"accept-language", b"user-agent", b"x-request-id"}
+# not meaningful once the sub-response is embedded in the batch body
+_DROPPED = {"content-length", "content-encoding", "transfer-encoding", "vary"}
+
+_stacks: Dict[int, Any] = {}
+
+
+def _stack(app):
+    """
+    app.router with the inner end of the app's own stack: its exception
+    handlers (HTTPException, validation errors) and the exit stack that
+    closes yield-dependencies such as the DB session.
+    """
+    stack = _stacks.get(id(app))
+    if stack is None:
+        handlers = {k: v for k, v in app.exception_handlers.items() if k not in (500, Exception)}
+        stack = _stacks[id(app)] = ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=handlers)
+    return stack
+
+
+def _error(status: int, detail: str) -> Dict[str, Any]:
+    return {"status": status, "headers": {"content-type": "application/json"}, "body": {"detail": detail}}
+
+
+async def dispatch(parent_scope, method: str, path: str, body: Any = None,
+                   headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Run one sub-request; {"status", "headers", "body"} with JSON bodies decoded."""
+    url = urlsplit(path)
+    target = url.path if url.path.startswith(API_PREFIX + "/") else API_PREFIX + "/" + url.path.lstrip("/")
+    if url.scheme or url.netloc or ".." in target.split("/"):
+        return _error(400, "path must be an API path such as /incidents/123")
+    if target.rstrip("/") == BATCH_PATH:
+        return _error(400, "batches cannot be nested")
+
+    raw = b"" if body is None else json.dumps(body).encode("utf-8")
+    hdrs = [(k, v) for k, v in parent_scope.get("headers", []) if k in _INHERITED]
+    for k, v in (headers or {}).items():
+        k = k.lower()
+        if k in ("authorization", "host", "content-length"):
+            continue
+        hdrs.append((k.encode("latin-1"), str(v).encode("latin-1")))
+    if body is not None:
+        hdrs += [(b"content-type", b"application/json"), (b"content-length", str(len(raw)).encode("latin-1"))]
+
+    app = parent_scope["app"]
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": method,
+        "scheme": parent_scope.get("scheme", "http"),
+        "server": parent_scope.get("server"),
+        "client": parent_scope.get("client"),
+        "root_path": parent_scope.get("root_path", ""),
+        "path": target,
+        "raw_path": target.encode("utf-8"),
+        "query_string": url.query.encode("latin-1"),
+        "headers": hdrs + [(b"host", dict(parent_scope.get("headers", [])).get(b"host", b"batch"))],
+        "app": app,
+        "state": {},
+        "extensions": {},
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": raw, "more_body": False}
+        await anyio.sleep_forever()  # no disconnect: the batch's client is still there
+
+    status = 500
+    out_headers: Dict[str, str] = {}
+    parts: List[bytes] = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for k, v in message.get("headers", []):
+                name = k.decode("latin-1").lower()
+                if name not in _DROPPED:
+                    out_headers[name] = v.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            parts.append(message.get("body", b""))
+
+    try:
+        await _stack(app)(scope, receive, send)
+    except Exception:
+        logger.exception("batch sub-request %s %s failed", method, target)
+        metrics.BATCH_SUBREQUESTS.labels(method, route_template(scope), "500").inc()
+        return _error(500, "Internal Server Error")
+    metrics.BATCH_SUBREQUESTS.labels(method, route_template(scope), str(status)).inc()
+
+    data = b"".join(parts)
+    content: Any = data.decode("utf-8", "replace") if data else None
+    if data and out_headers.get("content-type", "").startswith("application/json"):
+        try:
+            content = json.loads(data)
+        except ValueError:
+            pass
+    return {"status": status, "headers": out_headers, "body": content}
+
+
+async def run(parent_scope, requests: List[Dict[str, Any]], concurrency: int) -> List[Dict[str, Any]]:
+    """Dispatch `requests` in order: consecutive reads together, everything else one at a time."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(i: int) -> None:
+        r = requests[i]
+        async with limit:
+            results[i] = await dispatch(parent_scope, r["method"], r["path"], r.get("body"), r.get("headers"))
+
+    i = 0
+    while i < len(requests):
+        if requests[i]["method"] in READ_METHODS:
+            j = i
+            while j < len(requests) and requests[j]["method"] in READ_METHODS:
+                j += 1
+            await asyncio.gather(*(one(k) for k in range(i, j)))
+            i = j
+        else:
+            await one(i)
+            i += 1
+    return results
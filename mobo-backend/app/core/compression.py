@@ -0,0 +1,217 @@
+# app/core/compression.py
+"""
+Response compression (gzip, and brotli when the `brotli` package is
+installed), as a pure ASGI middleware.
+
+A response is compressed only if all of these hold:
+- the client accepts gzip or br (br wins when both are acceptable),
+- the path isn't under COMPRESSION_EXCLUDE_PATHS (/uploads, /media: images are
+  already compressed and StaticFiles serves them with ranges),
+- its content-type is in COMPRESSION_TYPES,
+- it isn't already encoded, partial (206) or marked Cache-Control: no-transform,
+- it is at least COMPRESSION_MIN_BYTES (below that the headers and CPU cost
+  more than the bytes saved).
+
+Streaming bodies (CSV/NDJSON exports) are compressed chunk by chunk with a
+sync flush, so rows still reach the client as they are produced.
+
+Per-route overrides go on the endpoint function:
+
+    @router.get("/feed")
+    @compression.policy(min_bytes=256)       # or enabled=False
+    def feed(...): ...
+
+benchmarks/bench_compression.py measures CPU cost vs bytes saved.
+"""
+import logging
+import zlib
+from typing import Callable, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_SKIP_STATUS = {204, 206, 304}
+
+
+def policy(enabled: bool = True, min_bytes: Optional[int] = None, gzip_level: Optional[int] = None):
+    """Per-endpoint override of the compression settings."""
+    def deco(fn: Callable) -> Callable:
+        fn.__compression__ = {"enabled": enabled, "min_bytes": min_bytes, "gzip_level": gzip_level}
+        return fn
+    return deco
+
+
+def _csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header (q=0 means refused)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    star = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", star) > 0:
+        return "br"
+    if accepted.get("gzip", star) > 0:
+        return "gzip"
+    return None
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._c.compress(data) + self._c.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._c.process(data) + self._c.finish()
+
+
+def compressor(encoding: str, gzip_level: Optional[int] = None):
+    if encoding == "br":
+        return _Brotli(settings.COMPRESSION_BROTLI_QUALITY)
+    return _Gzip(gzip_level or settings.COMPRESSION_GZIP_LEVEL)
+
+
+def compress(data: bytes, encoding: str, gzip_level: Optional[int] = None) -> bytes:
+    return compressor(encoding, gzip_level).finish(data)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.min_bytes = settings.COMPRESSION_MIN_BYTES
+        self.types = tuple(_csv(settings.COMPRESSION_TYPES))
+        self.exclude = tuple(_csv(settings.COMPRESSION_EXCLUDE_PATHS))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path", "").startswith(self.exclude):
+            return await self.app(scope, receive, send)
+        accept = ""
+        for k, v in scope.get("headers", []):
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        await self.app(scope, receive, _Responder(self, scope, send, encoding).send)
+
+
+class _Responder:
+    """Holds http.response.start until the first body chunk shows whether to compress."""
+
+    def __init__(self, mw: "CompressionMiddleware", scope, send, encoding: str):
+        self.mw = mw
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.start = None
+        self.state = "pending"  # pending | passthrough | compressing
+        self.comp = None
+
+    def _eligible(self, headers) -> Optional[dict]:
+        override = getattr(self.scope.get("endpoint"), "__compression__", None) or {}
+        if not override.get("enabled", True) or self.start["status"] in _SKIP_STATUS:
+            return None
+        ctype = b""
+        for k, v in headers:
+            if k == b"content-encoding" or k == b"content-range":
+                return None
+            if k == b"cache-control" and b"no-transform" in v.lower():
+                return None
+            if k == b"content-type":
+                ctype = v
+        if not ctype.decode("latin-1").lower().startswith(self.mw.types):
+            return None
+        return override
+
+    def _headers(self, headers, length: Optional[int]):
+        out = []
+        for k, v in headers:
+            if k == b"content-length":
+                continue
+            if k == b"vary" and b"accept-encoding" not in v.lower():
+                v = v + b", Accept-Encoding"
+            if k == b"etag" and not v.startswith(b"W/"):
+                v = b"W/" + v  # the bytes differ from the identity representation
+            out.append((k, v))
+        if not any(k == b"vary" for k, _ in out):
+            out.append((b"vary", b"Accept-Encoding"))
+        out.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if length is not None:
+            out.append((b"content-length", str(length).encode("latin-1")))
+        return out
+
+    async def _flush_start(self, headers=None):
+        if headers is not None:
+            self.start["headers"] = headers
+        await self._send(self.start)
+
+    async def send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            return
+        if kind != "http.response.body" or self.state == "passthrough":
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.state == "pending":
+            headers = list(self.start.get("headers", []))
+            override = self._eligible(headers)
+            min_bytes = override.get("min_bytes") if override else None
+            min_bytes = self.mw.min_bytes if min_bytes is None else min_bytes
+            if override is None or (not more and len(body) < min_bytes):
+                self.state = "passthrough"
+                if override is not None and not any(k == b"vary" for k, _ in headers):
+                    headers.append((b"vary", b"Accept-Encoding"))  # a bigger one would be compressed
+                await self._flush_start(headers)
+                return await self._send(message)
+            self.comp = compressor(self.encoding, override.get("gzip_level"))
+            self.state = "compressing"
+            if not more:
+                data = self.comp.finish(body)
+                self._count(len(body), len(data))
+                await self._flush_start(self._headers(headers, len(data)))
+                return await self._send({"type": "http.response.body", "body": data})
+            await self._flush_start(self._headers(headers, None))
+
+        data = self.comp.chunk(body) if more else self.comp.finish(body)
+        self._count(len(body), len(data))
+        if data or not more:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more})
+
+    def _count(self, n_in: int, n_out: int) -> None:
+        metrics.COMPRESSION_BYTES.labels(self.encoding, "in").inc(n_in)
+        metrics.COMPRESSION_BYTES.labels(self.encoding, "out").inc(n_out)
@@ -5,7 +5,117 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./mobodb.sqlite"
     SECRET_KEY: str = "mydefaultsecretkey"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 * 10080  # 30 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_SYNC_SECONDS: int = 30  # how stale another worker's revocations may be
+
+    # Startup (see app/db/bootstrap.py)
+    STARTUP_MODE: str = "fast"  # fast: skip create_all when alembic is at head | full
+    # Logged as a warning when a cold start exceeds it; benchmarks/bench_startup.py fails
+    # above it. Measured p95 is ~950ms on one core, about half of it importing
+    # fastapi/sqlalchemy/pydantic themselves.
+    STARTUP_BUDGET_MS: int = 1000
+    DEFAULT_ADMIN_EMAIL: str = "admin@mobo.ph"
+    DEFAULT_ADMIN_PASSWORD: str = "Admin@123"  # empty = don't create one
+
+    # Login (see app/core/login.py)
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes passwords on next login
+    LOGIN_HASH_WORKERS: int = 2  # processes for bcrypt; 0 = use the threadpool
+    LOGIN_MAX_PENDING: int = 64
+    LOGIN_RATE_ACCOUNT_BURST: int = 5
+    LOGIN_RATE_ACCOUNT_PER_MIN: float = 5
+    LOGIN_RATE_IP_BURST: int = 30
+    LOGIN_RATE_IP_PER_MIN: float = 60
+
+    # Queue wait/ETA estimates (see app/core/queue_analytics.py)
+    QUEUE_EWMA_ALPHA: float = 0.2  # weight of the newest sample
+    QUEUE_STATS_SYNC_SECONDS: int = 15  # how stale other workers' calls may be
+    QUEUE_DEFAULT_SERVICE_MIN: int = 5  # used until a department has any history
+
+    # Retention (see app/core/retention.py); 0 days disables a policy
+    RETENTION_NOTIFICATIONS_DAYS: int = 90  # read notifications older than this
+    RETENTION_ALERT_READS_DAYS: int = 30  # reads of alerts expired longer than this
+    RETENTION_QUEUE_TICKETS_DAYS: int = 7  # queue days older than this
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_TARGET: str = "table"  # table: <name>_archive tables | file: gzipped NDJSON
+    RETENTION_ARCHIVE_DIR: str = "archive"
+    RETENTION_ARCHIVE_MONTHS: int = 0  # Postgres: drop archive partitions older than this; 0 = keep
+
+    # Postgres monthly partitioning of incidents/notifications (see app/db/partitions.py).
+    # PG_PARTITIONING is read by the migration that converts the tables.
+    PG_PARTITIONING: bool = False
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_DETACH_AFTER_MONTHS: int = 0  # detach (not drop) older months; 0 = never
+    # With PG_PARTITIONING on, the notification list and unread count look back this far
+    # by default so Postgres can prune old months (clients page further with ?since=).
+    NOTIFICATION_LIST_DAYS: int = 90
+
+    # Full-text search (see app/core/search.py)
+    SEARCH_TS_CONFIG: str = "simple"  # Postgres text search config; "simple" suits mixed English/Filipino
+
+    # Media storage (see app/core/storage.py)
+    STORAGE_BACKEND: str = "local"  # local | s3 (any S3-compatible store, e.g. MinIO)
+    UPLOAD_DIR: str = "uploads"  # local backend root, relative to the working directory
+    MEDIA_BASE_URL: str = "/uploads"  # prefix of stored image_url values (and the legacy static mount)
+    MEDIA_URL_EXPIRE_SECONDS: int = 3600  # signed / presigned download URLs
+    MEDIA_URL_BUCKET_SECONDS: int = 900  # signed URL expiry is rounded up to this, so URLs repeat and cache
+    MEDIA_SIGNING_KEY: str = ""  # HMAC key for /media URLs; empty = derived from SECRET_KEY
+    # origin put in front of /media URLs, e.g. https://api.example.org; empty = the
+    # scheme/host the request came in on (run uvicorn with --proxy-headers behind a proxy)
+    MEDIA_PUBLIC_BASE_URL: str = ""
+    MEDIA_INLINE_BASE64: bool = False  # old app builds: photos as data: URIs instead of URLs
+    MEDIA_STATIC_UPLOADS: bool = False  # also serve UPLOAD_DIR at /uploads, unauthenticated (old links)
+    MEDIA_ACCEL_REDIRECT: str = ""  # nginx internal location for UPLOAD_DIR, e.g. "/_media"; hands it the file
+    MEDIA_UPLOAD_EXPIRE_SECONDS: int = 600  # presigned upload forms
+    MEDIA_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    S3_BUCKET: str = "mobo-media"
+    S3_ENDPOINT_URL: str = ""  # e.g. http://minio:9000; empty = AWS
+    S3_PUBLIC_ENDPOINT_URL: str = ""  # host clients use for presigned URLs, if different
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_FORCE_PATH_STYLE: bool = True  # MinIO needs path-style addressing
+
+    # Resumable uploads (see app/core/resumable.py)
+    RESUMABLE_DIR: str = "uploads-partial"  # local disk, whatever STORAGE_BACKEND is
+    RESUMABLE_EXPIRE_SECONDS: int = 24 * 3600  # idle sessions are purged after this
+
+    # Idempotency-Key replay (see app/core/idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600  # how long a key's response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # an unfinished first request is presumed dead after this
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 256 * 1024  # bigger responses are not stored
+
+    # Relationship loading (see app/db/loading.py)
+    LAZY_LOAD_POLICY: str = "off"  # off | warn | raise (development and tests)
+    LAZY_LOAD_MAX_PER_RELATIONSHIP: int = 1  # lazy loads of one relationship per request before it is an N+1
+
+    # POST /batch (see app/core/batch.py)
+    BATCH_MAX_REQUESTS: int = 25
+    BATCH_CONCURRENCY: int = 8  # sub-requests of one batch running at the same time
+
+    # Response compression (see app/core/compression.py)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # only if the `brotli` package is installed
+    COMPRESSION_TYPES: str = "application/json,application/x-ndjson,text/csv,text/plain,text/html,text/css,application/javascript"
+    COMPRESSION_EXCLUDE_PATHS: str = "/uploads,/media"
+
+    # Per-request SQL instrumentation (see app/core/instrumentation.py)
+    QUERY_INSTRUMENTATION: bool = True
+    SLOW_QUERY_MS: int = 200
+    SERVER_TIMING_HEADER: bool = True
+
+    # Prometheus metrics at /metrics (see app/core/metrics.py).
+    # METRICS_TOKEN, when set, must be sent as "Authorization: Bearer <token>".
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+
+    # Logging (see app/core/log.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # per-module overrides: "app.crud=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_JSON: bool = True
+    LOG_DEBUG_SAMPLE_RATE: float = 0.05
 
     class Config:
         env_file = ".env"
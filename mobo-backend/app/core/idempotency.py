@@ -0,0 +1,353 @@
+# app/core/idempotency.py
+"""
+Idempotency-Key support for the mutating endpoints mobile clients retry
+(incident creation, comments, bookings, check-in, photo attach).
+
+A client sends `Idempotency-Key: <uuid>` with a POST/PUT/PATCH/DELETE and
+sends the same key again when it retries after a timeout. The first request
+runs normally and its response is stored in idempotency_keys for
+IDEMPOTENCY_TTL_SECONDS. A retry gets that stored response back (marked
+`Idempotent-Replayed: true`) without the endpoint running again, so there is
+no second incident, booking, notification or upload.
+
+- Keys are per user (the token's `sub`). Requests without a valid bearer
+  token pass through untouched and the endpoint rejects them as usual.
+- A key belongs to one request: method, path, query and body are hashed
+  (multipart boundaries normalized, since clients re-encode the form on
+  retry). The same key with a different request -> 422.
+- A retry while the first request is still running -> 409 + Retry-After.
+  A first request that never finished (worker died) is taken over after
+  IDEMPOTENCY_LOCK_SECONDS.
+- 5xx, 401/403/408/409/423/429 and responses over
+  IDEMPOTENCY_MAX_RESPONSE_BYTES are not stored; their retry runs again.
+
+Endpoints opt in under the route decorator:
+
+    @router.post("/create")
+    @idempotency.idempotent
+    async def create_incident(...): ...
+
+IdempotencyMiddleware is the innermost middleware, so replays still get
+CORS headers and compression, and the stored body is the uncompressed one.
+"""
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from app import models
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_NOT_STORED = {401, 403, 408, 409, 423, 429}
+_SPOOL_BYTES = 1024 * 1024  # request bodies above this are buffered on disk
+_CHUNK = 64 * 1024
+_PURGE_EVERY = 600.0
+
+IK = models.IdempotencyKey
+
+
+def idempotent(fn: Callable) -> Callable:
+    """Mark an endpoint as honouring Idempotency-Key."""
+    fn.__idempotent__ = True
+    return fn
+
+
+# ---------------------------
+# Request identity
+# ---------------------------
+
+def _endpoint(scope) -> Optional[Callable]:
+    """The endpoint this request will be routed to (routing hasn't run yet)."""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, child = route.matches(scope)
+        if match == Match.FULL:
+            return child.get("endpoint")
+    return None
+
+
+def _caller(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token.strip()).get("sub")
+    except Exception:
+        return None
+
+
+def _boundary(content_type: str) -> Optional[bytes]:
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class _Fingerprint:
+    """sha256 of the request, with the multipart boundary replaced by a constant."""
+
+    def __init__(self, scope, content_type: str):
+        self._h = hashlib.sha256()
+        self._h.update(f"{scope['method']} {scope['path']}?".encode("utf-8"))
+        self._h.update(scope.get("query_string", b""))
+        self._h.update(b"\n" + content_type.split(";")[0].strip().lower().encode("latin-1") + b"\n")
+        boundary = _boundary(content_type)
+        self._marker = b"--" + boundary if boundary else None
+        self._tail = b""
+
+    def update(self, chunk: bytes) -> None:
+        if self._marker is None:
+            self._h.update(chunk)
+            return
+        data = (self._tail + chunk).replace(self._marker, b"--")
+        keep = len(self._marker) - 1  # a marker may straddle two chunks
+        self._tail, data = data[-keep:], data[:-keep]
+        self._h.update(data)
+
+    def hexdigest(self) -> str:
+        if self._tail:
+            self._h.update(self._tail)
+            self._tail = b""
+        return self._h.hexdigest()
+
+
+# ---------------------------
+# Store
+# ---------------------------
+
+def _claim(user_id: str, key: str, fingerprint: str):
+    """
+    ("executed", None) if this request should run (the key is now held),
+    ("replayed", (status, headers, body)), ("mismatch", None) or
+    ("in_progress", None) otherwise.
+    """
+    _maybe_purge()
+    db = SessionLocal()
+    try:
+        for _ in range(3):
+            db.expunge_all()  # commits don't expire (expire_on_commit=False): re-read the row each round
+            now = datetime.utcnow()
+            fresh = {
+                "fingerprint": fingerprint, "status_code": None, "headers": None, "body": None,
+                "created_at": now, "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            }
+            db.add(IK(user_id=user_id, key=key, **fresh))
+            try:
+                db.commit()
+                return "executed", None
+            except IntegrityError:
+                db.rollback()
+
+            row = db.query(IK).filter(IK.user_id == user_id, IK.key == key).first()
+            if row is None:
+                continue  # purged meanwhile
+            expired = row.expires_at <= now
+            if not expired and row.fingerprint != fingerprint:
+                return "mismatch", None
+            abandoned = row.status_code is None and row.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+            if expired or abandoned:
+                # compare-and-set on created_at: only one retry takes it over
+                taken = (
+                    db.query(IK)
+                    .filter(IK.user_id == user_id, IK.key == key, IK.created_at == row.created_at)
+                    .update(fresh, synchronize_session=False)
+                )
+                db.commit()
+                if taken:
+                    return "executed", None
+                continue
+            if row.status_code is None:
+                return "in_progress", None
+            headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row.headers or "[]")]
+            return "replayed", (row.status_code, headers, row.body or b"")
+        return "in_progress", None
+    finally:
+        db.close()
+
+
+def _finish(user_id: str, key: str, status: int, headers, body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        db.query(IK).filter(IK.user_id == user_id, IK.key == key).update({
+            "status_code": status,
+            "headers": json.dumps([[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers]),
+            "body": body,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(user_id: str, key: str) -> None:
+    """Forget an unfinished key so the client's retry runs the request again."""
+    db = SessionLocal()
+    try:
+        db.query(IK).filter(IK.user_id == user_id, IK.key == key, IK.status_code.is_(None)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge_expired(db) -> int:
+    n = db.query(IK).filter(IK.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+    db.commit()
+    return n
+
+
+_purge_lock = threading.Lock()
+_next_purge = 0.0
+
+
+def _maybe_purge() -> None:
+    global _next_purge
+    now = time.monotonic()
+    if now < _next_purge:
+        return
+    with _purge_lock:
+        if now < _next_purge:
+            return
+        _next_purge = now + _PURGE_EVERY
+    db = SessionLocal()
+    try:
+        purge_expired(db)
+    except Exception:
+        logger.exception("idempotency key purge failed")
+    finally:
+        db.close()
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _METHODS:
+            return await self.app(scope, receive, send)
+        key = auth = None
+        content_type = ""
+        for k, v in scope.get("headers", []):
+            if k == b"idempotency-key":
+                key = v.decode("latin-1").strip()
+            elif k == b"authorization":
+                auth = v.decode("latin-1")
+            elif k == b"content-type":
+                content_type = v.decode("latin-1")
+        if key is None:
+            return await self.app(scope, receive, send)
+        if not key or len(key) > 255:
+            return await _error(send, 400, "Idempotency-Key must be 1-255 characters")
+        if not getattr(_endpoint(scope), "__idempotent__", False):
+            return await self.app(scope, receive, send)
+        user_id = _caller(auth)
+        if user_id is None:
+            return await self.app(scope, receive, send)
+
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as spool:
+            fp = _Fingerprint(scope, content_type)
+            total = 0
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                spool.write(chunk)
+                fp.update(chunk)
+                total += len(chunk)
+                if not message.get("more_body", False):
+                    break
+
+            outcome, stored = await run_in_threadpool(_claim, user_id, key, fp.hexdigest())
+            metrics.IDEMPOTENCY.labels(outcome).inc()
+            if outcome == "replayed":
+                status, headers, body = stored
+                await send({"type": "http.response.start", "status": status,
+                            "headers": headers + [(b"idempotent-replayed", b"true")]})
+                return await send({"type": "http.response.body", "body": body})
+            if outcome == "mismatch":
+                return await _error(send, 422, "Idempotency-Key was already used with a different request")
+            if outcome == "in_progress":
+                return await _error(send, 409, "A request with this Idempotency-Key is still in progress",
+                                    [(b"retry-after", b"1")])
+            spool.seek(0)
+            await self._run(scope, _replay_body(spool, total, receive), send, user_id, key)
+
+    async def _run(self, scope, receive, send, user_id: str, key: str) -> None:
+        status: Optional[int] = None
+        headers: List[Tuple[bytes, bytes]] = []
+        parts: List[bytes] = []
+        size = 0
+        storable = True
+
+        async def capture(message):
+            nonlocal status, headers, size, storable
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                if storable:
+                    body = message.get("body", b"")
+                    size += len(body)
+                    if size > settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                        storable = False
+                        parts.clear()
+                    else:
+                        parts.append(body)
+            else:
+                storable = False  # e.g. a zero-copy file send
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await run_in_threadpool(_release, user_id, key)
+            raise
+        if status is not None and status < 500 and status not in _NOT_STORED and storable:
+            await run_in_threadpool(_finish, user_id, key, status, headers, b"".join(parts))
+        else:
+            await run_in_threadpool(_release, user_id, key)
+
+
+def _replay_body(spool, total: int, receive):
+    """receive() that hands the buffered body back to the app, then defers to the real one."""
+    done = False
+
+    async def replay():
+        nonlocal done
+        if done:
+            return await receive()
+        chunk = spool.read(_CHUNK)
+        more = spool.tell() < total
+        done = not more
+        return {"type": "http.request", "body": chunk, "more_body": more}
+
+    return replay
+
+
+async def _error(send, status: int, detail: str, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+        *(headers or []),
+    ]})
+    await send({"type": "http.response.body", "body": body})
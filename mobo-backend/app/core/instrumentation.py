@@ -0,0 +1,245 @@
+# app/core/instrumentation.py
+"""
+Per-request SQL instrumentation.
+
+- Hooks SQLAlchemy before/after_cursor_execute to count statements and DB time
+  for the request currently running (tracked with a ContextVar, so threadpool
+  endpoints and concurrent requests don't mix their numbers).
+- QueryStatsMiddleware adds a `Server-Timing` header, logs slow queries with
+  the route they ran under, and aggregates per-route stats for the admin
+  diagnostics endpoint.
+- count_queries / assert_max_queries / assert_endpoint_max_queries are the
+  helpers to pin query budgets so N+1 regressions fail loudly.
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    __slots__ = ("count", "db_ms", "slow", "scope", "lazy_loads")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.db_ms = 0.0
+        self.slow = 0
+        self.scope = scope
+        self.lazy_loads: Dict[str, int] = {}  # relationship -> lazy loads (app/db/loading.py)
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope) if self.scope is not None else "-"
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_query_stats", default=None)
+_installed_engines = set()
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# ---------------------------
+# SQLAlchemy hooks
+# ---------------------------
+
+def install(engine) -> None:
+    """Attach the cursor listeners to `engine` (idempotent)."""
+    if id(engine) in _installed_engines:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - conn.info["query_t0"].pop()) * 1000.0
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.db_ms += ms
+        if ms >= settings.SLOW_QUERY_MS:
+            if stats is not None:
+                stats.slow += 1
+            logger.warning(
+                "slow query %.1fms on %s: %s",
+                ms, stats.route if stats is not None else "-", " ".join(statement.split())[:500],
+            )
+
+    _installed_engines.add(id(engine))
+
+
+# ---------------------------
+# Route resolution
+# ---------------------------
+
+_route_cache: Dict[Tuple[int, str], str] = {}
+
+
+def route_template(scope: dict) -> str:
+    """
+    Return the path template ("/api/v1/incidents/{incident_id}") for a scope
+    the router has already matched; low-cardinality label for stats/metrics.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "<unmatched>"
+    method = scope.get("method", "")
+    key = (id(endpoint), method)
+    path = _route_cache.get(key)
+    if path is None:
+        path = getattr(endpoint, "__name__", "<unknown>")
+        app = scope.get("app")
+        for r in getattr(app, "routes", []):
+            # APIRoute keeps the function in .endpoint, Mount (StaticFiles) in .app
+            target = getattr(r, "endpoint", None) or getattr(r, "app", None)
+            if target is endpoint and (not getattr(r, "methods", None) or method in r.methods):
+                path = r.path
+                break
+        _route_cache[key] = path
+    return path
+
+
+# ---------------------------
+# Per-route aggregation
+# ---------------------------
+
+class RouteStatsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Dict] = {}
+
+    def record(self, method: str, route: str, stats: RequestStats, total_ms: float) -> None:
+        with self._lock:
+            s = self._routes.get((method, route))
+            if s is None:
+                s = self._routes[(method, route)] = {
+                    "method": method, "route": route, "requests": 0, "queries": 0, "max_queries": 0,
+                    "db_ms": 0.0, "max_db_ms": 0.0, "total_ms": 0.0, "slow_queries": 0,
+                }
+            s["requests"] += 1
+            s["queries"] += stats.count
+            s["max_queries"] = max(s["max_queries"], stats.count)
+            s["db_ms"] += stats.db_ms
+            s["max_db_ms"] = max(s["max_db_ms"], stats.db_ms)
+            s["total_ms"] += total_ms
+            s["slow_queries"] += stats.slow
+
+    def snapshot(self):
+        with self._lock:
+            rows = [dict(s) for s in self._routes.values()]
+        for s in rows:
+            n = s["requests"] or 1
+            s["avg_queries"] = round(s["queries"] / n, 2)
+            s["avg_db_ms"] = round(s["db_ms"] / n, 2)
+            s["avg_total_ms"] = round(s["total_ms"] / n, 2)
+            s["db_ms"] = round(s["db_ms"], 2)
+            s["max_db_ms"] = round(s["max_db_ms"], 2)
+            s["total_ms"] = round(s["total_ms"], 2)
+        return sorted(rows, key=lambda s: s["queries"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStatsRegistry()
+
+
+# ---------------------------
+# ASGI middleware
+# ---------------------------
+
+class QueryStatsMiddleware:
+    """Pure ASGI (no BaseHTTPMiddleware task hop) so it stays cheap per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_HEADER:
+                total_ms = (time.perf_counter() - t0) * 1000.0
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'.encode("latin-1"),
+                ))
+                headers.append((b"x-query-count", str(stats.count).encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route_stats.record(scope.get("method", ""), stats.route, stats, (time.perf_counter() - t0) * 1000.0)
+
+
+# ---------------------------
+# Query budget helpers (tests / CI / benchmarks)
+# ---------------------------
+
+@contextmanager
+def count_queries():
+    """Count statements executed inside the block (by this context)."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = "block"):
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise AssertionError(f"{label} ran {stats.count} queries (max {max_queries})")
+
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def queries_from_response(response) -> Optional[int]:
+    """Query count reported by QueryStatsMiddleware, or None if absent."""
+    value = response.headers.get("x-query-count")
+    if value is not None:
+        return int(value)
+    m = _SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+    return int(m.group(2)) if m else None
+
+
+def assert_endpoint_max_queries(client, method: str, url: str, max_queries: int, **kwargs):
+    """
+    Call an endpoint through a TestClient / httpx client and fail if it ran
+    more than `max_queries` statements. Returns the response.
+
+        assert_endpoint_max_queries(client, "GET", "/api/v1/alerts/", 3, headers=auth)
+    """
+    response = client.request(method, url, **kwargs)
+    count = queries_from_response(response)
+    if count is None:
+        raise AssertionError(f"{method} {url}: no query count header (is QueryStatsMiddleware installed?)")
+    if count > max_queries:
+        raise AssertionError(f"{method} {url} ran {count} queries (max {max_queries})")
+    return response
@@ -0,0 +1,187 @@
+# app/core/login.py
+"""
+Login fast path.
+
+- bcrypt runs in a small process pool (LOGIN_HASH_WORKERS), so a login surge
+  uses those cores only and can't starve the threadpool/event loop serving
+  the rest of the API. At most LOGIN_MAX_PENDING verifications may wait for
+  the pool; beyond that the login gets a 503 with Retry-After.
+- Hashes made with a different cost than BCRYPT_ROUNDS are rehashed (in the
+  pool) on the next successful login.
+- Attempts are rate-limited per account and per client IP with in-memory
+  token buckets (per worker process).
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+# ---------------------------
+# Hash verification (runs in the pool)
+# ---------------------------
+
+_contexts: Dict[int, "CryptContext"] = {}
+
+
+def _context(rounds: int) -> "CryptContext":
+    ctx = _contexts.get(rounds)
+    if ctx is None:
+        from passlib.context import CryptContext  # slow import; pool workers / first login only
+
+        ctx = _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return ctx
+
+
+def _hash_rounds(hashed: str) -> Optional[int]:
+    # "$2b$12$<salt+hash>"
+    parts = hashed.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash). new_hash is set when the password is valid but the
+    stored hash should be replaced (different cost or deprecated scheme).
+    Top-level so it can be pickled into the process pool.
+    """
+    ctx = _context(rounds)
+    try:
+        ok = ctx.verify(password, hashed)
+    except (ValueError, TypeError):
+        return False, None
+    if not ok:
+        return False, None
+    if _hash_rounds(hashed) != rounds or ctx.needs_update(hashed):
+        return True, ctx.hash(password)
+    return True, None
+
+
+# ---------------------------
+# Bounded process pool
+# ---------------------------
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = 0
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if settings.LOGIN_HASH_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the parent has live threads (log listener, pool)
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.LOGIN_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def verify_password_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    global _pending
+    if _pending >= settings.LOGIN_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, try again shortly",
+            headers={"Retry-After": "2"},
+        )
+    _pending += 1
+    try:
+        pool = _get_pool()
+        if pool is None:
+            return await run_in_threadpool(verify_and_update, password, hashed, settings.BCRYPT_ROUNDS)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, verify_and_update, password, hashed, settings.BCRYPT_ROUNDS)
+    finally:
+        _pending -= 1
+
+
+# ---------------------------
+# Token-bucket rate limiting
+# ---------------------------
+
+class TokenBucketLimiter:
+    """`capacity` attempts in a burst, refilled at `per_minute` per minute, per key."""
+
+    def __init__(self, capacity: int, per_minute: float, max_keys: int = 50_000):
+        self.capacity = float(capacity)
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last ts)
+
+    def acquire(self, key: str) -> float:
+        """Take one token. Returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - ts) * self.rate)
+            if tokens >= 1.0:
+                self._buckets[key] = (tokens - 1.0, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1.0 - tokens) / self.rate if self.rate > 0 else 60.0
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # drop buckets that have refilled completely: same as never seen
+        full_after = self.capacity / self.rate if self.rate > 0 else float("inf")
+        for k in [k for k, (_, ts) in self._buckets.items() if now - ts >= full_after]:
+            del self._buckets[k]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+account_limiter = TokenBucketLimiter(settings.LOGIN_RATE_ACCOUNT_BURST, settings.LOGIN_RATE_ACCOUNT_PER_MIN)
+ip_limiter = TokenBucketLimiter(settings.LOGIN_RATE_IP_BURST, settings.LOGIN_RATE_IP_PER_MIN)
+
+
+def check_rate_limits(email: str, client_ip: Optional[str]) -> None:
+    wait = account_limiter.acquire(email)
+    if client_ip:
+        wait = max(wait, ip_limiter.acquire(client_ip))
+    if wait > 0:
+        logger.warning("login rate limited: account=%s ip=%s", email, client_ip)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
@@ -0,0 +1,187 @@
+# app/core/media.py
+"""
+GET/HEAD /media/<key>?exp=..&sig=.. for URLs made by storage.signed_url().
+
+The HMAC over key + expiry is the whole access check: whoever was allowed to
+see the incident (or announcement) JSON got the URL, so serving the file
+needs no token, session or database lookup. It is mounted in main.py as a
+bare ASGI app, outside FastAPI's routing and dependency machinery.
+
+- ETag (mtime + size) and Last-Modified; If-None-Match -> 304
+- Range: bytes=a-b / a- / -n (one range) -> 206, honouring If-Range;
+  unsatisfiable -> 416; multi-range requests get the whole file
+- Cache-Control: private, max-age = time left on the URL (signed URLs are
+  rounded to MEDIA_URL_BUCKET_SECONDS, so the same URL comes back and the
+  client's cached copy is reused)
+- body: X-Accel-Redirect to nginx when MEDIA_ACCEL_REDIRECT is set, the
+  ASGI zero-copy send extension (sendfile) when the server offers it,
+  otherwise 64 KiB reads off the event loop
+- S3 backend: 307 to a presigned URL
+
+RequestBaseMiddleware records each request's base URL for storage.signed_url,
+so links are absolute even without MEDIA_PUBLIC_BASE_URL.
+"""
+import email.utils
+import logging
+import mimetypes
+import os
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, quote
+
+import anyio
+from starlette.requests import Request
+
+from app.core import storage
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 64 * 1024
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single satisfiable range, None to send the
+    whole file (no/odd/multiple ranges), False if unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            n = int(last)
+            if n <= 0:
+                return False
+            return max(0, size - n), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class RequestBaseMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = storage.request_base.set(str(Request(scope).base_url))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            storage.request_base.reset(token)
+
+
+class MediaApp:
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            return await _plain(send, 405, b"Method not allowed", [(b"allow", b"GET, HEAD")])
+
+        key = scope["path"].lstrip("/")
+        q = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        exp, sig = q.get("exp", [""])[0], q.get("sig", [""])[0]
+        if not key or not exp.isdigit() or not storage.verify(key, int(exp), sig):
+            return await _plain(send, 403, b"Invalid signature")
+        remaining = int(exp) - int(time.time())
+        if remaining <= 0:
+            return await _plain(send, 403, b"URL expired")
+
+        store = storage.get_storage()
+        try:
+            path = store.local_path(key)
+        except storage.StorageError:
+            path = None
+        if path is None:
+            if store.name != "local":
+                url = store.url(key, expires=remaining).encode("latin-1")
+                return await _plain(send, 307, b"", [(b"location", url)])
+            return await _plain(send, 404, b"Not found")
+
+        st = os.stat(path)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        headers: Headers = [
+            (b"content-type", (mimetypes.guess_type(key)[0] or "application/octet-stream").encode("latin-1")),
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", email.utils.formatdate(st.st_mtime, usegmt=True).encode("latin-1")),
+            (b"cache-control", f"private, max-age={remaining}".encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"x-content-type-options", b"nosniff"),
+        ]
+        if settings.MEDIA_ACCEL_REDIRECT:
+            # nginx serves the internal location itself, Range included
+            target = f"{settings.MEDIA_ACCEL_REDIRECT.rstrip('/')}/{quote(key)}".encode("latin-1")
+            return await _plain(send, 200, b"", headers + [(b"x-accel-redirect", target)])
+
+        req = {
+            k.decode("latin-1"): v.decode("latin-1")
+            for k, v in scope.get("headers", []) if k in (b"if-none-match", b"range", b"if-range")
+        }
+        if "if-none-match" in req and _etag_matches(req["if-none-match"], etag):
+            return await _plain(send, 304, b"", headers[1:])
+
+        size = st.st_size
+        start, end, status = 0, size - 1, 200
+        if "range" in req and req.get("if-range", etag) == etag:
+            r = parse_range(req["range"], size)
+            if r is False:
+                return await _plain(send, 416, b"", [(b"content-range", f"bytes */{size}".encode("latin-1"))])
+            if r is not None:
+                start, end, status = r[0], r[1], 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode("latin-1")))
+        length = end - start + 1 if size else 0
+        headers.append((b"content-length", str(length).encode("latin-1")))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] == "HEAD" or not length:
+            return await send({"type": "http.response.body", "body": b""})
+        await _send_file(scope, send, path, start, length)
+
+
+async def _send_file(scope, send, path: str, offset: int, count: int) -> None:
+    if "http.response.zerocopysend" in scope.get("extensions", {}):
+        with open(path, "rb") as f:
+            await send({"type": "http.response.zerocopysend", "file": f, "offset": offset, "count": count})
+        return
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(offset)
+        while count > 0:
+            data = await f.read(min(CHUNK, count))
+            if not data:
+                break
+            count -= len(data)
+            await send({"type": "http.response.body", "body": data, "more_body": count > 0})
+    if count > 0:  # file shrank under us; end the response rather than hang
+        logger.warning("media %s: %d bytes short", path, count)
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _plain(send, status: int, body: bytes, headers: Optional[Headers] = None) -> None:
+    headers = list(headers or [])
+    if body:
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+    if status != 304:
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,217 @@
+# app/core/metrics.py
+"""
+Prometheus metrics for the API, exposed at GET /metrics.
+
+Single process: metrics live in the default registry.
+Several uvicorn/gunicorn workers: set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory *before* the workers start (wipe it on every deploy).
+Each worker then writes its samples there and /metrics, served by any worker,
+aggregates all of them. Dead workers are cleaned up on shutdown.
+"""
+import logging
+import os
+import time
+from datetime import datetime, time as dtime
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func
+
+from app.core.instrumentation import route_template
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# ---------------------------
+# Metric definitions
+# ---------------------------
+
+REQUEST_LATENCY = Histogram(
+    "mobo_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "mobo_http_requests_in_progress",
+    "Requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "mobo_db_pool_checked_out",
+    "DB connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_CONNECTIONS_OPENED = Counter(
+    "mobo_db_connections_opened_total",
+    "New DBAPI connections opened by the pool",
+)
+IDENTITY_CACHE = Counter(
+    "mobo_identity_cache_requests_total",
+    "Authenticated-identity lookups by outcome (hit = served without a DB user load)",
+    ["result"],
+)
+UPLOAD_BYTES = Counter(
+    "mobo_upload_bytes_total",
+    "Bytes received in uploaded files",
+    ["kind"],
+)
+STARTUP_SECONDS = Gauge(
+    "mobo_startup_seconds",
+    "Cold start of this worker: module import until startup handlers finished",
+    multiprocess_mode="max",
+)
+COMPRESSION_BYTES = Counter(
+    "mobo_compression_bytes_total",
+    "Response body bytes before (in) and after (out) compression",
+    ["encoding", "stage"],
+)
+IDEMPOTENCY = Counter(
+    "mobo_idempotency_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],  # executed | replayed | mismatch | in_progress
+)
+LAZY_LOADS = Counter(
+    "mobo_lazy_loads_total",
+    "Relationship lazy loads over the per-request allowance (LAZY_LOAD_POLICY=warn|raise)",
+    ["route", "relationship"],
+)
+BATCH_SUBREQUESTS = Counter(
+    "mobo_batch_subrequests_total",
+    "Sub-requests dispatched by POST /batch",
+    ["method", "route", "status"],
+)
+NOTIFICATIONS_CREATED = Counter(
+    "mobo_notifications_created_total",
+    "Notifications written (fan-out), by notification type",
+    ["type"],
+)
+
+
+# ---------------------------
+# Scrape-time collectors
+# ---------------------------
+
+class QueueLengthCollector:
+    """
+    Today's queue per department, read with one GROUP BY at scrape time.
+    Computed from the DB (not from worker memory), so it is correct no matter
+    which worker answers the scrape.
+    """
+
+    @staticmethod
+    def _family():
+        return GaugeMetricFamily(
+            "mobo_queue_tickets", "Today's queue tickets per department and status",
+            labels=["department_id", "status"],
+        )
+
+    def describe(self):
+        # lets the registry learn the metric name without hitting the DB
+        return [self._family()]
+
+    def collect(self):
+        # local imports: keep app.core free of model imports at module load
+        from app import models
+        from app.db.session import SessionLocal
+
+        waiting = self._family()
+        db = SessionLocal()
+        try:
+            qdate = datetime.combine(datetime.utcnow().date(), dtime(0, 0))
+            rows = (
+                db.query(models.QueueTicket.department_id, models.QueueTicket.status, func.count(models.QueueTicket.id))
+                .filter(models.QueueTicket.date == qdate,
+                        models.QueueTicket.status.in_(["waiting", "serving"]))
+                .group_by(models.QueueTicket.department_id, models.QueueTicket.status)
+                .all()
+            )
+            for dept_id, status, count in rows:
+                waiting.add_metric([str(dept_id), status], count)
+        except Exception:
+            logger.exception("queue length collection failed")
+        finally:
+            db.close()
+        yield waiting
+
+
+_queue_collector = QueueLengthCollector()
+if not MULTIPROC_DIR:
+    REGISTRY.register(_queue_collector)
+
+
+def instrument_engine(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, conn_record):
+        DB_CONNECTIONS_OPENED.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, conn_record, conn_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, conn_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def render_latest():
+    """(body, content_type) for the /metrics response."""
+    if MULTIPROC_DIR:
+        # a fresh registry per scrape, fed from every worker's files
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+# ---------------------------
+# ASGI middleware
+# ---------------------------
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            return await self.app(scope, receive, send)
+
+        method = scope.get("method", "")
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route_template(scope), str(status["code"])).observe(
+                time.perf_counter() - t0
+            )
@@ -0,0 +1,297 @@
+# app/core/queue_analytics.py
+"""
+Queue analytics: rolling wait/service times and per-ticket position + ETA.
+
+Everything an estimate needs lives in memory, so `estimate()` and
+`average_wait_min()` are O(1) and never scan the day's tickets:
+
+- Per (department, service) and per department: EWMAs of
+  wait = called_at - created_at and service = served_at - called_at,
+  updated on every check-in / call / close (QUEUE_EWMA_ALPHA).
+- Per (department, day): the highest called number (`head`), the highest
+  issued number, numbers closed while still waiting (skipped), and an EWMA
+  of the interval between calls, which reflects how many windows are open.
+
+A waiting ticket's position is `number - head - skipped below it`; its ETA is
+(position + 1) x call interval (falling back to the service-time EWMA, then
+QUEUE_DEFAULT_SERVICE_MIN). State is warmed from the DB the first time a
+department is asked about and re-synced every QUEUE_STATS_SYNC_SECONDS
+(same as the revocation cache), which picks up calls and check-ins made by
+other worker processes.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# call gaps outside this range (double clicks; lunch, closing) say nothing about throughput
+_MIN_CALL_GAP = timedelta(seconds=5)
+_MAX_CALL_GAP = timedelta(minutes=45)
+_MIN_INTERVAL_SAMPLES = 3
+_WARM_SAMPLES = 50
+
+
+def queue_date(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day)
+
+
+class Ewma:
+    __slots__ = ("value", "n")
+
+    def __init__(self):
+        self.value: Optional[float] = None
+        self.n = 0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        self.value = x if self.value is None else self.value + settings.QUEUE_EWMA_ALPHA * (x - self.value)
+
+
+class _Day:
+    __slots__ = ("head", "issued", "skipped", "last_call_at", "interval")
+
+    def __init__(self):
+        self.head = 0
+        self.issued = 0
+        self.skipped: Set[int] = set()
+        self.last_call_at: Optional[datetime] = None
+        self.interval = Ewma()
+
+    def position(self, number: int) -> int:
+        """Tickets still waiting ahead of `number`."""
+        ahead = number - self.head - 1
+        if self.skipped:
+            ahead -= sum(1 for s in self.skipped if self.head < s < number)
+        return max(0, ahead)
+
+
+class _Dept:
+    __slots__ = ("day", "today", "wait", "service", "next_sync", "watermark")
+
+    def __init__(self):
+        self.day = _Day()
+        self.today: Optional[datetime] = None
+        self.wait: Dict[Optional[int], Ewma] = {}      # service_id (None = whole dept) -> minutes
+        self.service: Dict[Optional[int], Ewma] = {}
+        self.next_sync = 0.0
+        self.watermark: Optional[datetime] = None      # samples up to here have been pulled from the DB
+
+
+def _minutes(a: Optional[datetime], b: Optional[datetime]) -> Optional[float]:
+    if a is None or b is None or b < a:
+        return None
+    return (b - a).total_seconds() / 60.0
+
+
+class QueueAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._depts: Dict[int, _Dept] = {}
+        # samples this process recorded itself, so a sync doesn't count them twice
+        self._seen: Dict[Tuple[str, str], datetime] = {}
+
+    # ---------------------------
+    # Events (called after the change is committed)
+    # ---------------------------
+
+    def on_issued(self, t: models.QueueTicket) -> None:
+        with self._lock:
+            d = self._day(t.department_id, t.date)
+            if d is not None:
+                d.issued = max(d.issued, t.number)
+
+    def on_called(self, t: models.QueueTicket) -> None:
+        with self._lock:
+            dept = self._depts.get(t.department_id)
+            if dept is None:
+                return  # not warmed yet; the warm-up will read this call from the DB
+            self._sample(dept, "wait", t.service_id, t.id, _minutes(t.created_at, t.called_at), t.called_at)
+            d = self._day(t.department_id, t.date)
+            if d is None:
+                return
+            if d.last_call_at is not None and t.called_at is not None:
+                gap = t.called_at - d.last_call_at
+                if _MIN_CALL_GAP <= gap <= _MAX_CALL_GAP:
+                    d.interval.add(gap.total_seconds() / 60.0)
+            if t.called_at is not None and (d.last_call_at is None or t.called_at > d.last_call_at):
+                d.last_call_at = t.called_at
+            d.head = max(d.head, t.number)
+            d.skipped = {s for s in d.skipped if s > d.head}
+
+    def on_closed(self, t: models.QueueTicket) -> None:
+        with self._lock:
+            dept = self._depts.get(t.department_id)
+            if dept is None:
+                return
+            if t.status == "done":
+                self._sample(dept, "service", t.service_id, t.id, _minutes(t.called_at, t.served_at), t.served_at)
+            if t.called_at is None:
+                # closed straight from waiting: no longer ahead of anyone
+                d = self._day(t.department_id, t.date)
+                if d is not None and t.number > d.head:
+                    d.skipped.add(t.number)
+
+    def _sample(self, dept: _Dept, kind: str, service_id: Optional[int], ticket_id: str,
+                minutes: Optional[float], at: Optional[datetime]) -> None:
+        if minutes is None:
+            return
+        stats = dept.wait if kind == "wait" else dept.service
+        for key in (None, service_id) if service_id is not None else (None,):
+            stats.setdefault(key, Ewma()).add(minutes)
+        self._seen[(ticket_id, kind)] = at or datetime.utcnow()
+
+    def _day(self, department_id: int, qdate: datetime) -> Optional[_Day]:
+        dept = self._depts.get(department_id)
+        if dept is None or dept.today != qdate:
+            return None
+        return dept.day
+
+    # ---------------------------
+    # Warm-up / sync
+    # ---------------------------
+
+    def maybe_sync(self, db: Session, department_id: int) -> None:
+        """Load or refresh one department's state; a no-op between syncs."""
+        now = time.monotonic()
+        today = queue_date()
+        with self._lock:
+            dept = self._depts.get(department_id)
+            if dept is not None and now < dept.next_sync and dept.today == today:
+                return
+            if dept is None:
+                dept = self._depts[department_id] = _Dept()
+            dept.next_sync = now + settings.QUEUE_STATS_SYNC_SECONDS
+            watermark = dept.watermark
+        try:
+            self._sync(db, dept, department_id, today, watermark)
+        except Exception:
+            logger.exception("queue stats sync failed for department %s", department_id)
+            with self._lock:
+                dept.next_sync = 0.0
+
+    def _sync(self, db: Session, dept: _Dept, department_id: int, today: datetime,
+              watermark: Optional[datetime]) -> None:
+        T = models.QueueTicket
+        synced_at = datetime.utcnow()
+
+        head, issued, last_call_at = (
+            db.query(
+                func.max(case((T.called_at.isnot(None), T.number), else_=None)),
+                func.max(T.number),
+                func.max(T.called_at),
+            )
+            .filter(T.department_id == department_id, T.date == today)
+            .one()
+        )
+        head = head or 0
+        skipped = {
+            n for (n,) in db.query(T.number).filter(
+                T.department_id == department_id, T.date == today,
+                T.status != "waiting", T.called_at.is_(None), T.number > head,
+            )
+        }
+
+        q = db.query(T.id, T.service_id, T.created_at, T.called_at, T.served_at).filter(
+            T.department_id == department_id, T.called_at.isnot(None),
+        )
+        if watermark is None:
+            # first load: the last few tickets seed the averages
+            rows = list(reversed(q.order_by(T.called_at.desc()).limit(_WARM_SAMPLES).all()))
+        else:
+            rows = (
+                q.filter(or_(T.called_at > watermark, T.served_at > watermark))
+                .order_by(T.called_at)
+                .limit(_WARM_SAMPLES * 10)
+                .all()
+            )
+
+        with self._lock:
+            if dept.today != today:
+                dept.today = today
+                dept.day = _Day()
+            d = dept.day
+            d.head = max(d.head, head)
+            d.issued = max(d.issued, issued or 0)
+            d.skipped = {s for s in d.skipped | skipped if s > d.head}
+            if last_call_at is not None and (d.last_call_at is None or last_call_at > d.last_call_at):
+                d.last_call_at = last_call_at
+
+            for tid, service_id, created_at, called_at, served_at in rows:
+                if (watermark is None or called_at > watermark) and (tid, "wait") not in self._seen:
+                    self._sample(dept, "wait", service_id, tid, _minutes(created_at, called_at), called_at)
+                if served_at is not None and (watermark is None or served_at > watermark) \
+                        and (tid, "service") not in self._seen:
+                    self._sample(dept, "service", service_id, tid, _minutes(called_at, served_at), served_at)
+
+            dept.watermark = synced_at
+            self._prune()
+
+    def _prune(self) -> None:
+        # a recorded sample only matters until every department's watermark has passed it
+        marks = [d.watermark for d in self._depts.values() if d.watermark is not None]
+        if not marks or len(self._seen) < 1000:
+            return
+        oldest = min(marks)
+        for k in [k for k, at in self._seen.items() if at <= oldest]:
+            del self._seen[k]
+
+    # ---------------------------
+    # Reads (O(1))
+    # ---------------------------
+
+    def average_wait_min(self, department_id: int, service_id: Optional[int] = None) -> Optional[int]:
+        dept = self._depts.get(department_id)
+        if dept is None:
+            return None
+        e = dept.wait.get(service_id) or dept.wait.get(None)
+        return round(e.value) if e is not None and e.value is not None else None
+
+    def _call_interval(self, dept: _Dept, service_id: Optional[int]) -> float:
+        if dept.day.interval.n >= _MIN_INTERVAL_SAMPLES:
+            return dept.day.interval.value
+        e = dept.service.get(service_id) or dept.service.get(None)
+        if e is not None and e.value is not None:
+            return e.value
+        return float(settings.QUEUE_DEFAULT_SERVICE_MIN)
+
+    def estimate(self, t: models.QueueTicket) -> dict:
+        """Position (tickets ahead) and ETA in minutes for one ticket."""
+        out = {"position": None, "now_serving": None, "eta_min": None, "estimated_call_at": None}
+        with self._lock:
+            dept = self._depts.get(t.department_id)
+            if dept is None or dept.today != t.date:
+                return out
+            d = dept.day
+            out["now_serving"] = d.head or None
+            if t.status != "waiting":
+                out["position"] = 0
+                return out
+            ahead = d.position(t.number)
+            interval = self._call_interval(dept, t.service_id)
+            minutes = (ahead + 1) * interval
+            if d.last_call_at is not None:
+                # part of the current interval has already gone by
+                since = (datetime.utcnow() - d.last_call_at).total_seconds() / 60.0
+                minutes -= min(max(since, 0.0), interval)
+        out["position"] = ahead
+        out["eta_min"] = round(minutes)
+        out["estimated_call_at"] = datetime.utcnow() + timedelta(minutes=minutes)
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._depts.clear()
+            self._seen.clear()
+
+
+queue_analytics = QueueAnalytics()
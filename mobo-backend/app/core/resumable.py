@@ -0,0 +1,215 @@
+# app/core/resumable.py
+"""
+Resumable (tus-style) uploads, for residents reporting from weak signal.
+
+  POST   /api/v1/media/resumable                 {kind, content_type, size, filename} -> 201 + Location
+  HEAD   /api/v1/media/resumable/{id}            Upload-Offset: where to resume
+  PATCH  /api/v1/media/resumable/{id}            Upload-Offset: n, body = the bytes from n on -> 204
+  POST   /api/v1/media/resumable/{id}/complete   -> {key, url}, the file moved into storage
+  DELETE /api/v1/media/resumable/{id}            abort
+
+A dropped PATCH keeps every byte that arrived; the client HEADs for the
+offset and continues from there instead of resending the whole photo (and
+re-creating the incident). The key from /complete is used like one from
+POST /media/uploads: photo_keys on /incidents/create, POST
+/incidents/{id}/photos, or image_key on announcements.
+
+Partial data is on local disk under RESUMABLE_DIR (<id>.part, with the
+session in <id>.json) whatever the storage backend, so behind several API
+nodes a session has to stick to one of them. The .part file's size is the
+offset. Sessions idle for RESUMABLE_EXPIRE_SECONDS are deleted by
+purge_expired(), which runs every few minutes from create() and from
+`python -m app.scripts.media purge-uploads`.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional
+
+import anyio
+
+from app.core import metrics, storage
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, fine for a single dev worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_ID = re.compile(r"^[0-9a-f]{32}$")
+_PURGE_EVERY = 300.0
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _root() -> str:
+    root = os.path.abspath(settings.RESUMABLE_DIR)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _paths(upload_id: str):
+    if not _ID.match(upload_id or ""):
+        raise UploadError(404, "Upload not found")
+    base = os.path.join(_root(), upload_id)
+    return base + ".part", base + ".json"
+
+
+def _load(upload_id: str, owner: str) -> Dict:
+    part, meta = _paths(upload_id)
+    try:
+        with open(meta, "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except (FileNotFoundError, ValueError):
+        raise UploadError(404, "Upload not found")
+    if session["owner"] != owner:
+        raise UploadError(404, "Upload not found")  # don't confirm someone else's id
+    return session
+
+
+def _status(session: Dict, offset: int, touched: float) -> Dict:
+    return {
+        "id": session["id"],
+        "offset": offset,
+        "length": session["length"],
+        "expires_at": datetime.utcfromtimestamp(touched + settings.RESUMABLE_EXPIRE_SECONDS),
+    }
+
+
+def create(owner: str, prefix: str, key_owner: Optional[str], content_type: str, length: int,
+           filename: Optional[str] = None) -> Dict:
+    maybe_purge()
+    upload_id = uuid.uuid4().hex
+    part, meta = _paths(upload_id)
+    session = {
+        "id": upload_id, "owner": owner, "prefix": prefix, "key_owner": key_owner,
+        "content_type": content_type, "filename": filename, "length": length,
+        "created": time.time(),
+    }
+    open(part, "wb").close()
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump(session, f)
+    return _status(session, 0, session["created"])
+
+
+def status(upload_id: str, owner: str) -> Dict:
+    session = _load(upload_id, owner)
+    part, _ = _paths(upload_id)
+    try:
+        st = os.stat(part)
+    except FileNotFoundError:
+        raise UploadError(404, "Upload not found")
+    return _status(session, st.st_size, st.st_mtime)
+
+
+async def append(upload_id: str, owner: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict:
+    """
+    Write the request body at `offset`, which must be the current size.
+    Bytes are on disk as they arrive, so a dropped connection loses nothing
+    already received (the caller sees the transport error).
+    """
+    session = _load(upload_id, owner)
+    part, _ = _paths(upload_id)
+    f = await anyio.open_file(part, "ab")
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.wrapped.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError(423, "Another PATCH for this upload is in progress")
+        size = os.fstat(f.wrapped.fileno()).st_size
+        if offset != size:
+            raise UploadError(409, f"Upload-Offset is {size}")
+        remaining = session["length"] - size
+        async for chunk in chunks:
+            if len(chunk) > remaining:
+                raise UploadError(413, "More data than the declared size")
+            await f.write(chunk)
+            remaining -= len(chunk)
+        await f.flush()
+        size = session["length"] - remaining
+    finally:
+        await f.aclose()  # closing releases the lock
+    return _status(session, size, time.time())
+
+
+def complete(upload_id: str, owner: str) -> str:
+    """Move the finished file into storage; returns its key."""
+    session = _load(upload_id, owner)
+    part, meta = _paths(upload_id)
+    size = os.path.getsize(part)
+    if size != session["length"]:
+        raise UploadError(409, f"Upload incomplete: {size} of {session['length']} bytes")
+    key = storage.new_key(session["prefix"], session["key_owner"], session["filename"], session["content_type"])
+    with open(part, "rb") as f:
+        storage.get_storage().save(key, f, session["content_type"])
+    metrics.UPLOAD_BYTES.labels("resumable").inc(size)
+    _remove(part, meta)
+    return key
+
+
+def abort(upload_id: str, owner: str) -> None:
+    _load(upload_id, owner)
+    _remove(*_paths(upload_id))
+
+
+def _remove(*paths: str) -> None:
+    for p in paths:
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def purge_expired(now: Optional[float] = None) -> int:
+    """Delete sessions (and stray .part files) idle longer than RESUMABLE_EXPIRE_SECONDS."""
+    cutoff = (time.time() if now is None else now) - settings.RESUMABLE_EXPIRE_SECONDS
+    removed = 0
+    root = _root()
+    for name in os.listdir(root):
+        upload_id, ext = os.path.splitext(name)
+        if ext not in (".part", ".json") or not _ID.match(upload_id):
+            continue
+        part, meta = _paths(upload_id)
+        try:
+            touched = max(os.path.getmtime(p) for p in (part, meta) if os.path.exists(p))
+        except (OSError, ValueError):  # already removed (its other file came first)
+            continue
+        if touched < cutoff:
+            _remove(part, meta)
+            removed += 1
+    if removed:
+        logger.info("purged %d expired resumable uploads", removed)
+    return removed
+
+
+_purge_lock = threading.Lock()
+_next_purge = 0.0
+
+
+def maybe_purge() -> None:
+    """purge_expired() at most every few minutes per process; cheap no-op otherwise."""
+    global _next_purge
+    now = time.monotonic()
+    if now < _next_purge:
+        return
+    with _purge_lock:
+        if now < _next_purge:
+            return
+        _next_purge = now + _PURGE_EVERY
+    try:
+        purge_expired()
+    except Exception:
+        logger.exception("resumable upload purge failed")
@@ -0,0 +1,147 @@
+# app/core/retention.py
+"""
+Retention: move cold rows out of the hot tables in small batches.
+
+Policies (days are configurable, 0 disables a policy):
+- notifications  read, and created more than RETENTION_NOTIFICATIONS_DAYS ago
+- alert_reads    reads of alerts that expired more than RETENTION_ALERT_READS_DAYS ago
+- queue_tickets  from queue days more than RETENTION_QUEUE_TICKETS_DAYS ago
+                 (tickets a live notification still points at are kept)
+
+RETENTION_TARGET=table copies each batch into `<table>_archive` (see
+models._archive_table) and deletes it from the hot table in one
+transaction. RETENTION_TARGET=file appends it to a gzipped NDJSON file in
+RETENTION_ARCHIVE_DIR instead, deleting only after the file is synced.
+
+On Postgres the archive tables are partitioned by archived_at month; each run
+creates upcoming partitions and, with RETENTION_ARCHIVE_MONTHS > 0, drops
+archive months older than that.
+
+Run it from cron: python -m app.scripts.run_retention
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, func, literal, select
+from sqlalchemy.engine import Engine
+
+from app import models
+from app.core.config import settings
+from app.db import partitions
+
+logger = logging.getLogger(__name__)
+
+
+class Policy:
+    def __init__(self, name: str, table, archive, condition):
+        self.name = name
+        self.table = table
+        self.archive = archive
+        self.condition = condition
+
+
+def policies(now: Optional[datetime] = None) -> List[Policy]:
+    now = now or datetime.utcnow()
+    out = []
+    if settings.RETENTION_NOTIFICATIONS_DAYS > 0:
+        N = models.Notification
+        out.append(Policy(
+            "notifications", N.__table__, models.notifications_archive,
+            (N.read.is_(True)) & (N.created_at < now - timedelta(days=settings.RETENTION_NOTIFICATIONS_DAYS)),
+        ))
+    if settings.RETENTION_ALERT_READS_DAYS > 0:
+        A, R = models.Alert, models.AlertRead
+        expired = select(A.id).where(A.valid_until < now - timedelta(days=settings.RETENTION_ALERT_READS_DAYS))
+        out.append(Policy("alert_reads", R.__table__, models.alert_reads_archive, R.alert_id.in_(expired)))
+    if settings.RETENTION_QUEUE_TICKETS_DAYS > 0:
+        T, N = models.QueueTicket, models.Notification
+        day = datetime(now.year, now.month, now.day) - timedelta(days=settings.RETENTION_QUEUE_TICKETS_DAYS)
+        out.append(Policy(
+            "queue_tickets", T.__table__, models.queue_tickets_archive,
+            (T.date < day) & ~exists().where(N.queue_ticket_id == T.id),
+        ))
+    return out
+
+
+def _pk(table):
+    return list(table.primary_key.columns)[0]
+
+
+def _json_row(row) -> str:
+    return json.dumps(dict(row._mapping), default=str, ensure_ascii=False)
+
+
+def _archive_file(name: str, now: datetime) -> str:
+    os.makedirs(settings.RETENTION_ARCHIVE_DIR, exist_ok=True)
+    return os.path.join(settings.RETENTION_ARCHIVE_DIR, f"{name}-{now:%Y%m}.ndjson.gz")
+
+
+def _move(engine: Engine, p: Policy, now: datetime, target: str, limit: Optional[int]) -> int:
+    pk = _pk(p.table)
+    batch = settings.RETENTION_BATCH_SIZE
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch if limit is None else min(batch, limit - moved)
+        with engine.begin() as conn:
+            ids = conn.execute(select(pk).where(p.condition).order_by(pk).limit(size)).scalars().all()
+            if not ids:
+                break
+            if target == "file":
+                rows = conn.execute(select(p.table).where(pk.in_(ids))).all()
+                # gzip members concatenate, so appending per batch is fine
+                with open(_archive_file(p.name, now), "ab") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                        gz.write(("\n".join(_json_row(r) for r in rows) + "\n").encode("utf-8"))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+            else:
+                cols = [c.name for c in p.table.columns]
+                conn.execute(p.archive.insert().from_select(
+                    cols + ["archived_at"],
+                    select(*[p.table.c[c] for c in cols], literal(now).label("archived_at")).where(pk.in_(ids)),
+                ))
+            conn.execute(p.table.delete().where(pk.in_(ids)))
+        moved += len(ids)
+        if len(ids) < size:
+            break
+    return moved
+
+
+def maintain_archive_partitions(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for archive in (models.notifications_archive, models.alert_reads_archive, models.queue_tickets_archive):
+            partitions.ensure_partitions(conn, archive.name, months_ahead=1)
+            if settings.RETENTION_ARCHIVE_MONTHS > 0:
+                cutoff = partitions.add_months(partitions.month_start(date.today()), -settings.RETENTION_ARCHIVE_MONTHS)
+                partitions.detach_older_than(conn, archive.name, cutoff, drop=True)
+
+
+def count_pending(engine: Engine) -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            p.name: conn.execute(select(func.count()).select_from(p.table).where(p.condition)).scalar()
+            for p in policies()
+        }
+
+
+def run(engine: Engine, only: Optional[List[str]] = None, limit: Optional[int] = None) -> Dict[str, int]:
+    """Apply every (or `only` the named) policies; returns rows moved per policy."""
+    now = datetime.utcnow()
+    target = settings.RETENTION_TARGET
+    if target == "table":
+        maintain_archive_partitions(engine)
+    result = {}
+    for p in policies(now):
+        if only and p.name not in only:
+            continue
+        try:
+            result[p.name] = _move(engine, p, now, target, limit)
+        except Exception:
+            logger.exception("retention policy %s failed", p.name)
+            raise
+        logger.info("retention %s: moved %d rows to %s", p.name, result[p.name], target)
+    return result
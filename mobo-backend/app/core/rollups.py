@@ -0,0 +1,232 @@
+# app/core/rollups.py
+"""
+Daily reporting rollups for incidents, appointments and queue tickets.
+
+The write paths call the record_* helpers below before they commit, so each
+rollup row is bumped in the same transaction as the change it counts (one
+INSERT .. ON CONFLICT DO UPDATE per event). The /reports API only reads the
+rollup tables, so a dashboard query touches (days in range x groups) rows no
+matter how much history the source tables hold.
+
+rebuild(db, start, end) recomputes whole days from the source tables. It is
+idempotent; run it to backfill after deploying, or nightly from cron to
+correct any drift (e.g. an incident moved to another department):
+
+  python -m app.scripts.rebuild_rollups --days 2
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = ("resolved", "rejected")
+
+_KEYS = {
+    models.IncidentDailyRollup: ("day", "department_id", "barangay_id", "category_id"),
+    models.AppointmentDailyRollup: ("day", "department_id", "service_id"),
+    models.QueueDailyRollup: ("day", "department_id", "window_id"),
+}
+
+
+def _id(v) -> int:
+    # dimension ids are 0 for "none" (see models); incidents store some as text
+    try:
+        return int(v) if v is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _day(v: Optional[datetime]) -> date:
+    return (v or datetime.utcnow()).date()
+
+
+def _seconds(a: Optional[datetime], b: Optional[datetime]) -> int:
+    if a is None or b is None or b < a:
+        return 0
+    return int((b - a).total_seconds())
+
+
+def bump(db: Session, model, key: Dict, **deltas: int) -> None:
+    """Add `deltas` to the rollup row identified by `key`, creating it if needed."""
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(table).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_KEYS[model]),
+            set_={c: table.c[c] + stmt.excluded[c] for c in deltas},
+        )
+        db.execute(stmt)
+        return
+    # other backends: update, insert if nothing matched
+    cond = [table.c[k] == v for k, v in key.items()]
+    res = db.execute(table.update().where(*cond).values({c: table.c[c] + d for c, d in deltas.items()}))
+    if res.rowcount == 0:
+        db.execute(table.insert().values(**key, **deltas))
+
+
+# ---------------------------
+# Write-path hooks (call before commit)
+# ---------------------------
+
+def _incident_key(inc: models.Incident, day: date) -> Dict:
+    return {
+        "day": day,
+        "department_id": _id(inc.department),
+        "barangay_id": _id(inc.barangay_id),
+        "category_id": _id(inc.incident_type),
+    }
+
+
+def record_incident_created(db: Session, inc: models.Incident) -> None:
+    bump(db, models.IncidentDailyRollup, _incident_key(inc, _day(inc.created_at)), created=1)
+
+
+def record_incident_status(db: Session, inc: models.Incident, old_status: Optional[str]) -> None:
+    """Count the transition into a closed state; sets inc.closed_at."""
+    if inc.status == old_status or inc.status not in CLOSED_STATUSES:
+        return
+    inc.closed_at = datetime.utcnow()
+    key = _incident_key(inc, inc.closed_at.date())
+    if inc.status == "resolved":
+        bump(db, models.IncidentDailyRollup, key, resolved=1,
+             resolution_seconds=_seconds(inc.created_at, inc.closed_at))
+    else:
+        bump(db, models.IncidentDailyRollup, key, rejected=1)
+
+
+def record_appointment(db: Session, appt: models.Appointment, event: str) -> None:
+    """event: booked | cancelled | checked_in | done | no_show"""
+    key = {"day": _day(appt.slot_date), "department_id": _id(appt.department_id), "service_id": _id(appt.service_id)}
+    bump(db, models.AppointmentDailyRollup, key, **{event: 1})
+
+
+def record_ticket(db: Session, t: models.QueueTicket, event: str) -> None:
+    """event: issued | called | served | no_show"""
+    key = {"day": _day(t.date), "department_id": _id(t.department_id), "window_id": 0}
+    if event == "issued":
+        bump(db, models.QueueDailyRollup, key, issued=1)
+        return
+    key["window_id"] = _id(t.window_id)
+    if event == "called":
+        bump(db, models.QueueDailyRollup, key, called=1, wait_seconds=_seconds(t.created_at, t.called_at))
+    elif event == "served":
+        bump(db, models.QueueDailyRollup, key, served=1, service_seconds=_seconds(t.called_at, t.served_at))
+    elif event == "no_show":
+        bump(db, models.QueueDailyRollup, key, no_show=1)
+
+
+# ---------------------------
+# Rebuild from source
+# ---------------------------
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def _replace_day(db: Session, model, day: date, rows: Dict[Tuple, Dict[str, int]]) -> int:
+    db.query(model).filter(model.day == day).delete(synchronize_session=False)
+    keys = _KEYS[model][1:]
+    for dims, counts in rows.items():
+        db.add(model(day=day, **dict(zip(keys, dims)), **counts))
+    return len(rows)
+
+
+def _rebuild_incidents(db: Session, day: date) -> int:
+    I = models.Incident
+    lo, hi = _day_bounds(day)
+    rows: Dict[Tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    for dept, brgy, cat in (
+        db.query(I.department, I.barangay_id, I.incident_type)
+        .filter(I.created_at >= lo, I.created_at < hi)
+        .yield_per(1000)
+    ):
+        rows[(_id(dept), _id(brgy), _id(cat))]["created"] += 1
+
+    for dept, brgy, cat, status, created_at, closed_at in (
+        db.query(I.department, I.barangay_id, I.incident_type, I.status, I.created_at, I.closed_at)
+        .filter(I.status.in_(CLOSED_STATUSES), I.closed_at >= lo, I.closed_at < hi)
+        .yield_per(1000)
+    ):
+        r = rows[(_id(dept), _id(brgy), _id(cat))]
+        if status == "resolved":
+            r["resolved"] += 1
+            r["resolution_seconds"] += _seconds(created_at, closed_at)
+        else:
+            r["rejected"] += 1
+    return _replace_day(db, models.IncidentDailyRollup, day, rows)
+
+
+def _rebuild_appointments(db: Session, day: date) -> int:
+    A = models.Appointment
+    lo, _ = _day_bounds(day)
+    rows: Dict[Tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for dept, svc, status, queue_number in (
+        db.query(A.department_id, A.service_id, A.status, A.queue_number)
+        .filter(A.slot_date == lo)
+        .yield_per(1000)
+    ):
+        r = rows[(_id(dept), _id(svc))]
+        r["booked"] += 1
+        if queue_number is not None:
+            r["checked_in"] += 1
+        if status in ("cancelled", "done", "no_show"):
+            r[status] += 1
+    return _replace_day(db, models.AppointmentDailyRollup, day, rows)
+
+
+def _rebuild_queue(db: Session, day: date) -> int:
+    lo, _ = _day_bounds(day)
+    rows: Dict[Tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    # past queue days may already have been moved to the archive (app.core.retention)
+    sources = [
+        select(T.c.department_id, T.c.window_id, T.c.status, T.c.created_at, T.c.called_at, T.c.served_at)
+        .where(T.c.date == lo)
+        for T in (models.QueueTicket.__table__, models.queue_tickets_archive)
+    ]
+    for dept, window, status, created_at, called_at, served_at in db.execute(union_all(*sources)):
+        rows[(_id(dept), 0)]["issued"] += 1
+        r = rows[(_id(dept), _id(window))]
+        if called_at is not None:
+            r["called"] += 1
+            r["wait_seconds"] += _seconds(created_at, called_at)
+        if status == "done":
+            r["served"] += 1
+            r["service_seconds"] += _seconds(called_at, served_at)
+        elif status == "no_show":
+            r["no_show"] += 1
+    return _replace_day(db, models.QueueDailyRollup, day, rows)
+
+
+def rebuild(db: Session, start: date, end: date) -> Dict[str, int]:
+    """Recompute every rollup for start..end (inclusive), one transaction per day."""
+    written = {"incidents": 0, "appointments": 0, "queue": 0}
+    day = start
+    while day <= end:
+        try:
+            written["incidents"] += _rebuild_incidents(db, day)
+            written["appointments"] += _rebuild_appointments(db, day)
+            written["queue"] += _rebuild_queue(db, day)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("rollup rebuild failed for %s", day)
+            raise
+        day += timedelta(days=1)
+    return written
@@ -0,0 +1,296 @@
+# app/core/search.py
+"""
+Full-text search over incidents and announcements.
+
+Postgres: each searchable table gets a `search_vector tsvector` column with a
+GIN index, kept up to date by a BEFORE INSERT/UPDATE trigger (title weighs
+most, then the body, then address/landmark). Queries go through
+websearch_to_tsquery, so raw user input ("broken pipe -water", quoted
+phrases) is safe, and hits are ranked with ts_rank_cd. The trigger is
+declared on the parent, so partitioned incidents (app/db/partitions.py)
+need Postgres 13+.
+
+SQLite: an external-content FTS5 table `<table>_fts` indexes the same
+columns, synced by AFTER INSERT/UPDATE/DELETE triggers, and hits are
+ranked with bm25(). If FTS5 isn't compiled in (or on other databases) we
+fall back to a LIKE scan ordered by recency, and log it once.
+
+install(conn) creates all of it idempotently; the migration calls it, and so
+does the create_all path in app/db/bootstrap.py. None of these columns are
+on the ORM models, so the app never writes them itself.
+
+Snippets are HTML-escaped text with each match wrapped in <b>...</b>; the
+database marks matches with private-use sentinels and _snippet_html() escapes
+the surrounding (user-written) text before turning those into tags.
+
+Results are paged with an opaque cursor (the sort key and id of the last
+hit), not OFFSET, so deep pages cost the same as the first one.
+"""
+import base64
+import html
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Index:
+    def __init__(self, name: str, model, weights: Dict[str, Sequence[str]], list_columns: Sequence[str]):
+        self.name = name
+        self.model = model
+        self.table = model.__table__
+        self.weights = weights  # Postgres weight -> columns, most important first
+        self.list_columns = list_columns  # returned with each hit
+
+    @property
+    def columns(self) -> List[str]:
+        return [c for cols in self.weights.values() for c in cols]
+
+
+INCIDENTS = Index(
+    "incidents", models.Incident,
+    {"A": ["title"], "B": ["description"], "C": ["address", "landmark"]},
+    ["id", "title", "status", "department", "barangay_id", "address", "created_at"],
+)
+ANNOUNCEMENTS = Index(
+    "announcements", models.Announcement,
+    {"A": ["title"], "B": ["body"]},
+    ["id", "title", "image_url", "created_at"],
+)
+INDEXES = (INCIDENTS, ANNOUNCEMENTS)
+
+# bm25 column weights for the FTS5 tables, mirroring the A/B/C weights above
+_BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_HL_START, _HL_STOP = "\ue000", "\ue001"  # match markers, swapped for <b></b> after escaping
+_fts_ready: Dict[str, bool] = {}
+
+
+# ---------------------------
+# DDL
+# ---------------------------
+
+def _pg_vector_expr(ix: Index, row: str) -> str:
+    cfg = settings.SEARCH_TS_CONFIG
+    parts = []
+    for weight, cols in ix.weights.items():
+        doc = " || ' ' || ".join(f"coalesce({row}.{c}, '')" for c in cols)
+        parts.append(f"setweight(to_tsvector('{cfg}', {doc}), '{weight}')")
+    return " || ".join(parts)
+
+
+def _install_pg(conn: Connection, ix: Index) -> None:
+    t = ix.name
+    cols = ", ".join(ix.columns)
+    conn.execute(text(f"ALTER TABLE {t} ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{t}_search_vector ON {t} USING gin (search_vector)"))
+    conn.execute(text(
+        f"CREATE OR REPLACE FUNCTION {t}_search_vector() RETURNS trigger AS $$ "
+        f"BEGIN NEW.search_vector := {_pg_vector_expr(ix, 'NEW')}; RETURN NEW; END "
+        f"$$ LANGUAGE plpgsql"
+    ))
+    conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{t}_search_vector ON {t}"))
+    conn.execute(text(
+        f"CREATE TRIGGER trg_{t}_search_vector BEFORE INSERT OR UPDATE OF {cols} ON {t} "
+        f"FOR EACH ROW EXECUTE FUNCTION {t}_search_vector()"
+    ))
+    conn.execute(text(f"UPDATE {t} SET search_vector = {_pg_vector_expr(ix, t)} WHERE search_vector IS NULL"))
+
+
+def _install_sqlite(conn: Connection, ix: Index) -> None:
+    t, fts = ix.name, f"{ix.name}_fts"
+    if conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": fts}).first():
+        return
+    cols = ", ".join(ix.columns)
+    new = ", ".join(f"new.{c}" for c in ix.columns)
+    old = ", ".join(f"old.{c}" for c in ix.columns)
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{t}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {t} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {t} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {t} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def install(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    for ix in INDEXES:
+        if dialect == "postgresql":
+            _install_pg(conn, ix)
+        elif dialect == "sqlite":
+            try:
+                _install_sqlite(conn, ix)
+            except Exception as e:  # sqlite built without FTS5
+                logger.warning("FTS5 unavailable, %s search will use LIKE: %s", ix.name, e)
+                return
+        _fts_ready.pop(ix.name, None)
+
+
+def uninstall(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    for ix in INDEXES:
+        t = ix.name
+        if dialect == "postgresql":
+            conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{t}_search_vector ON {t}"))
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {t}_search_vector()"))
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_{t}_search_vector"))
+            conn.execute(text(f"ALTER TABLE {t} DROP COLUMN IF EXISTS search_vector"))
+        elif dialect == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {t}_fts_{suffix}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {t}_fts"))
+        _fts_ready.pop(t, None)
+
+
+def _ready(db: Session, ix: Index) -> bool:
+    if ix.name not in _fts_ready:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            sql = ("SELECT 1 FROM information_schema.columns "
+                   "WHERE table_name = :t AND column_name = 'search_vector'")
+            ok = db.execute(text(sql), {"t": ix.name}).first() is not None
+        elif dialect == "sqlite":
+            sql = "SELECT 1 FROM sqlite_master WHERE name = :t"
+            ok = db.execute(text(sql), {"t": f"{ix.name}_fts"}).first() is not None
+        else:
+            ok = False
+        if not ok:
+            logger.warning("no full-text index for %s; search falls back to LIKE", ix.name)
+        _fts_ready[ix.name] = ok
+    return _fts_ready[ix.name]
+
+
+# ---------------------------
+# Cursors
+# ---------------------------
+
+def encode_cursor(key, id_: str) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([key, id_]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    try:
+        key, id_ = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(key) if sort == "recent" else float(key)), str(id_)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after(key_expr, id_col, cursor: Optional[str], sort: str):
+    key, id_ = decode_cursor(cursor, sort)
+    return or_(key_expr < key, and_(key_expr == key, id_col < id_))
+
+
+# ---------------------------
+# Queries
+# ---------------------------
+
+def _tokens(q: str) -> List[str]:
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    return tokens[:16]
+
+
+def _snippet_html(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_HL_START, "<b>").replace(_HL_STOP, "</b>")
+
+
+def search(db: Session, ix: Index, q: str, where: Sequence = (), sort: str = "rank",
+           cursor: Optional[str] = None, limit: int = 20) -> Dict:
+    """
+    One page of hits: {"items": [row dicts with rank/snippet], "next_cursor"}.
+    `where` holds extra conditions on ix.table (department scoping etc.).
+    """
+    tokens = _tokens(q)
+    t = ix.table
+    dialect = db.get_bind().dialect.name
+    fts = _ready(db, ix)
+    if not fts:
+        sort = "recent"
+    body_col = ix.weights["B"][0]
+
+    if fts and dialect == "postgresql":
+        cfg = settings.SEARCH_TS_CONFIG
+        vector = literal_column(f"{ix.name}.search_vector")
+        query = func.websearch_to_tsquery(cfg, q)
+        rank = func.ts_rank_cd(vector, query, 32)  # 32: rank / (rank + 1), i.e. 0..1
+        match = vector.op("@@")(query)
+        snippet = literal_column("NULL")  # ts_headline is expensive; done below for the page only
+        source = t
+    elif fts:
+        ft = table(f"{ix.name}_fts", column("rowid"))
+        fts_col = literal_column(f"{ix.name}_fts")
+        match = fts_col.op("MATCH")(" ".join('"%s"' % tok for tok in tokens))
+        weights = [_BM25_WEIGHTS[w] for w, cols in ix.weights.items() for _ in cols]
+        rank = -func.bm25(fts_col, *weights)  # bm25 is "lower is better"
+        snippet = func.snippet(fts_col, -1, _HL_START, _HL_STOP, "…", 12)
+        source = t.join(ft, ft.c.rowid == literal_column(f"{ix.name}.rowid"))
+    else:
+        match = and_(*[
+            or_(*[t.c[c].ilike(f"%{tok}%") for c in ix.columns]) for tok in tokens
+        ])
+        rank = None
+        snippet = None
+        source = t
+
+    key = rank if sort == "rank" else t.c.created_at
+    cols = [t.c[c] for c in ix.list_columns] + [
+        (rank if rank is not None else literal_column("NULL")).label("rank"),
+        (snippet if snippet is not None else func.substr(t.c[body_col], 1, 160)).label("snippet"),
+    ]
+    stmt = select(*cols).select_from(source).where(match, *where)
+    if cursor:
+        stmt = stmt.where(_after(key, t.c.id, cursor, sort))
+    stmt = stmt.order_by(key.desc(), t.c.id.desc()).limit(limit + 1)
+
+    if fts and dialect == "postgresql":
+        # headline only the rows on this page
+        page = stmt.add_columns(t.c[body_col].label("_body")).subquery()
+        headline = func.ts_headline(
+            cfg, func.coalesce(page.c._body, ""), query,
+            f"MaxWords=24, MinWords=8, StartSel={_HL_START}, StopSel={_HL_STOP}",
+        )
+        order = page.c.rank if sort == "rank" else page.c.created_at
+        stmt = (
+            select(*[page.c[c] for c in ix.list_columns], page.c.rank, headline.label("snippet"))
+            .order_by(order.desc(), page.c.id.desc())
+        )
+
+    rows = [dict(r._mapping) for r in db.execute(stmt)]
+    for r in rows:
+        r["snippet"] = _snippet_html(r["snippet"])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["rank"] if sort == "rank" else last["created_at"], last["id"])
+    return {"items": rows, "next_cursor": next_cursor}
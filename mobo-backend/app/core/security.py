@@ -1,29 +1,45 @@
 # app/core/security.py
+import uuid
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
-from passlib.context import CryptContext
 from jose import jwt, JWTError
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=1)
+def _pwd_context():
+    # passlib is slow to import; only registration/login/seeding need it
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    subject: str,
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
+) -> str:
     """
     Create a JWT token with subject (usually user.id as string).
+    `claims` (role, dept) are embedded so requests can be authorized
+    without loading the user.
     """
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode: Dict[str, Any] = {"sub": str(subject)}
-    expire = datetime.utcnow() + expires_delta
+    now = datetime.utcnow()
+    to_encode: Dict[str, Any] = {"sub": str(subject), "typ": "access", "jti": str(uuid.uuid4()), "iat": now}
+    if claims:
+        to_encode.update(claims)
+    expire = now + expires_delta
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
@@ -0,0 +1,180 @@
+# app/core/serialization.py
+"""
+Response serialization fast path.
+
+For an endpoint with a response_model, FastAPI validates whatever the
+endpoint returns against the model (a full pydantic pass, even if it already
+is an instance of it), runs jsonable_encoder over the result and then
+json.dumps it. Several endpoints also build the model themselves first, so a
+list of a few hundred rows goes through pydantic two or three times.
+
+- DefaultResponse (ORJSONResponse when orjson is installed) is the app's
+  default_response_class, so every JSON body is dumped by orjson.
+- Encoder(Model) compiles, once, a plain function from an ORM object or a
+  dict to a dict of the model's fields. Hot endpoints return
+  `respond(enc.many(rows))`: a Response return value skips response_model
+  validation, and the model stays on the route for the OpenAPI schema.
+  Values are not coerced, so an encoder is only for sources whose types
+  already match the schema; `getters` covers the fields that don't.
+
+- Fieldset adds `?fields=a,b,c` to a list endpoint: only those fields are
+  encoded, and load_only() keeps the other columns out of the SELECT.
+
+benchmarks/bench_serialization.py compares the two paths.
+"""
+import json
+from typing import AbstractSet, Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SINGLETON
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import load_only
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:  # optional dependency
+    orjson = None
+    DefaultResponse = JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def respond(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+    """A ready-made response; FastAPI won't re-validate it against response_model."""
+    if orjson is None:
+        content = jsonable_encoder(content)
+    return DefaultResponse(content=content, status_code=status_code, headers=headers)
+
+
+class Encoder:
+    """
+    Model fields -> plain dict, without validation.
+
+      enc = Encoder(schemas.NotificationOut)
+      enc(obj) / enc.many(rows)
+
+    getters: {field: callable(obj)} for fields that aren't a plain attribute
+    or key of the source (renamed columns, relationships rendered as a name).
+    """
+
+    def __init__(self, model: Type[BaseModel], getters: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        self.model = model
+        self.getters = dict(getters or {})
+        self._fields = []
+        for name, f in model.__fields__.items():
+            sub = None
+            if isinstance(f.type_, type) and issubclass(f.type_, BaseModel) and f.shape in (
+                SHAPE_SINGLETON, SHAPE_LIST, SHAPE_SEQUENCE,
+            ):
+                sub = Encoder(f.type_) if f.type_ is not model else self
+            self._fields.append((name, f.alias, f.default, sub, f.shape != SHAPE_SINGLETON))
+
+    def __call__(self, obj: Any) -> Dict[str, Any]:
+        getters = self.getters
+        is_map = isinstance(obj, dict)
+        out = {}
+        for name, key, default, sub, is_list in self._fields:
+            if name in getters:
+                v = getters[name](obj)
+            elif is_map:
+                v = obj.get(name, default)
+            else:
+                v = getattr(obj, name, default)
+            if sub is not None and v is not None:
+                v = [sub(x) for x in v] if is_list else sub(v)
+            out[key] = v
+        return out
+
+    def many(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self(o) for o in objs]
+
+    @property
+    def field_names(self) -> List[str]:
+        return [f[0] for f in self._fields]
+
+    def only(self, names: AbstractSet[str]) -> "Encoder":
+        """A copy that encodes just `names` (in schema order)."""
+        enc = Encoder.__new__(Encoder)
+        enc.model = self.model
+        enc.getters = self.getters
+        enc._fields = [f for f in self._fields if f[0] in names]
+        return enc
+
+
+class Fieldset:
+    """
+    Sparse fieldsets for a list endpoint: `?fields=id,title,status`.
+
+      INCIDENT_FIELDS = Fieldset(_MY_INCIDENT_OUT, models.Incident, sources={"type": ("incident_type",)})
+
+      fields = INCIDENT_FIELDS.parse(fields)                  # None: all fields
+      rows = q.options(*INCIDENT_FIELDS.load_options(fields)).all()
+      return respond(INCIDENT_FIELDS.encoder(fields).many(rows))
+
+    A field is read from the column of the same name unless `sources` says
+    which columns it is computed from (() for none, e.g. a relationship the
+    getter loads; it is then loaded only when the field is asked for). `id`
+    is always included. Unknown names -> 422.
+    """
+
+    def __init__(self, encoder: Encoder, entity: Any = None,
+                 sources: Optional[Dict[str, Sequence[str]]] = None, always: Sequence[str] = ("id",)):
+        self._encoder = encoder
+        self.entity = entity
+        self.sources = dict(sources or {})
+        self.always = frozenset(always)
+        self.names = encoder.field_names
+        self._columns = set(sa_inspect(entity).column_attrs.keys()) if entity is not None else set()
+        self._encoders: Dict[FrozenSet[str], Encoder] = {}
+
+    def parse(self, raw: Optional[str]) -> Optional[FrozenSet[str]]:
+        if not raw or not raw.strip():
+            return None
+        names = {n.strip() for n in raw.split(",") if n.strip()}
+        unknown = names.difference(self.names)
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(self.names)}",
+            )
+        return frozenset(names | self.always)
+
+    def columns(self, fields: Optional[AbstractSet[str]]) -> Optional[List[str]]:
+        """Column attributes needed for `fields`; None = all of them."""
+        if fields is None or self.entity is None:
+            return None
+        cols = []
+        for name in self.names:
+            if name in fields:
+                cols.extend(c for c in self.sources.get(name, (name,)) if c in self._columns and c not in cols)
+        return cols
+
+    def load_options(self, fields: Optional[AbstractSet[str]]) -> list:
+        """[load_only(...)] for a query over `entity`, or [] to load everything."""
+        cols = self.columns(fields)
+        if cols is None:
+            return []
+        return [load_only(*(getattr(self.entity, c) for c in cols))]
+
+    def encoder(self, fields: Optional[AbstractSet[str]]) -> Encoder:
+        if fields is None:
+            return self._encoder
+        enc = self._encoders.get(fields)
+        if enc is None:
+            enc = self._encoder.only(fields)
+            if len(self._encoders) < 256:  # client-chosen combinations; don't grow without bound
+                self._encoders[fields] = enc
+        return enc
+
+
+def wants(fields: Optional[AbstractSet[str]], name: str) -> bool:
+    """Whether a sparse fieldset (None = everything) includes `name`."""
+    return fields is None or name in fields
@@ -0,0 +1,362 @@
+# app/core/storage.py
+"""
+Object storage for uploaded media (incident photos, announcement images).
+
+Everything is addressed by a key relative to the storage root, e.g.
+"incidents/<user_id>/<uuid>.jpg". Two drivers:
+
+- LocalStorage (STORAGE_BACKEND=local, the default): files under UPLOAD_DIR.
+  Clients get HMAC-signed, expiring /media/<key>?exp=..&sig=.. URLs
+  (signed_url), which app/core/media.py checks without touching the
+  database. Single node only.
+- S3Storage (STORAGE_BACKEND=s3): any S3-compatible store (AWS, MinIO -
+  see docker-compose.yml). Needs boto3. Clients upload straight to the
+  bucket with a presigned POST (POST /media/uploads) and download through
+  presigned GET URLs, so image bytes don't pass through the API workers and
+  every API node sees the same media.
+
+Older rows store a filesystem path ("uploads/incidents/x.jpg") or a
+"/uploads/..." URL rather than a key; key_for() maps all of them to a key.
+
+  python -m app.scripts.media check          # round-trip against the configured backend
+  python -m app.scripts.media import-local   # copy UPLOAD_DIR into it (local -> s3 switch)
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import BinaryIO, Dict, Iterator, Optional
+from urllib.parse import quote
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROUTE = "/media"  # where main.py mounts app.core.media.MediaApp
+
+# base URL of the request being served (set by media.RequestBaseMiddleware);
+# signed URLs start with it when MEDIA_PUBLIC_BASE_URL is unset, so the app
+# always gets absolute URLs it can hand straight to <Image>
+request_base: ContextVar[str] = ContextVar("media_request_base", default="")
+
+
+class StorageError(Exception):
+    pass
+
+
+def key_for(path_or_key: Optional[str]) -> Optional[str]:
+    """Storage key for a stored value: a key already, a path under UPLOAD_DIR, or a /uploads/... URL path."""
+    if not path_or_key:
+        return None
+    p = path_or_key.replace("\\", "/")
+    if "://" in p:
+        p = "/" + p.split("://", 1)[1].split("/", 1)[-1]
+    root = os.path.abspath(settings.UPLOAD_DIR).replace("\\", "/").rstrip("/") + "/"
+    if p.startswith(root):
+        return p[len(root):]
+    p = p.lstrip("./")
+    upload_dir = settings.UPLOAD_DIR.replace("\\", "/").strip("./") + "/"
+    for prefix in (upload_dir, "uploads/"):
+        if p.startswith(prefix):
+            return p[len(prefix):]
+    return p
+
+
+def new_key(prefix: str, owner: Optional[str], filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """A fresh, unguessable key like "incidents/<owner>/<uuid>.jpg"."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if not ext and content_type:
+        ext = mimetypes.guess_extension(content_type) or ""
+    parts = [prefix] + ([owner] if owner else []) + [f"{uuid.uuid4().hex}{ext}"]
+    return "/".join(parts)
+
+
+class Storage:
+    name = "base"
+    direct_uploads = False
+
+    def save(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None) -> int:
+        """Store the stream under `key`; returns the bytes written."""
+        raise NotImplementedError
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Whole object, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def keys(self, prefix: str = "") -> Iterator[str]:
+        raise NotImplementedError
+
+    def url(self, key: str, expires: Optional[int] = None) -> str:
+        """Where a client can GET the object."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path, for drivers that have one."""
+        return None
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires: int) -> Optional[Dict]:
+        """Direct-to-storage upload form, or None if the driver can't do it."""
+        return None
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"key escapes the upload root: {key!r}")
+        return path
+
+    def save(self, key, fileobj, content_type=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.part"
+        with open(tmp, "wb") as f:
+            shutil.copyfileobj(fileobj, f, 1024 * 1024)
+            n = f.tell()
+        os.replace(tmp, path)  # readers never see a half-written file
+        return n
+
+    def read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self, prefix=""):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    yield key
+
+    def url(self, key, expires=None):
+        return signed_url(key, expires)
+
+    def local_path(self, key):
+        path = self._path(key)
+        return path if os.path.isfile(path) else None
+
+
+class S3Storage(Storage):
+    name = "s3"
+    direct_uploads = True
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as e:  # optional dependency
+            raise StorageError("STORAGE_BACKEND=s3 needs boto3 (pip install boto3)") from e
+        self._ClientError = ClientError
+        cfg = Config(
+            signature_version="s3v4",
+            s3={"addressing_style": "path" if settings.S3_FORCE_PATH_STYLE else "auto"},
+            retries={"max_attempts": 3},
+        )
+        common = dict(
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY or None,
+            aws_secret_access_key=settings.S3_SECRET_KEY or None,
+            config=cfg,
+        )
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client("s3", endpoint_url=settings.S3_ENDPOINT_URL or None, **common)
+        # presigned URLs embed the host they were signed for: sign with the address phones can reach
+        public = settings.S3_PUBLIC_ENDPOINT_URL
+        if public and public != settings.S3_ENDPOINT_URL:
+            self.presigner = boto3.client("s3", endpoint_url=public, **common)
+        else:
+            self.presigner = self.client
+
+    def _missing(self, e) -> bool:
+        return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def save(self, key, fileobj, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        counter = _CountingReader(fileobj)
+        self.client.upload_fileobj(counter, self.bucket, key, ExtraArgs=extra)
+        return counter.n
+
+    def read(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except self._ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except self._ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+
+    def exists(self, key):
+        return self.size(key) is not None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def keys(self, prefix=""):
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+    def url(self, key, expires=None):
+        return self.presigner.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires or settings.MEDIA_URL_EXPIRE_SECONDS,
+        )
+
+    def presign_upload(self, key, content_type, max_bytes, expires):
+        post = self.presigner.generate_presigned_post(
+            self.bucket, key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires,
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"]}
+
+    def ensure_bucket(self) -> None:
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except self._ClientError:
+            self.client.create_bucket(Bucket=self.bucket)
+            logger.info("created bucket %s", self.bucket)
+
+
+class _CountingReader:
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.n = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.n += len(data)
+        return data
+
+
+_lock = threading.Lock()
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                if settings.STORAGE_BACKEND == "s3":
+                    _storage = S3Storage()
+                else:
+                    _storage = LocalStorage(settings.UPLOAD_DIR)
+                logger.info("media storage: %s", _storage.name)
+    return _storage
+
+
+# ---------------------------
+# Signed URLs
+# ---------------------------
+
+@functools.lru_cache(maxsize=1)
+def _signing_key() -> bytes:
+    secret = settings.MEDIA_SIGNING_KEY or settings.SECRET_KEY
+    return hmac.new(secret.encode("utf-8"), b"mobo-media-url", hashlib.sha256).digest()
+
+
+def signature(key: str, exp: int) -> str:
+    mac = hmac.new(_signing_key(), f"{key}\n{exp}".encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(mac[:18]).decode("ascii")  # 144 bits, no padding
+
+
+def signed_url(key: str, expires: Optional[int] = None, now: Optional[int] = None) -> str:
+    """
+    /media URL valid for at least `expires` seconds. The expiry is rounded up
+    to MEDIA_URL_BUCKET_SECONDS so repeated responses hand out the same URL
+    and clients' image caches keep hitting.
+    """
+    ttl = expires or settings.MEDIA_URL_EXPIRE_SECONDS
+    step = max(1, settings.MEDIA_URL_BUCKET_SECONDS)
+    now = int(time.time()) if now is None else now
+    exp = -(-(now + ttl) // step) * step
+    base = (settings.MEDIA_PUBLIC_BASE_URL or request_base.get()).rstrip("/")
+    return f"{base}{MEDIA_ROUTE}/{quote(key)}?exp={exp}&sig={signature(key, exp)}"
+
+
+def verify(key: str, exp: int, sig: str) -> bool:
+    """Signature check only; the caller compares `exp` with the clock."""
+    return hmac.compare_digest(signature(key, exp), sig)
+
+
+# ---------------------------
+# Helpers for the endpoints
+# ---------------------------
+
+def media_url(stored: Optional[str]) -> Optional[str]:
+    """Client URL for a stored key/path/"/uploads/..." value (signed, or presigned on S3)."""
+    key = key_for(stored)
+    return get_storage().url(key) if key else None
+
+
+def client_ref(stored: Optional[str]) -> Optional[str]:
+    """What responses carry for an image: its URL, or a data: URI for app builds that need MEDIA_INLINE_BASE64."""
+    return data_uri(stored) if settings.MEDIA_INLINE_BASE64 else media_url(stored)
+
+
+def data_uri(stored: Optional[str], default_mime: str = "image/jpeg") -> Optional[str]:
+    """base64 data: URI of a stored object, or None if it is missing."""
+    key = key_for(stored)
+    if not key:
+        return None
+    try:
+        raw = get_storage().read(key)
+    except Exception:
+        logger.warning("could not read media %s", key, exc_info=True)
+        return None
+    if raw is None:
+        return None
+    mime = mimetypes.guess_type(key)[0] or default_mime
+    return f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}"
@@ -0,0 +1,264 @@
+# app/core/tokens.py
+"""
+Access/refresh tokens and revocation.
+
+Access tokens are short-lived JWTs (ACCESS_TOKEN_EXPIRE_MINUTES) carrying
+the user's role and department, so authorization needs no DB round trip.
+Refresh tokens are opaque, stored hashed, and rotate on every use.
+
+Revocation (logout, "sign out everywhere", deactivated accounts) is written
+to `revoked_tokens` and mirrored in a per-process RevocationCache once the
+transaction commits (unit_of_work.after_commit), so a rolled-back revocation
+never reaches the cache. The deactivation and claim cases are automatic:
+install() hooks the session so a flush that sets a user's is_active to False
+revokes all their tokens, and one that changes role or department revokes
+their access tokens (the next refresh hands out the new claims). The cache
+pulls new rows at most every REVOCATION_SYNC_SECONDS, piggybacking on the
+request's session, so a revocation made by another worker takes effect
+within that window (and within one access-token lifetime at worst).
+"""
+import hashlib
+import logging
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.core.security import create_access_token
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _revocation_ttl() -> timedelta:
+    # an entry is useless once every access token it could match has expired
+    return timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES, seconds=60)
+
+
+# ---------------------------
+# Revocation cache
+# ---------------------------
+
+class RevocationCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis: Dict[str, datetime] = {}         # jti -> expires_at
+        self._users: Dict[str, Tuple[datetime, datetime]] = {}  # user_id -> (revoked_at, expires_at)
+        self._last_id = 0
+        self._next_sync = 0.0
+
+    def add(self, jti: Optional[str], user_id: Optional[str], revoked_at: datetime, expires_at: datetime) -> None:
+        with self._lock:
+            if jti:
+                self._jtis[jti] = expires_at
+            elif user_id:
+                prev = self._users.get(user_id)
+                if prev is None or prev[0] < revoked_at:
+                    self._users[user_id] = (revoked_at, expires_at)
+
+    def is_revoked(self, payload: dict) -> bool:
+        jti = payload.get("jti")
+        if jti and jti in self._jtis:
+            return True
+        entry = self._users.get(str(payload.get("sub")))
+        if entry is not None:
+            iat = payload.get("iat")
+            # tokens without iat predate this scheme: treat as issued long ago.
+            # iat has 1s resolution; a token from the revocation's own second
+            # is let through so an immediate re-login works.
+            issued = datetime.utcfromtimestamp(iat) if iat is not None else datetime.min
+            return issued < entry[0].replace(microsecond=0)
+        return False
+
+    def maybe_sync(self, db: Session) -> None:
+        """Pull rows added since the last sync; cheap no-op between syncs."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + settings.REVOCATION_SYNC_SECONDS
+            last_id = self._last_id
+        try:
+            rows = (
+                db.query(models.RevokedToken)
+                .filter(models.RevokedToken.id > last_id,
+                        models.RevokedToken.expires_at > datetime.utcnow())
+                .order_by(models.RevokedToken.id)
+                .all()
+            )
+        except Exception:
+            logger.exception("revocation sync failed")
+            return
+        for r in rows:
+            self.add(r.jti, r.user_id, r.revoked_at, r.expires_at)
+        with self._lock:
+            if rows:
+                self._last_id = max(self._last_id, rows[-1].id)
+            self._prune(datetime.utcnow())
+
+    def _prune(self, now: datetime) -> None:
+        for k in [k for k, exp in self._jtis.items() if exp <= now]:
+            del self._jtis[k]
+        for k in [k for k, (_, exp) in self._users.items() if exp <= now]:
+            del self._users[k]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._jtis.clear()
+            self._users.clear()
+            self._last_id = 0
+            self._next_sync = 0.0
+
+
+revocations = RevocationCache()
+
+
+def _after_commit(db: Session, fn, *args) -> None:
+    # imported here: app.db.session imports this module to install the flush hook
+    from app.db.unit_of_work import after_commit
+    after_commit(db, fn, *args)
+
+
+def revoke_access_token(db: Session, payload: dict) -> None:
+    jti = payload.get("jti")
+    if not jti:
+        return
+    now = datetime.utcnow()
+    exp = datetime.utcfromtimestamp(payload["exp"]) if payload.get("exp") else now + _revocation_ttl()
+    db.add(models.RevokedToken(jti=jti, user_id=str(payload.get("sub")), revoked_at=now, expires_at=exp))
+    _after_commit(db, revocations.add, jti, None, now, exp)
+
+
+def revoke_user_tokens(db: Session, user_id: str, refresh: bool = True) -> None:
+    """Invalidate every access token (and, with refresh, refresh token) issued to user_id so far."""
+    now = datetime.utcnow()
+    db.add(models.RevokedToken(jti=None, user_id=user_id, revoked_at=now, expires_at=now + _revocation_ttl()))
+    if refresh:
+        db.query(models.RefreshToken).filter(
+            models.RefreshToken.user_id == user_id,
+            models.RefreshToken.revoked_at.is_(None),
+        ).update({models.RefreshToken.revoked_at: now}, synchronize_session=False)
+    _after_commit(db, revocations.add, None, user_id, now, now + _revocation_ttl())
+
+
+_CLAIM_ATTRS = ("role_id", "role", "department_id", "department")
+
+
+def _on_flush(session: Session, flush_context, instances) -> None:
+    for obj in list(session.dirty):
+        if not isinstance(obj, models.User) or obj.id is None:
+            continue
+        attrs = inspect(obj).attrs
+        if False in attrs.is_active.history.added:
+            logger.info("user %s deactivated: revoking their tokens", obj.id)
+            revoke_user_tokens(session, obj.id)
+        elif any(attrs[name].history.has_changes() for name in _CLAIM_ATTRS):
+            logger.info("user %s role/department changed: revoking their access tokens", obj.id)
+            revoke_user_tokens(session, obj.id, refresh=False)
+
+
+def install(session_factory) -> None:
+    """Revoke tokens whose claims a flush makes stale (see the module docstring)."""
+    if not event.contains(session_factory, "before_flush", _on_flush):
+        event.listen(session_factory, "before_flush", _on_flush)
+
+
+def purge_expired(db: Session) -> int:
+    now = datetime.utcnow()
+    n = db.query(models.RevokedToken).filter(models.RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    n += db.query(models.RefreshToken).filter(models.RefreshToken.expires_at <= now).delete(synchronize_session=False)
+    db.commit()
+    return n
+
+
+# ---------------------------
+# Issuing / rotating
+# ---------------------------
+
+def access_claims(user: models.User) -> dict:
+    role = getattr(getattr(user, "role", None), "name", None)
+    return {"role": (role or "user").lower(), "dept": user.department_id}
+
+
+def _new_refresh(db: Session, user_id: str, family_id: str) -> Tuple[models.RefreshToken, str]:
+    raw = secrets.token_urlsafe(48)
+    rt = models.RefreshToken(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=_hash(raw),
+        issued_at=datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(rt)
+    return rt, raw
+
+
+def _token_response(user: models.User, refresh_raw: str) -> dict:
+    return {
+        "access_token": create_access_token(str(user.id), claims=access_claims(user)),
+        "token_type": "bearer",
+        "refresh_token": refresh_raw,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def issue_tokens(db: Session, user: models.User) -> dict:
+    """Fresh login: new access token + the first refresh token of a new family."""
+    _, raw = _new_refresh(db, user.id, str(uuid.uuid4()))
+    db.commit()
+    return _token_response(user, raw)
+
+
+class RefreshError(Exception):
+    pass
+
+
+def rotate_refresh_token(db: Session, raw: str) -> dict:
+    rt = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == _hash(raw)).first()
+    now = datetime.utcnow()
+    if rt is None:
+        raise RefreshError("Invalid refresh token")
+    if rt.revoked_at is not None:
+        # a rotated token came back: assume it leaked and kill the family
+        logger.warning("refresh token reuse for user %s (family %s)", rt.user_id, rt.family_id)
+        revoke_family(db, rt.family_id)
+        db.commit()
+        raise RefreshError("Refresh token already used")
+    if rt.expires_at <= now:
+        raise RefreshError("Refresh token expired")
+
+    user = db.query(models.User).filter(models.User.id == rt.user_id).first()
+    if user is None or user.is_active is False:
+        raise RefreshError("User not found or inactive")
+
+    new_rt, new_raw = _new_refresh(db, user.id, rt.family_id)
+    rt.revoked_at = now
+    rt.replaced_by = new_rt.id
+    db.commit()
+    return _token_response(user, new_raw)
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.family_id == family_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({models.RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def revoke_refresh_token(db: Session, raw: str) -> None:
+    rt = db.query(models.RefreshToken).filter(models.RefreshToken.token_hash == _hash(raw)).first()
+    if rt is not None:
+        revoke_family(db, rt.family_id)
@@ -2,18 +2,26 @@
 from collections import defaultdict
 from http.client import HTTPException
 from operator import or_
-import os
-from pathlib import Path
+import logging
 from sqlite3 import IntegrityError
 import uuid
 from sqlalchemy.orm import Session, joinedload
 from app import models, schemas
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from app.core.config import settings
 from app.core.security import hash_password
-import base64
+from app.core.login import normalize_email
+from app.core import metrics
+from app.core.queue_analytics import queue_analytics, queue_date
+from app.core import rollups, storage
+from app.core.serialization import wants
+from app.db import loading, writes
+from app.db.unit_of_work import after_commit, finish
 from sqlalchemy import func, or_    
 
+logger = logging.getLogger(__name__)
+
 
 def list_services(db: Session, department_id: int | None = None):
     q = db.query(models.AppointmentService).filter(models.AppointmentService.is_active == True)
@@ -53,8 +61,8 @@ def create_appointment(db: Session, user_id: str, service: models.AppointmentSer
         notes=notes,
     )
     db.add(a)
+    rollups.record_appointment(db, a, "booked")
     db.commit()
-    db.refresh(a)
     return a
 
 def get_appointment(db: Session, appt_id: str):
@@ -65,8 +73,8 @@ def cancel_appointment(db: Session, appt: models.Appointment):
         return False
     appt.status = "cancelled"
     appt.updated_at = datetime.utcnow()
+    rollups.record_appointment(db, appt, "cancelled")
     db.commit()
-    db.refresh(appt)
     return True
 
 def assign_queue_number(db: Session, appt: models.Appointment):
@@ -97,10 +105,11 @@ def assign_queue_number(db: Session, appt: models.Appointment):
     appt.queue_date = qdate
     appt.status = "checked_in"
     appt.updated_at = datetime.utcnow()
+    rollups.record_appointment(db, appt, "checked_in")
+    rollups.record_ticket(db, ticket, "issued")
 
-    db.commit()
-    db.refresh(appt)
-    db.refresh(ticket)
+    finish(db)
+    after_commit(db, queue_analytics.on_issued, ticket)
     return ticket
 
 def list_services(db: Session, department_id: int | None = None):
@@ -141,8 +150,8 @@ def create_appointment(db: Session, user_id: str, service: models.AppointmentSer
         notes=notes,
     )
     db.add(a)
+    rollups.record_appointment(db, a, "booked")
     db.commit()
-    db.refresh(a)
     return a
 
 def get_appointment(db: Session, appt_id: str):
@@ -153,8 +162,8 @@ def cancel_appointment(db: Session, appt: models.Appointment):
         return False
     appt.status = "cancelled"
     appt.updated_at = datetime.utcnow()
+    rollups.record_appointment(db, appt, "cancelled")
     db.commit()
-    db.refresh(appt)
     return True
 
 def assign_queue_number(db: Session, appt: models.Appointment):
@@ -185,10 +194,11 @@ def assign_queue_number(db: Session, appt: models.Appointment):
     appt.queue_date = qdate
     appt.status = "checked_in"
     appt.updated_at = datetime.utcnow()
+    rollups.record_appointment(db, appt, "checked_in")
+    rollups.record_ticket(db, ticket, "issued")
 
-    db.commit()
-    db.refresh(appt)
-    db.refresh(ticket)
+    finish(db)
+    after_commit(db, queue_analytics.on_issued, ticket)
     return ticket
 
 def queue_now(db: Session, department_id: int):
@@ -251,32 +261,39 @@ def call_next_ticket(db: Session, department_id: int, window_id: int):
             appt.window_id = window_id
             appt.updated_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(next_ticket)
+    rollups.record_ticket(db, next_ticket, "called")
+    finish(db)
+    after_commit(db, queue_analytics.on_called, next_ticket)
     return next_ticket
 
 def close_ticket(db: Session, ticket_id: str, outcome: str):
     t = db.query(models.QueueTicket).get(ticket_id)
     if not t:
         return None
+    if t.status == outcome:
+        return t
     if outcome == "done":
         t.status = "done"
         t.served_at = datetime.utcnow()
+        rollups.record_ticket(db, t, "served")
         if t.appointment_id:
             appt = db.query(models.Appointment).get(t.appointment_id)
             if appt:
                 appt.status = "done"
                 appt.updated_at = datetime.utcnow()
+                rollups.record_appointment(db, appt, "done")
     elif outcome == "no_show":
         t.status = "no_show"
+        rollups.record_ticket(db, t, "no_show")
         if t.appointment_id:
             appt = db.query(models.Appointment).get(t.appointment_id)
             if appt:
                 appt.status = "no_show"
                 appt.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(t)
-    return t 
+                rollups.record_appointment(db, appt, "no_show")
+    finish(db)
+    after_commit(db, queue_analytics.on_closed, t)
+    return t
 
 # Users
 def create_user(
@@ -285,27 +302,23 @@ def create_user(
     hashed = hash_password(password)
     user = models.User(
         name=name,
-        email=email,
+        email=normalize_email(email),
         password=hashed,
         phone=phone,
         role_id=role_id,
     )
     db.add(user)
     db.commit()
-    db.refresh(user)
+    return user
+
 
-    # Return the user fetched with the role relationship eagerly loaded
-    user_with_role = (
+def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
+    # case-insensitive; served by ix_users_email_lower
+    return (
         db.query(models.User)
-        .options(joinedload(models.User.role))
-        .filter(models.User.id == user.id)
+        .filter(func.lower(models.User.email) == normalize_email(email))
         .first()
     )
-    return user_with_role
-
-
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.email == email).first()
 
 
 def get_user(db: Session, user_id: str) -> Optional[models.User]:
@@ -313,7 +326,7 @@ def get_user(db: Session, user_id: str) -> Optional[models.User]:
 
 
 def list_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    return db.query(models.User).offset(skip).limit(limit).all()
+    return db.query(models.User).options(*loading.USER_WITH_ROLE).offset(skip).limit(limit).all()
 
 
 # Incidents
@@ -333,18 +346,9 @@ def incident_to_out(db: Session, inc: models.Incident) -> Dict:
     # photos
     photo_b64_list = []
     for p in getattr(inc, "photos", []) or []:
-        try:
-            storage_path = getattr(p, "storage_path", None) or getattr(p, "file_path", None) or getattr(p, "url", None)
-            if storage_path:
-                fp = Path(storage_path)
-                if not fp.exists():
-                    candidate = Path(os.getcwd()) / "uploads" / fp.name
-                    if candidate.exists(): fp = candidate
-                if fp.exists():
-                    with open(fp, "rb") as f:
-                        encoded = base64.b64encode(f.read()).decode("utf-8")
-                        photo_b64_list.append(f"data:image/jpeg;base64,{encoded}")
-        except Exception: pass
+        uri = storage.client_ref(getattr(p, "storage_path", None) or getattr(p, "url", None))
+        if uri:
+            photo_b64_list.append(uri)
 
     # reporter (optional)
     reporter_name = getattr(inc, "reporter_name", None)
@@ -359,7 +363,7 @@ def incident_to_out(db: Session, inc: models.Incident) -> Dict:
         "description": inc.description,
         "address": inc.address,
         "purok": inc.purok,
-        "barangay": inc.barangay,
+        "barangay": inc.barangay_name,
         "street": inc.street,
         "landmark": inc.landmark,
         "department": inc.department,
@@ -381,7 +385,6 @@ def create_incident(db: Session, reporter_id: str, inc_in: schemas.IncidentCreat
     department_val = (
         str(inc_in.department_id) if inc_in.department_id is not None else None
     )
-    print(inc_in)
     inc = models.Incident(
         reporter_id=reporter_id,
         title=inc_in.title,
@@ -389,20 +392,21 @@ def create_incident(db: Session, reporter_id: str, inc_in: schemas.IncidentCreat
         incident_type=incident_type_val,
         department=department_val,
         purok=inc_in.purok,
-        barangay=inc_in.barangay,
+        barangay_id=inc_in.barangay,
         street=inc_in.street,
         landmark=inc_in.landmark,
         address=inc_in.address,
     )
     db.add(inc)
-    db.commit()
-    db.refresh(inc)
+    rollups.record_incident_created(db, inc)
+    finish(db)
     return inc
 
 
-def list_incidents_for_user(db: Session, user_id: str, skip: int = 0, limit: int = 100):
+def list_incidents_for_user(db: Session, user_id: str, skip: int = 0, limit: int = 100, options: Sequence = ()):
     return (
         db.query(models.Incident)
+        .options(*options)
         .filter(models.Incident.reporter_id == user_id)
         .order_by(models.Incident.created_at.desc())
         .offset(skip)
@@ -423,8 +427,7 @@ def create_announcement(db: Session, author_id: str, title: str, body: str, imag
         updated_at=datetime.utcnow(),
     )
     db.add(a)
-    db.commit()
-    db.refresh(a)
+    finish(db)
     return a
 
 def update_announcement(db: Session, announcement_id: str, **fields):
@@ -435,8 +438,7 @@ def update_announcement(db: Session, announcement_id: str, **fields):
         if v is not None:
             setattr(a, k, v)
     a.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(a)
+    finish(db)
     return a
 
 def delete_announcement(db: Session, announcement_id: str) -> bool:
@@ -450,9 +452,10 @@ def delete_announcement(db: Session, announcement_id: str) -> bool:
 def get_announcement_by_id(db: Session, announcement_id: str):
     return db.query(models.Announcement).filter(models.Announcement.id == announcement_id).first()
 
-def latest_announcements(db: Session, limit: int = 5):
+def latest_announcements(db: Session, limit: int = 5, options: Sequence = ()):
     return (
         db.query(models.Announcement)
+        .options(*options)
         .order_by(models.Announcement.created_at.desc())
         .limit(limit)
         .all()
@@ -470,7 +473,6 @@ def create_announcement_comment(db: Session, announcement_id: str, author_id: Op
     )
     db.add(c)
     db.commit()
-    db.refresh(c)
     return c
 
 
@@ -511,7 +513,6 @@ def update_incident_status(
     inc = get_incident(db, incident_id)
     if not inc:
         return None
-    print(f"current messages: {[c.comment for c in getattr(inc, 'comments', [])]}")
     # Add comment
     if comment_text:
         comment = models.IncidentComment(
@@ -525,6 +526,7 @@ def update_incident_status(
 
     # Update status & optionally update department
     try:
+        old_status = inc.status
         inc.status = new_status
         # If department_id is provided (explicitly None allowed), set it;
         # if department_id is None and you want to *clear* the department, this will set it to None.
@@ -532,24 +534,19 @@ def update_incident_status(
         if department_id is not None:
             inc.department = department_id
         inc.updated_at = datetime.utcnow()
+        rollups.record_incident_status(db, inc, old_status)
 
-        db.commit()
-        db.refresh(inc)
+        finish(db)
     except Exception:
         db.rollback()
         raise
 
-    # Convert photos to list of strings (urls or base64)
+    # Convert photos to list of strings (signed urls, or base64 for old app builds)
     photos_list = []
     for p in inc.photos or []:
-        if getattr(p, "url", None):
-            photos_list.append(str(p.url))
-        else:
-            storage_path = getattr(p, "storage_path", None) or getattr(p, "file_path", None)
-            if storage_path and Path(storage_path).exists():
-                with open(storage_path, "rb") as f:
-                    encoded = base64.b64encode(f.read()).decode("utf-8")
-                    photos_list.append(f"data:image/jpeg;base64,{encoded}")
+        uri = storage.client_ref(getattr(p, "storage_path", None) or getattr(p, "url", None))
+        if uri:
+            photos_list.append(uri)
 
     # --- NEW: fetch reporter user by reporter_id ---
     reporter_name = None
@@ -589,7 +586,7 @@ def update_incident_status(
         "description": inc.description,
         "address": inc.address,
         "purok": inc.purok,
-        "barangay": inc.barangay,
+        "barangay": inc.barangay_name,
         "street": inc.street,
         "landmark": inc.landmark,
         "department": inc.department,
@@ -614,8 +611,7 @@ def add_incident_photo(
         created_at=datetime.utcnow(),
     )
     db.add(p)
-    db.commit()
-    db.refresh(p)
+    finish(db)
     return p
 
 
@@ -633,8 +629,7 @@ def create_announcement(db: Session, author_id: str, title: str, body: str, imag
         updated_at=datetime.utcnow(),
     )
     db.add(a)
-    db.commit()
-    db.refresh(a)
+    finish(db)
     return a
 
 
@@ -646,8 +641,7 @@ def update_announcement(db: Session, announcement_id: str, **fields):
         if v is not None:
             setattr(a, k, v)
     a.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(a)
+    finish(db)
     return a
 
 
@@ -664,9 +658,10 @@ def get_announcement_by_id(db: Session, announcement_id: str):
     return db.query(models.Announcement).filter(models.Announcement.id == announcement_id).first()
 
 
-def latest_announcements(db: Session, limit: int = 5):
+def latest_announcements(db: Session, limit: int = 5, options: Sequence = ()):
     return (
         db.query(models.Announcement)
+        .options(*options)
         .order_by(models.Announcement.created_at.desc())
         .limit(limit)
         .all()
@@ -685,7 +680,6 @@ def create_announcement_comment(db: Session, announcement_id: str, author_id: Op
     )
     db.add(c)
     db.commit()
-    db.refresh(c)
     return c
 
 
@@ -723,68 +717,100 @@ def build_comment_tree(flat: List[models.AnnouncementComment]) -> List[schemas.A
 
 # Notifications
 def create_notification(
-    db: Session, user_id: str, incident_id: Optional[str], message: str
+    db: Session,
+    user_id: str,
+    incident_id: Optional[str] = None,
+    message: str = "",
+    announcement_id: Optional[str] = None,
+    ntype: Optional[str] = None,
 ):
+    if ntype is None:
+        ntype = "incident" if incident_id else "announcement" if announcement_id else "system"
     n = models.Notification(
         id=str(__import__("uuid").uuid4()),
         user_id=user_id,
+        type=ntype,
         incident_id=incident_id,
+        announcement_id=announcement_id,
         message=message,
         read=False,
         created_at=datetime.utcnow(),
     )
     db.add(n)
-    db.commit()
-    db.refresh(n)
+    finish(db)
+    after_commit(db, metrics.NOTIFICATIONS_CREATED.labels(ntype).inc)
     return n
 
 
+def notification_window_start() -> Optional[datetime]:
+    """
+    Oldest created_at the notification list and unread count look at (None =
+    no limit). Only applied on partitioned tables, where the bound is what lets
+    Postgres prune old months; elsewhere it would just hide old notifications.
+    """
+    if not settings.PG_PARTITIONING or settings.NOTIFICATION_LIST_DAYS <= 0:
+        return None
+    return datetime.utcnow() - timedelta(days=settings.NOTIFICATION_LIST_DAYS)
+
+
+def count_unread_notifications(db: Session, user_id: str) -> int:
+    q = db.query(models.Notification).filter(
+        models.Notification.user_id == user_id,
+        models.Notification.read == False,
+    )
+    since = notification_window_start()
+    if since is not None:
+        q = q.filter(models.Notification.created_at >= since)
+    return q.count()
+
+
 def list_notifications_for_user(
-    db: Session, user_id: str, skip: int = 0, limit: int = 100
+    db: Session, user_id: str, skip: int = 0, limit: int = 100,
+    since: Optional[datetime] = None, before: Optional[datetime] = None,
+    options: Sequence = (),
 ):
-    return (
-        db.query(models.Notification)
-        .filter(models.Notification.user_id == user_id)
-        .order_by(models.Notification.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # a created_at range on every query lets Postgres skip whole monthly
+    # partitions (app/db/partitions.py); `before` is the keyset cursor for paging
+    N = models.Notification
+    since = since or notification_window_start()
+    q = db.query(N).options(*options).filter(N.user_id == user_id)
+    if since is not None:
+        q = q.filter(N.created_at >= since)
+    if before is not None:
+        q = q.filter(N.created_at < before)
+    return q.order_by(N.created_at.desc()).offset(skip).limit(limit).all()
 
 
 def mark_notification_read(db: Session, notification_id: str):
-    n = (
-        db.query(models.Notification)
-        .filter(models.Notification.id == notification_id)
-        .first()
-    )
+    n = writes.update_returning(db, models.Notification, [models.Notification.id == notification_id], {"read": True})
     if not n:
         return None
-    n.read = True
     db.commit()
-    db.refresh(n)
     return n
 
 
 def image_to_base64(file_path: str) -> str:
-    """Convert image file to base64 string"""
-    try:
-        with open(file_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode("utf-8")
-            return f"data:image/jpeg;base64,{encoded}"  # include mime type
-    except Exception as e:
-        print("Error encoding image:", e)
-        return ""
+    """Convert a stored image (key or legacy path) to a base64 data URI"""
+    return storage.data_uri(file_path) or ""
 
 def list_incidents_all(
     db: Session,
     skip: int = 0,
     limit: int = 100,
     department_id: Optional[int] = None,   # <--- NEW
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    fields: Optional[AbstractSet[str]] = None,  # sparse fieldset; None = every IncidentOut field
+    options: Sequence = (),
 ) -> List[Dict]:
-    q = db.query(models.Incident)
+    q = db.query(models.Incident).options(*options)
     if department_id is not None:
         q = q.filter(models.Incident.department == department_id)
+    # created_at bounds prune monthly partitions on Postgres
+    if since is not None:
+        q = q.filter(models.Incident.created_at >= since)
+    if before is not None:
+        q = q.filter(models.Incident.created_at < before)
 
     incidents = (
         q.order_by(models.Incident.created_at.desc())
@@ -793,85 +819,67 @@ def list_incidents_all(
          .all()
     )
 
-    # (rest of your function unchanged) ...
-    reporter_ids = {inc.reporter_id for inc in incidents if getattr(inc, "reporter_id", None)}
+    # lookups only for the fields that were asked for
     users_by_id = {}
-    if reporter_ids:
-        users = db.query(models.User).filter(models.User.id.in_(list(reporter_ids))).all()
-        users_by_id = {u.id: u for u in users}
-
-    result = []
-    for inc in incidents:
-        type_name = None
-        if getattr(inc, "incident_type", None):
-            cat = db.query(models.IncidentCategory).filter_by(id=inc.incident_type).first()
-            type_name = cat.name if cat else None
-
-        department_name = None
-        if getattr(inc, "department", None):
-            dept = db.query(models.Department).filter_by(id=inc.department).first()
-            department_name = dept.name if dept else None
+    if wants(fields, "reporterName") or wants(fields, "reporterPhone"):
+        reporter_ids = {inc.reporter_id for inc in incidents if getattr(inc, "reporter_id", None)}
+        if reporter_ids:
+            users = db.query(models.User).filter(models.User.id.in_(list(reporter_ids))).all()
+            users_by_id = {u.id: u for u in users}
+
+    type_names, department_names = {}, {}
+    if wants(fields, "type_name"):
+        ids = {inc.incident_type for inc in incidents if inc.incident_type}
+        if ids:
+            type_names = dict(
+                db.query(models.IncidentCategory.id, models.IncidentCategory.name)
+                .filter(models.IncidentCategory.id.in_(ids))
+            )
+    if wants(fields, "department_name"):
+        ids = {inc.department for inc in incidents if inc.department}
+        if ids:
+            department_names = dict(
+                db.query(models.Department.id, models.Department.name).filter(models.Department.id.in_(ids))
+            )
 
+    def photos(inc):
         photo_b64_list = []
         for p in getattr(inc, "photos", []) or []:
-            try:
-                storage_path = (
-                    getattr(p, "storage_path", None)
-                    or getattr(p, "file_path", None)
-                    or getattr(p, "url", None)
-                )
-                if storage_path:
-                    fp = Path(storage_path)
-                    if not fp.exists():
-                        candidate = Path(os.getcwd()) / "uploads" / fp.name
-                        if candidate.exists():
-                            fp = candidate
-                    if fp.exists():
-                        with open(fp, "rb") as f:
-                            encoded = base64.b64encode(f.read()).decode("utf-8")
-                            photo_b64_list.append(f"data:image/jpeg;base64,{encoded}")
-                # else: silently skip
-            except Exception as e:
-                print(f"[list_incidents_all] Failed to process photo for incident {inc.id}: {e}")
-
-        reporter_name = None
-        reporter_phone = None
-        if getattr(inc, "reporter_id", None):
-            user = users_by_id.get(inc.reporter_id)
-            if user:
-                reporter_name = user.name
-                reporter_phone = user.phone
-
-        if not reporter_name:
-            reporter_name = getattr(inc, "reporter_name", None)
-        if not reporter_phone:
-            reporter_phone = getattr(inc, "reporter_phone", None)
-
-        result.append(
-            {
-                "id": inc.id,
-                "reporter_id": inc.reporter_id,
-                "title": inc.title,
-                "type": inc.incident_type,
-                "type_name": type_name,
-                "description": inc.description,
-                "address": inc.address,
-                "purok": inc.purok,
-                "barangay": inc.barangay,
-                "street": inc.street,
-                "landmark": inc.landmark,
-                "department": inc.department,
-                "department_name": department_name,
-                "status": (inc.status.capitalize() if inc.status else "Submitted"),
-                "created_at": inc.created_at,
-                "photos": photo_b64_list,
-                "reporterName": reporter_name,
-                "reporterPhone": reporter_phone,
-                "reportedAt": inc.created_at,
-            }
-        )
+            uri = storage.client_ref(getattr(p, "storage_path", None) or getattr(p, "url", None))
+            if uri:
+                photo_b64_list.append(uri)
+        return photo_b64_list
+
+    def reporter(inc, attr):
+        user = users_by_id.get(inc.reporter_id) if getattr(inc, "reporter_id", None) else None
+        return getattr(user, attr, None) or getattr(inc, f"reporter_{attr}", None)
+
+    getters = {
+        "id": lambda inc: inc.id,
+        "reporter_id": lambda inc: inc.reporter_id,
+        "title": lambda inc: inc.title,
+        "type": lambda inc: inc.incident_type,
+        "type_name": lambda inc: type_names.get(inc.incident_type),
+        "description": lambda inc: inc.description,
+        "address": lambda inc: inc.address,
+        "purok": lambda inc: inc.purok,
+        "barangay": lambda inc: inc.barangay_name,
+        "street": lambda inc: inc.street,
+        "landmark": lambda inc: inc.landmark,
+        "department": lambda inc: inc.department,
+        "department_name": lambda inc: department_names.get(inc.department),
+        "status": lambda inc: (inc.status.capitalize() if inc.status else "Submitted"),
+        "created_at": lambda inc: inc.created_at,
+        "photos": photos,
+        "reporterName": lambda inc: reporter(inc, "name"),
+        "reporterPhone": lambda inc: reporter(inc, "phone"),
+        "reportedAt": lambda inc: inc.created_at,
+    }
+    if fields is not None:
+        # unrequested columns weren't loaded; touching them would load them row by row
+        getters = {k: g for k, g in getters.items() if k in fields}
 
-    return result
+    return [{k: g(inc) for k, g in getters.items()} for inc in incidents]
 
 def get_incident_category(db: Session, category_id: int) -> Optional[models.IncidentCategory]:
     return db.query(models.IncidentCategory).filter(models.IncidentCategory.id == category_id).first()
@@ -883,7 +891,6 @@ def create_incident_category(db: Session, name: str, department_id: Optional[int
     cat = models.IncidentCategory(name=name, department_id=department_id, urgency_level=urgency_level)
     db.add(cat)
     db.commit()
-    db.refresh(cat)
     return cat
 
 def update_incident_category(db: Session, category_id: int, name: Optional[str] = None, department_id: Optional[int] = None, urgency_level: Optional[int] = None) -> Optional[models.IncidentCategory]:
@@ -898,7 +905,6 @@ def update_incident_category(db: Session, category_id: int, name: Optional[str]
     if urgency_level is not None:
         cat.urgency_level = urgency_level
     db.commit()
-    db.refresh(cat)
     return cat
 
 def delete_incident_category(db: Session, category_id: int) -> bool:
@@ -926,7 +932,7 @@ def create_staff_for_department(
     if not dept:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
 
-    existing = db.query(models.User).filter(models.User.email == payload.email).first()
+    existing = get_user_by_email(db, payload.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already in use")
 
@@ -934,7 +940,7 @@ def create_staff_for_department(
 
     user = models.User(
         name=payload.name,
-        email=payload.email,
+        email=normalize_email(payload.email),
         phone=payload.phone,
         password=hash_password(payload.password),  # store HASH
         role_id=role_user.id,
@@ -947,7 +953,6 @@ def create_staff_for_department(
     except IntegrityError:
         db.rollback()
         raise
-    db.refresh(user)
     return user
 
 def list_staff(
@@ -991,5 +996,59 @@ def list_staff(
     subq = base.with_entities(models.User.id).distinct().subquery()
     total = db.query(func.count()).select_from(subq).scalar() or 0
 
-    rows = ordered.limit(limit).offset(offset).all()
-    return rows, total
\ No newline at end of file
+    rows = ordered.options(*loading.STAFF_ROLE).limit(limit).offset(offset).all()
+    return rows, total
+
+
+# --- Alerts (shared by the alerts endpoints and /home) ---
+
+def barangay_ids_by_name(db: Session, names: List[str]) -> Dict[str, int]:
+    """Alerts store the barangay as free text: lower-cased name -> barangay id, for the names that match."""
+    if not names:
+        return {}
+    lower_names = [n.lower() for n in names if n]
+    rows = db.query(models.Barangay).filter(func.lower(models.Barangay.name).in_(lower_names)).all()
+    return {r.name.lower(): r.id for r in rows}
+
+
+# --- Appointments / queue (shared by the appointments endpoints and /home) ---
+
+def current_appointment(db: Session, user_id: str) -> Optional[models.Appointment]:
+    """The user's next appointment that is still on (booked, checked in or being served)."""
+    return (
+        db.query(models.Appointment)
+        .filter(
+            models.Appointment.user_id == user_id,
+            models.Appointment.status.in_(["booked", "checked_in", "serving"]),
+            models.Appointment.slot_end >= datetime.utcnow(),
+        )
+        .order_by(models.Appointment.slot_start.asc())
+        .first()
+    )
+
+
+def queue_status(db: Session, department_id: int) -> dict:
+    """Today's queue for a department: number being served, tickets waiting, average wait."""
+    qdate = queue_date()
+    T = models.QueueTicket
+    now_serving = (
+        db.query(T.number)
+        .filter(T.department_id == department_id, T.date == qdate, T.status == "serving")
+        .order_by(T.called_at.desc())
+        .limit(1)
+        .scalar()
+    )
+    waiting = (
+        db.query(func.count(T.id))
+        .filter(T.department_id == department_id, T.date == qdate, T.status == "waiting")
+        .scalar()
+        or 0
+    )
+    queue_analytics.maybe_sync(db, department_id)
+    return {
+        "department_id": department_id,
+        "date": qdate,
+        "now_serving": now_serving,
+        "waiting": waiting,
+        "average_wait_min": queue_analytics.average_wait_min(department_id),
+    }
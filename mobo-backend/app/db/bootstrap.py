@@ -0,0 +1,155 @@
+# app/db/bootstrap.py
+"""
+Schema check and default data for app startup.
+
+STARTUP_MODE=fast (default): if `alembic_version` already matches the
+migration head, the schema is trusted and no table introspection or
+create_all runs. Otherwise (fresh dev DB, pending migrations) it falls back
+to full.
+STARTUP_MODE=full: create_all on every boot (the old behaviour).
+
+Seeding (roles + default admin) is one transaction of idempotent
+INSERT .. ON CONFLICT DO NOTHING statements. On Postgres it holds a
+transaction-level advisory lock, so workers booting together don't race.
+The admin password is only hashed when the admin row is actually missing.
+"""
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROLES = ("admin", "user", "staff")
+SEED_LOCK_KEY = 0x6D6F626F  # "mobo"
+
+_VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "alembic", "versions")
+_REV_RE = re.compile(r"^revision(?::\s*str)?\s*=\s*['\"]([0-9a-f]+)['\"]", re.M)
+_DOWN_RE = re.compile(r"^down_revision(?:[^=]*)=\s*(.+)$", re.M)
+
+
+@lru_cache(maxsize=1)
+def alembic_head() -> Optional[str]:
+    """
+    Head revision read straight from alembic/versions (no alembic import).
+    None if the directory is missing or the history has several heads.
+    """
+    try:
+        files = [f for f in os.listdir(_VERSIONS_DIR) if f.endswith(".py")]
+    except OSError:
+        return None
+    revisions, parents = set(), set()
+    for name in files:
+        with open(os.path.join(_VERSIONS_DIR, name), encoding="utf-8") as f:
+            src = f.read()
+        rev = _REV_RE.search(src)
+        if not rev:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_RE.search(src)
+        if down:
+            parents.update(re.findall(r"['\"]([0-9a-f]+)['\"]", down.group(1)))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def db_revision(conn: Connection) -> Optional[str]:
+    try:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        return None
+
+
+def ensure_schema(engine: Engine, mode: str) -> str:
+    """Returns what was done: "skipped" (at head) or "create_all"."""
+    if mode == "fast":
+        head = alembic_head()
+        with engine.connect() as conn:
+            current = db_revision(conn)
+        if head is not None and current == head:
+            return "skipped"
+        logger.info("schema not at alembic head (db=%s, head=%s); running create_all", current, head)
+
+    from app import models  # noqa: F401  (registers every table on the metadata)
+    from app.db import base
+
+    from app.core import search
+
+    base.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        search.install(conn)  # FTS columns/tables aren't on the models
+    return "create_all"
+
+
+def _insert_ignore(conn: Connection, table, rows, conflict_cols) -> None:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        conn.execute(insert(table).on_conflict_do_nothing(index_elements=conflict_cols), rows)
+        return
+    # other backends: check, then insert what's missing
+    for row in rows:
+        cond = [table.c[c] == row[c] for c in conflict_cols]
+        if conn.execute(select(table.c[conflict_cols[0]]).where(*cond)).first() is None:
+            conn.execute(table.insert(), row)
+
+
+def seed_defaults(engine: Engine) -> Dict[str, bool]:
+    from app import models
+
+    roles = models.Role.__table__
+    users = models.User.__table__
+    created_admin = False
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": SEED_LOCK_KEY})
+
+        _insert_ignore(conn, roles, [{"name": r} for r in DEFAULT_ROLES], ["name"])
+
+        email = settings.DEFAULT_ADMIN_EMAIL.strip().lower()
+        if settings.DEFAULT_ADMIN_PASSWORD and conn.execute(
+            select(users.c.id).where(users.c.email == email)
+        ).first() is None:
+            from app.core.security import hash_password  # only pay for bcrypt when needed
+
+            admin_role_id = conn.execute(select(roles.c.id).where(roles.c.name == "admin")).scalar()
+            now = datetime.utcnow()
+            _insert_ignore(conn, users, [{
+                "id": str(uuid.uuid4()),
+                "name": "Admin User",
+                "email": email,
+                "password": hash_password(settings.DEFAULT_ADMIN_PASSWORD),
+                "role_id": admin_role_id,
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now,
+            }], ["email"])
+            created_admin = True
+    return {"admin_created": created_admin}
+
+
+def run(engine: Engine) -> Dict[str, float]:
+    """Schema check + seed; returns phase timings in ms for the startup log."""
+    t0 = time.perf_counter()
+    schema = ensure_schema(engine, settings.STARTUP_MODE)
+    t1 = time.perf_counter()
+    seeded = seed_defaults(engine)
+    t2 = time.perf_counter()
+    if seeded["admin_created"]:
+        logger.info("default admin user created")
+    return {"schema": schema, "schema_ms": (t1 - t0) * 1000.0, "seed_ms": (t2 - t1) * 1000.0}
@@ -0,0 +1,99 @@
+# app/db/loading.py
+"""
+Relationship loading policy.
+
+Every relationship in app/models.py is lazy (SQLAlchemy's default): reading
+`user.role` or `incident.photos` on a row that didn't load it runs a SELECT
+for that one row, so a serializer walking a list runs one per row (N+1).
+Queries whose results get serialized with relationships say so up front
+with the option sets here:
+
+  USER_WITH_ROLE         users + role (JOIN)
+  STAFF_ROLE             users + role, for queries that already join roles
+  incident_list(fields)  photos (SELECT .. IN) and barangay (JOIN), only
+                         those a sparse fieldset asks for
+
+(Announcement comments already join their author in crud; nothing
+serializes Appointment.service/department/window today.)
+
+Lazy-load detection, per request (LAZY_LOAD_POLICY; needs
+QUERY_INSTRUMENTATION for the request context):
+
+  off    nothing is checked (default)
+  warn   a relationship lazy-loaded more than LAZY_LOAD_MAX_PER_RELATIONSHIP
+         times in one request is logged once and counted in
+         mobo_lazy_loads_total{route,relationship}
+  raise  the same, but the extra load raises LazyLoadError, so the request
+         fails loudly with a traceback pointing at the code that did it. For
+         development and tests; with LAZY_LOAD_MAX_PER_RELATIONSHIP=0 it is
+         lazy="raise" on every relationship.
+
+The default allowance of 1 lets a detail endpoint touch one object's
+relationship; it is the second row doing the same that makes it an N+1.
+"""
+import logging
+from typing import AbstractSet, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+
+from app import models
+from app.core import instrumentation, metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("off", "warn", "raise")
+
+USER_WITH_ROLE = (joinedload(models.User.role),)
+STAFF_ROLE = (contains_eager(models.User.role),)  # the query's own JOIN to roles fills user.role
+
+
+def incident_list(fields: Optional[AbstractSet[str]] = None) -> List:
+    """Eager loads for IncidentOut rows; `fields` is a sparse fieldset (None = all)."""
+    opts = []
+    if fields is None or "photos" in fields:
+        opts.append(selectinload(models.Incident.photos))
+    if fields is None or "barangay" in fields:
+        opts.append(joinedload(models.Incident.barangay))
+    return opts
+
+
+class LazyLoadError(InvalidRequestError):
+    pass
+
+
+def _on_execute(state) -> None:
+    # lazy_loaded_from raises for anything but a SELECT (Query.update/delete, bulk UPDATEs)
+    if not state.is_select or state.lazy_loaded_from is None:
+        return
+    stats = instrumentation.current_stats()
+    if stats is None:  # not inside a request (scripts, startup)
+        return
+    path = state.loader_strategy_path
+    relationship = str(path[-1]) if path else "<unknown>"
+    n = stats.lazy_loads[relationship] = stats.lazy_loads.get(relationship, 0) + 1
+    allowed = settings.LAZY_LOAD_MAX_PER_RELATIONSHIP
+    if n <= allowed:
+        return
+    route = stats.route
+    metrics.LAZY_LOADS.labels(route, relationship).inc()
+    msg = (
+        f"{relationship} lazy-loaded {n} times in {(stats.scope or {}).get('method', '')} {route} "
+        f"(allowed {allowed}); eager-load it with an option from app/db/loading.py"
+    )
+    if settings.LAZY_LOAD_POLICY == "raise":
+        raise LazyLoadError(msg)
+    if n == allowed + 1:
+        logger.warning(msg)
+
+
+def install(session_factory) -> None:
+    """Attach the detector to a sessionmaker; no-op when LAZY_LOAD_POLICY is off."""
+    if settings.LAZY_LOAD_POLICY not in POLICIES:
+        raise ValueError(f"LAZY_LOAD_POLICY must be one of {POLICIES}, not {settings.LAZY_LOAD_POLICY!r}")
+    if settings.LAZY_LOAD_POLICY == "off":
+        return
+    if not event.contains(session_factory, "do_orm_execute", _on_execute):
+        event.listen(session_factory, "do_orm_execute", _on_execute)
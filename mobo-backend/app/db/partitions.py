@@ -0,0 +1,239 @@
+# app/db/partitions.py
+"""
+Monthly range partitions on Postgres.
+
+A partitioned parent gets one child per calendar month, named
+`<table>_pYYYYMM`, plus `<table>_default` for anything outside the
+created range. ensure_partitions() creates the current month and a few
+ahead (run it from a scheduled job, see app.scripts.run_retention);
+detach_older_than() detaches - and optionally drops - whole months, which
+is how old data leaves without a DELETE.
+
+Tables opt in with `info={"partition_by": "<column>"}` in their
+__table_args__ (see models.Incident / models.Notification). On Postgres with
+PG_PARTITIONING on, the migration converts them with convert_to_partitioned();
+maintain() is the scheduled job (python -m app.scripts.manage_partitions).
+
+Every function is a no-op on other databases or on tables that are not
+partitioned, so callers don't need to check.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_BOUND_RE = re.compile(r"FROM \('([0-9-]+)")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :t AND pg_table_is_visible(c.oid)"
+        ),
+        {"t": table},
+    ).first() is not None
+
+
+def list_partitions(conn: Connection, table: str) -> List[Tuple[str, date]]:
+    """(name, month) of the monthly children, oldest first (the default partition is left out)."""
+    if not is_partitioned(conn, table):
+        return []
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :t AND pg_table_is_visible(p.oid)"
+        ),
+        {"t": table},
+    ).all()
+    out = []
+    for name, bound in rows:
+        m = _BOUND_RE.search(bound or "")
+        if m:
+            out.append((name, datetime.strptime(m.group(1)[:10], "%Y-%m-%d").date()))
+    return sorted(out, key=lambda r: r[1])
+
+
+def ensure_partitions(conn: Connection, table: str, months_ahead: int = 2, months_back: int = 0) -> List[str]:
+    """Create missing monthly partitions around today; returns the names created."""
+    if not is_partitioned(conn, table):
+        return []
+    existing = {name for name, _ in list_partitions(conn, table)}
+    this_month = month_start(date.today())
+    created = []
+    for i in range(-months_back, months_ahead + 1):
+        lo = add_months(this_month, i)
+        name = partition_name(table, lo)
+        if name in existing:
+            continue
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{add_months(lo, 1).isoformat()}')"
+        ))
+        created.append(name)
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+    if created:
+        logger.info("created partitions %s", ", ".join(created))
+    return created
+
+
+def detach_older_than(conn: Connection, table: str, cutoff: date, drop: bool = False) -> List[str]:
+    """Detach (and drop, if asked) every monthly partition that ends on or before `cutoff`."""
+    done = []
+    for name, month in list_partitions(conn, table):
+        if add_months(month, 1) > cutoff:
+            break
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        if drop:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        done.append(name)
+    if done:
+        logger.info("%s partitions of %s: %s", "dropped" if drop else "detached", table, ", ".join(done))
+    return done
+
+
+# ---------------------------
+# Scheduled maintenance
+# ---------------------------
+
+def partitioned_tables(metadata: MetaData) -> Dict[str, str]:
+    """table name -> partition column, for tables that opted in via info["partition_by"]."""
+    return {t.name: t.info["partition_by"] for t in metadata.sorted_tables if t.info.get("partition_by")}
+
+
+def maintain(engine: Engine, metadata: MetaData, months_ahead: int, detach_after_months: int = 0) -> Dict[str, Dict]:
+    """Create upcoming months for every opted-in table; detach months older than detach_after_months."""
+    out = {}
+    if engine.dialect.name != "postgresql":
+        return out
+    cutoff = add_months(month_start(date.today()), -detach_after_months) if detach_after_months > 0 else None
+    with engine.begin() as conn:
+        for table in partitioned_tables(metadata):
+            created = ensure_partitions(conn, table, months_ahead=months_ahead)
+            detached = detach_older_than(conn, table, cutoff) if cutoff else []
+            out[table] = {"created": created, "detached": detached}
+    return out
+
+
+# ---------------------------
+# Converting an existing table (migrations)
+# ---------------------------
+
+def _q(conn: Connection, sql: str, **params):
+    return conn.execute(text(sql), params)
+
+
+def _inbound_fks(conn: Connection, table: str) -> List[Tuple[str, str, str]]:
+    """(referencing table, constraint name, definition) of FKs that point at `table`."""
+    return _q(conn,
+        "SELECT cl.relname, co.conname, pg_get_constraintdef(co.oid) FROM pg_constraint co "
+        "JOIN pg_class cl ON cl.oid = co.conrelid "
+        "WHERE co.contype = 'f' AND co.confrelid = CAST(:t AS regclass)", t=table).all()
+
+
+def _outbound_fks(conn: Connection, table: str) -> List[Tuple[str, str]]:
+    return _q(conn,
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid = CAST(:t AS regclass)", t=table).all()
+
+
+def _plain_indexes(conn: Connection, table: str) -> List[Tuple[str, str]]:
+    """(name, CREATE INDEX ...) of non-unique indexes; PK/unique ones are rebuilt by the caller."""
+    return _q(conn,
+        "SELECT i.relname, pg_get_indexdef(x.indexrelid) FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = CAST(:t AS regclass) AND NOT x.indisunique", t=table).all()
+
+
+def _swap(conn: Connection, table: str, create: Callable[[str], None], pk_cols: Sequence[str]) -> list:
+    """
+    Replace `table` with a new one made by create(old_name), copying the rows
+    and re-creating its indexes and outbound FKs. Inbound FKs are dropped and
+    returned as (table, name, definition).
+    """
+    old = f"{table}_old"
+    inbound = _inbound_fks(conn, table)
+    outbound = _outbound_fks(conn, table)
+    indexes = _plain_indexes(conn, table)
+
+    for ref_table, name, _ in inbound:
+        _q(conn, f'ALTER TABLE "{ref_table}" DROP CONSTRAINT "{name}"')
+    for name, _ in outbound:
+        _q(conn, f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        _q(conn, f'DROP INDEX "{name}"')
+    _q(conn, f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "pk_{table}"')
+    _q(conn, f'ALTER TABLE "{table}" RENAME TO "{old}"')
+
+    create(old)
+    _q(conn, f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+    _q(conn, f'DROP TABLE "{old}"')
+
+    cols = ", ".join(f'"{c}"' for c in pk_cols)
+    _q(conn, f'ALTER TABLE "{table}" ADD CONSTRAINT "pk_{table}" PRIMARY KEY ({cols})')
+    for _, ddl in indexes:
+        _q(conn, ddl)
+    for name, ddl in outbound:
+        _q(conn, f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {ddl}')
+    return inbound
+
+
+def convert_to_partitioned(conn: Connection, table: str, column: str = "created_at",
+                           months_ahead: int = 3) -> list:
+    """
+    Rebuild `table` as RANGE(column)-partitioned by month, with a partition
+    for every month from its oldest row to `months_ahead` from now. The
+    primary key becomes (id, column), so FKs pointing at the table can't be
+    kept: they are dropped and returned, and integrity for those references
+    is the application's job from then on.
+    """
+    if conn.dialect.name != "postgresql" or is_partitioned(conn, table):
+        return []
+    _q(conn, f'UPDATE "{table}" SET "{column}" = now() AT TIME ZONE \'utc\' WHERE "{column}" IS NULL')
+    oldest = _q(conn, f'SELECT min("{column}") FROM "{table}"').scalar()
+    back = 0
+    if oldest is not None:
+        this_month = month_start(date.today())
+        back = max(0, (this_month.year - oldest.year) * 12 + this_month.month - oldest.month)
+
+    def create(old: str) -> None:
+        _q(conn, f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{column}")')
+        ensure_partitions(conn, table, months_ahead=months_ahead, months_back=back)
+
+    inbound = _swap(conn, table, create, ["id", column])
+    logger.info("%s is now partitioned by %s; dropped FKs: %s", table, column, [n for _, n, _ in inbound])
+    return inbound
+
+
+def convert_to_plain(conn: Connection, table: str, inbound: Sequence[Tuple[str, str, str]] = ()) -> None:
+    """Undo convert_to_partitioned: one ordinary table again, PK (id), and `inbound` FKs restored."""
+    if not is_partitioned(conn, table):
+        return
+
+    def create(old: str) -> None:
+        _q(conn, f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS)')
+
+    _swap(conn, table, create, ["id"])  # dropping the old parent drops its partitions
+    for ref_table, name, ddl in inbound:
+        _q(conn, f'ALTER TABLE "{ref_table}" ADD CONSTRAINT "{name}" {ddl}')
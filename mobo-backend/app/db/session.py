@@ -2,13 +2,24 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core import instrumentation, metrics, tokens
+from app.db import loading
 
 # SQLite requires check_same_thread=False
 connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 
 engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+if settings.QUERY_INSTRUMENTATION:
+    instrumentation.install(engine)
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: objects keep the values they were written with after
+# commit, so write endpoints build their response without a re-SELECT per row.
+# See app/db/writes.py.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+loading.install(SessionLocal)
+tokens.install(SessionLocal)
 
 
 # Dependency for FastAPI
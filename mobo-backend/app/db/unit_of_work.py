@@ -0,0 +1,133 @@
+# app/db/unit_of_work.py
+"""
+One transaction per request for writes that touch several tables.
+
+Creating an incident used to commit the incident, then every photo, then the
+notification: three or more COMMITs (each an fsync, and on SQLite each one
+takes and releases the database write lock) and, if a step failed, an
+incident without its photos. An endpoint that depends on get_unit_of_work
+gets the request's session wrapped in a UnitOfWork instead:
+
+    def post_comment(..., uow: UnitOfWork = Depends(get_unit_of_work)):
+        db = uow.db
+        db.add(comment)
+        with uow.best_effort("comment notification"):
+            crud.create_notification(db, ...)
+        uow.commit()
+        return ...
+
+- CRUD helpers end with finish(db) rather than db.commit(): a flush while a
+  unit of work owns the session (the caller commits), a commit otherwise, so
+  scripts and endpoints that don't use one behave as before.
+- Side effects that must only happen once the data is durable (metrics,
+  in-memory queue state, the token revocation cache) go through
+  after_commit(db, fn, ...): queued until UnitOfWork.commit(); outside a unit
+  of work, held until the session's open transaction commits (dropped if it
+  rolls back), or run straight away when nothing is pending.
+- best_effort() runs an optional step (a notification) in a SAVEPOINT; if it
+  fails it is logged and rolled back alone and the request goes on.
+- The endpoint calls uow.commit() itself, before returning. Dependency
+  teardown runs after the response has been sent in this FastAPI version,
+  so a commit there could fail after the client (and the idempotency store)
+  had already seen a 201. Whatever was not committed is rolled back when
+  the request ends.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db_session
+
+logger = logging.getLogger(__name__)
+
+_KEY = "unit_of_work"
+_PENDING = "after_commit"
+
+
+class UnitOfWork:
+    def __init__(self, db: Session):
+        self.db = db
+        self._after: List[Tuple[Callable, tuple, dict]] = []
+        db.info[_KEY] = self
+
+    def after_commit(self, fn: Callable, *args, **kwargs) -> None:
+        self._after.append((fn, args, kwargs))
+
+    @contextmanager
+    def best_effort(self, what: str) -> Iterator[None]:
+        self.db.flush()  # the request's own writes must not fail as part of the optional step
+        queued = len(self._after)
+        try:
+            with self.db.begin_nested():
+                yield
+        except Exception:
+            logger.exception("%s failed; the rest of the request is kept", what)
+            del self._after[queued:]  # its side effects never happened
+
+    def commit(self) -> None:
+        self.db.commit()
+        after, self._after = self._after, []
+        for fn, args, kwargs in after:
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("after-commit hook %r failed", fn)
+
+    def close(self) -> None:
+        if self.db.info.get(_KEY) is self:
+            del self.db.info[_KEY]
+        if self._after or self.db.new or self.db.dirty or self.db.deleted:
+            logger.debug("unit of work ended without commit; rolling back")
+        self._after.clear()
+        self.db.rollback()
+
+
+def current(db: Session) -> Optional[UnitOfWork]:
+    return db.info.get(_KEY)
+
+
+def finish(db: Session) -> None:
+    """End of a CRUD helper's write: flush inside a unit of work, commit outside one."""
+    if current(db) is not None:
+        db.flush()
+    else:
+        db.commit()
+
+
+def after_commit(db: Session, fn: Callable, *args, **kwargs) -> None:
+    """Run fn once the session's work is committed (now, if nothing is pending)."""
+    uow = current(db)
+    if uow is not None:
+        uow.after_commit(fn, *args, **kwargs)
+    elif db.in_transaction():
+        db.info.setdefault(_PENDING, []).append((fn, args, kwargs))
+    else:
+        fn(*args, **kwargs)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending(session: Session) -> None:
+    for fn, args, kwargs in session.info.pop(_PENDING, ()):
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            logger.exception("after-commit hook %r failed", fn)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session: Session, previous_transaction) -> None:
+    if not session.in_transaction():  # the outermost transaction, not a savepoint
+        session.info.pop(_PENDING, None)
+
+
+# Dependency for FastAPI; shares the request's session with get_current_user & co.
+def get_unit_of_work(db: Session = Depends(get_db_session)) -> Iterator[UnitOfWork]:
+    uow = UnitOfWork(db)
+    try:
+        yield uow
+    finally:
+        uow.close()
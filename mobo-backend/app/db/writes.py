@@ -0,0 +1,52 @@
+# app/db/writes.py
+"""
+Write path: no re-reads after commit.
+
+SessionLocal is built with expire_on_commit=False, so an object that was just
+added or changed keeps its attributes after db.commit() and endpoints return
+it directly instead of running db.refresh() (one SELECT per row, per commit).
+That is only safe because nothing in app/models.py has a server-side default
+or trigger: ids, created_at, status etc. are Python-side `default=`s, filled
+in by the INSERT and set on the object by the flush, and integer keys come
+back from the INSERT itself. A column that gets a server_default later needs
+`eager_defaults=True` on its mapper (or update_returning below), not a
+refresh in the endpoint.
+
+- db.rollback() still expires everything in the session; an object used
+  after a rollback is re-read on first access, as before.
+- An object loaded before someone else's commit keeps the old values for the
+  rest of the request. Requests are short and each has its own session, so
+  that is the same view a refresh-less read would give.
+
+update_returning() is the find-and-update helper: one UPDATE .. RETURNING on
+Postgres instead of SELECT, change, flush, refresh; UPDATE + SELECT where
+the driver can't return rows (SQLite).
+"""
+from typing import Any, Dict, Optional, Sequence, Type
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+
+def returning_supported(db: Session) -> bool:
+    """Whether the bound database returns rows from UPDATE/INSERT."""
+    return bool(getattr(db.get_bind().dialect, "full_returning", False))
+
+
+def update_returning(db: Session, model: Type[Any], where: Sequence[Any], values: Dict[str, Any]) -> Optional[Any]:
+    """
+    UPDATE the row matching `where` with `values` and return it as a `model`
+    instance with the new values, or None if nothing matched. Does not commit.
+
+    `where` has to match the row after the update too on databases without
+    RETURNING (the row is selected again with it), so don't filter on a
+    column that `values` changes.
+    """
+    stmt = update(model).where(*where).values(**values)
+    if returning_supported(db):
+        q = select(model).from_statement(stmt.returning(*model.__table__.c))
+        return db.execute(q, execution_options={"populate_existing": True}).scalars().first()
+    if not db.execute(stmt, execution_options={"synchronize_session": False}).rowcount:
+        return None
+    q = select(model).where(*where)
+    return db.execute(q, execution_options={"populate_existing": True}).scalars().first()
@@ -2,10 +2,13 @@
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
+from app.db import loading
 from app.db.session import get_db_session
 from app import models
 from app.core.security import decode_token
-from typing import Optional
+from app.core import metrics, tokens
+from contextvars import ContextVar
+from typing import Optional, Tuple
 from jose import JWTError, ExpiredSignatureError
 
 # OAuth2 token URL
@@ -17,24 +20,38 @@ def get_db(db: Session = Depends(get_db_session)):
     return db
 
 
-# Get current logged-in user
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db_session)
-) -> models.User:
+class Identity:
+    """
+    The caller as described by the access token's claims. Enough for
+    authorization and for "whose rows" filters, without loading the User.
+    """
+
+    __slots__ = ("id", "role", "department_id")
+
+    def __init__(self, id: str, role: Optional[str], department_id: Optional[int]):
+        self.id = id
+        self.role = (role or "user").lower()
+        self.department_id = department_id
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+    def __repr__(self) -> str:
+        return f"Identity(id={self.id!r}, role={self.role!r}, department_id={self.department_id!r})"
+
+
+# (token, claims) already verified for the enclosing POST /batch; its
+# sub-requests carry the same token and skip decoding / revocation checks
+verified_token: ContextVar[Optional[Tuple[str, dict]]] = ContextVar("verified_token", default=None)
+
+
+def _token_payload(token: str, db: Session) -> dict:
+    verified = verified_token.get()
+    if verified is not None and verified[0] == token:
+        return verified[1]
     try:
         payload = decode_token(token)
-        user_id: str = payload.get("sub")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-            )
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
-            )
-        return user
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
@@ -44,26 +61,74 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    if not payload.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+        )
+    tokens.revocations.maybe_sync(db)
+    if tokens.revocations.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+        )
+    return payload
+
+
+def _load_user(db: Session, user_id: str) -> models.User:
+    # endpoints taking the ORM user mostly read user.role next
+    user = db.query(models.User).options(*loading.USER_WITH_ROLE).filter(models.User.id == user_id).first()
+    metrics.IDENTITY_CACHE.labels("miss").inc()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    if user.is_active is False:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User inactive"
+        )
+    return user
+
+
+# Verified claims of the bearer token
+def get_token_payload(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db_session)
+) -> dict:
+    return _token_payload(token, db)
+
+
+# Get current logged-in user (full ORM object; one query)
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db_session)
+) -> models.User:
+    payload = _token_payload(token, db)
+    return _load_user(db, payload["sub"])
+
+
+# Get the caller from token claims; no query unless the token predates claims
+def get_current_identity(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db_session)
+) -> Identity:
+    payload = _token_payload(token, db)
+    if "role" in payload:
+        metrics.IDENTITY_CACHE.labels("hit").inc()
+        return Identity(payload["sub"], payload["role"], payload.get("dept"))
+    user = _load_user(db, payload["sub"])
+    return Identity(user.id, getattr(user.role, "name", None), user.department_id)
 
 
-def require_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
-    role_name = getattr(getattr(current_user, "role", None), "name", None)
-    if not (getattr(current_user, "is_admin", False) or role_name == "admin"):
+def require_admin(identity: Identity = Depends(get_current_identity)) -> Identity:
+    if not identity.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
-    return current_user
+    return identity
 
 
 # Get current admin user
-def get_current_admin(current_user: models.User = Depends(get_current_user)):
+def get_current_admin(identity: Identity = Depends(get_current_identity)) -> Identity:
     """
-    Checks if current user is admin.
-    Looks for either:
-    - is_admin attribute
-    - role relationship with name "admin"
+    Checks if the caller is admin or staff, from the token's role claim.
     """
-    role_name = getattr(getattr(current_user, "role", None), "name", None)
-    if getattr(current_user, "is_admin", False) or role_name == "admin" or role_name == "staff":
-        return current_user
+    if identity.role in ("admin", "staff"):
+        return identity
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required"
     )
@@ -0,0 +1,23 @@
+# app/encoders.py
+"""
+Response encoders shared by more than one endpoint module (the resource's own
+endpoints and the /home aggregate). See app/core/serialization.py.
+"""
+from app import schemas
+from app.core import serialization, storage
+from app.core.config import settings
+
+USER_OUT = serialization.Encoder(schemas.UserOut, getters={
+    "id": lambda u: str(u.id),
+    "is_admin": lambda u: u.role.name.lower() == "admin" if u.role else False,
+    "role": lambda u: {"id": str(u.role.id), "name": u.role.name} if u.role else {"id": "", "name": ""},
+})
+
+ANNOUNCEMENT_OUT = serialization.Encoder(
+    schemas.AnnouncementOut, getters={
+        "image_url": lambda a: storage.media_url(a.image_url),
+        "image_data_uri": lambda a: storage.data_uri(a.image_url) if settings.MEDIA_INLINE_BASE64 else None,
+    }
+)
+
+ALERT_OUT = serialization.Encoder(schemas.AlertOut)
@@ -1,30 +1,30 @@
+import time
+
+_T_IMPORT = time.perf_counter()  # cold-start clock: module import -> startup done
+
 import os
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import inspect
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from app.db import session, base
-from app.models import (
-    User,
-    Role,
-)  # make sure this import exists so models are registered
+from app.db import bootstrap, session
 from app.core.config import settings
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core import compression, idempotency, login, media, metrics, serialization, storage
+from app.core.log import RequestIdMiddleware, setup_logging, shutdown_logging
 from app.api.api_v1.api import api_router
 
 from fastapi.staticfiles import StaticFiles
-import os
 
-UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = os.path.abspath(settings.UPLOAD_DIR)
 
+setup_logging()
 logger = logging.getLogger(__name__)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Create FastAPI app first
-app = FastAPI(title="Mobo App API", version="0.1.0")
+app = FastAPI(title="Mobo App API", version="0.1.0", default_response_class=serialization.DefaultResponse)
 
+# innermost: replayed responses still pass through CORS and compression
+app.add_middleware(idempotency.IdempotencyMiddleware)
 # Add CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,90 +32,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Query-Count", "X-Request-ID"],
 )
-app.include_router(api_router, prefix="/api/v1")
-
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-# helper to extract sqlite file path (if sqlite URL used)
-def _sqlite_filepath_from_url(url: str) -> str | None:
-    if not url.startswith("sqlite"):
-        return None
-    parts = url.split("://", 1)
-    if len(parts) != 2:
-        return None
-    return parts[1]  # relative ./file.db or /absolute/path/file.db
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+if settings.QUERY_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(media.RequestBaseMiddleware)  # absolute /media URLs without MEDIA_PUBLIC_BASE_URL
+app.add_middleware(RequestIdMiddleware)  # outermost: every log line below carries the id
+# api_router already carries the /api/v1 prefix; adding its routes directly
+# skips app.include_router's deep-copying rebuild of every route
+app.router.routes.extend(api_router.routes)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return Response(status_code=401)
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+# signed /media URLs (app/core/media.py); on S3 it only redirects to presigned URLs
+app.mount(storage.MEDIA_ROUTE, media.MediaApp(), name="media")
+if settings.STORAGE_BACKEND == "local" and settings.MEDIA_STATIC_UPLOADS:
+    # unauthenticated: anyone with a path gets the file; only for links handed out before /media
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 
 @app.on_event("startup")
 def startup():
-    logger.info("Starting app startup()")
-    engine = session.engine
-
-    # --- Inspect existing vs defined tables ---
-    inspector = inspect(engine)
-    existing_tables = set(inspector.get_table_names())
-    defined_tables = set(base.Base.metadata.tables.keys())
-
-    print(f"[startup] Tables defined in metadata: {sorted(defined_tables)}")
-    print(f"[startup] Tables existing in DB: {sorted(existing_tables)}")
-
-    # --- Create missing tables ---
-    base.Base.metadata.create_all(bind=engine)
-
-    # --- Seed roles and admin user ---
-    db: Session = session.SessionLocal()
+    t0 = time.perf_counter()
     try:
-        # ✅ Ensure admin role
-        admin_role = db.query(Role).filter(Role.name == "admin").first()
-        if not admin_role:
-            admin_role = Role(name="admin")
-            db.add(admin_role)
-            db.commit()
-            db.refresh(admin_role)
-            print("[startup] Admin role created")
-        else:
-            print("[startup] Admin role already exists")
-
-        # ✅ Ensure user role
-        user_role = db.query(Role).filter(Role.name == "user").first()
-        if not user_role:
-            user_role = Role(name="user")
-            db.add(user_role)
-            db.commit()
-            db.refresh(user_role)
-            print("[startup] User role created")
-        else:
-            print("[startup] User role already exists")
-
-        user_role = db.query(Role).filter(Role.name == "staff").first()
-        if not user_role:
-            user_role = Role(name="staff")
-            db.add(user_role)
-            db.commit()
-            db.refresh(user_role)
-            print("[startup] Staff role created")
-        else:
-            print("[startup] Staff role already exists")   
-
-        # ✅ Ensure default admin user
-        admin_user = db.query(User).filter(User.email == "admin@mobo.ph").first()
-        if not admin_user:
-            hashed_password = pwd_context.hash("Admin@123")
-            admin_user = User(
-                name="Admin User",
-                email="admin@mobo.ph",
-                password=hashed_password,
-                role_id=admin_role.id,
-            )
-            db.add(admin_user)
-            db.commit()
-            print("[startup] Default admin user created")
-        else:
-            print("[startup] Default admin user already exists")
-
-    except Exception as e:
-        logger.exception(f"Failed to create default roles/users: {e}")
-    finally:
-        db.close()
-
-    print("[startup] complete")
+        phases = bootstrap.run(session.engine)
+    except Exception:
+        logger.exception("failed to prepare schema / default roles and users")
+        phases = {}
+
+    import_ms = (t0 - _T_IMPORT) * 1000.0
+    total_ms = (time.perf_counter() - _T_IMPORT) * 1000.0
+    logger.log(
+        logging.WARNING if total_ms > settings.STARTUP_BUDGET_MS else logging.INFO,
+        "startup complete in %.0fms (budget %dms): import %.0fms, schema %s %.0fms, seed %.0fms",
+        total_ms, settings.STARTUP_BUDGET_MS, import_ms,
+        phases.get("schema", "-"), phases.get("schema_ms", 0.0), phases.get("seed_ms", 0.0),
+    )
+    metrics.STARTUP_SECONDS.set(total_ms / 1000.0)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    metrics.mark_process_dead()
+    login.shutdown_pool()
+    shutdown_logging()
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Integer, UniqueConstraint, Time, Index, Date
+from sqlalchemy import func, Table, Column, String, Boolean, DateTime, ForeignKey, Text, Integer, BigInteger, UniqueConstraint, Time, Index, Date, LargeBinary
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime, date, time
@@ -29,6 +29,8 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
+    # login looks users up by lower(email)
+    __table_args__ = (Index("ix_users_email_lower", func.lower(email)),)
 
 
 class Department(Base):
@@ -72,12 +74,18 @@ class Incident(Base):
 
     status = Column(String, default="submitted")
     created_at = Column(DateTime, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)  # set when status becomes resolved/rejected
 
     photos = relationship("IncidentPhoto", back_populates="incident")
     comments = relationship(
         "IncidentComment", back_populates="incident", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # monthly partitions on Postgres when PG_PARTITIONING is on (app/db/partitions.py)
+        {"info": {"partition_by": "created_at"}},
+    )
+
     # If you still need the barangay name for old clients, you can expose a convenience property:
     @property
     def barangay_name(self):
@@ -185,6 +193,10 @@ class Notification(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        {"info": {"partition_by": "created_at"}},
+    )
+
 
 class Barangay(Base):
     __tablename__ = "barangays"
@@ -367,4 +379,131 @@ class QueueTicket(Base):
 
     __table_args__ = (
         UniqueConstraint("department_id", "date", "number", name="uq_queue_dept_date_num"),
-    )
\ No newline at end of file
+    )
+
+
+class RefreshToken(Base):
+    """
+    Opaque refresh tokens (only the sha256 is stored). Each refresh rotates:
+    the used row is revoked and points at its replacement; reusing a revoked
+    token revokes the whole family (every token descended from one login).
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(36), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    issued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String(36), nullable=True)
+
+
+class RevokedToken(Base):
+    """
+    Access-token denylist, mirrored in memory by app.core.tokens.
+    jti set   -> that one access token is revoked.
+    jti NULL  -> every access token of user_id issued before revoked_at is.
+    Rows can be purged after expires_at (the longest access token has expired).
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String(36), nullable=True, index=True)
+    user_id = Column(String(36), nullable=True, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key -> stored response, kept by app.core.idempotency.
+    status_code NULL while the first request with the key is still running.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(String(36), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path, query and body
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)  # JSON [[name, value], ...]
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# ---------------------------
+# Reporting rollups (maintained by app.core.rollups)
+# ---------------------------
+# One row per day and dimension combination; 0 stands for "none" in a
+# dimension column so it can be part of the primary key.
+
+class IncidentDailyRollup(Base):
+    """Incidents reported (by created_at day) and closed (by closed_at day)."""
+    __tablename__ = "rollup_incidents_daily"
+
+    day = Column(Date, primary_key=True)
+    department_id = Column(Integer, primary_key=True, default=0)
+    barangay_id = Column(Integer, primary_key=True, default=0)
+    category_id = Column(Integer, primary_key=True, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    resolved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    resolution_seconds = Column(BigInteger, nullable=False, default=0)  # sum over `resolved`
+
+
+class AppointmentDailyRollup(Base):
+    """Appointments by slot day: how many were booked and how each ended."""
+    __tablename__ = "rollup_appointments_daily"
+
+    day = Column(Date, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    service_id = Column(Integer, primary_key=True)
+    booked = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0)
+    checked_in = Column(Integer, nullable=False, default=0)
+    done = Column(Integer, nullable=False, default=0)
+    no_show = Column(Integer, nullable=False, default=0)
+
+
+class QueueDailyRollup(Base):
+    """
+    Queue tickets by queue day and the window that called them
+    (window_id 0: tickets issued / closed without being called).
+    """
+    __tablename__ = "rollup_queue_daily"
+
+    day = Column(Date, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    window_id = Column(Integer, primary_key=True, default=0)
+    issued = Column(Integer, nullable=False, default=0)
+    called = Column(Integer, nullable=False, default=0)
+    served = Column(Integer, nullable=False, default=0)
+    no_show = Column(Integer, nullable=False, default=0)
+    wait_seconds = Column(BigInteger, nullable=False, default=0)     # sum over `called`
+    service_seconds = Column(BigInteger, nullable=False, default=0)  # sum over `served`
+
+
+# ---------------------------
+# Archive tables (filled by app.core.retention)
+# ---------------------------
+
+def _archive_table(src: Table, *index_cols: str) -> Table:
+    """
+    Same columns as `src` without constraints, plus archived_at. On Postgres the
+    table is range-partitioned by archived_at month (see app/db/partitions.py),
+    so old archive months can be dropped as whole partitions.
+    """
+    cols = [Column(c.name, c.type, primary_key=c.primary_key, nullable=not c.primary_key, autoincrement=False)
+            for c in src.columns]
+    cols.append(Column("archived_at", DateTime, primary_key=True, default=datetime.utcnow))
+    t = Table(f"{src.name}_archive", Base.metadata, *cols, postgresql_partition_by="RANGE (archived_at)")
+    for name in index_cols:
+        Index(f"ix_{t.name}_{name}", t.c[name])
+    return t
+
+
+notifications_archive = _archive_table(Notification.__table__, "user_id")
+alert_reads_archive = _archive_table(AlertRead.__table__, "user_id")
+queue_tickets_archive = _archive_table(QueueTicket.__table__, "date")
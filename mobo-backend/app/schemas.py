@@ -1,6 +1,6 @@
 # app/schemas.py
 from pydantic import BaseModel, EmailStr, Field, constr
-from typing import Dict, List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from datetime import datetime, date, time
 from pydantic import BaseModel, Field, conint, validator
 from datetime import time as dt_time, date as dt_date
@@ -95,6 +95,17 @@ class ScheduleOut(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # access token lifetime, seconds
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+    all_devices: bool = False
 
 
 # Request schema for registration
@@ -501,3 +512,108 @@ class QueueTicketOut(BaseModel):
     called_at: Optional[datetime]
     served_at: Optional[datetime]
     class Config: orm_mode = True
+
+class QueueTicketEtaOut(BaseModel):
+    ticket_id: str
+    department_id: int
+    number: int
+    status: str
+    now_serving: Optional[int] = None
+    position: Optional[int] = None  # tickets still waiting ahead of this one
+    eta_min: Optional[int] = None
+    estimated_call_at: Optional[datetime] = None
+    average_wait_min: Optional[int] = None
+
+# --- Search (app/core/search.py) ---
+class IncidentSearchHit(BaseModel):
+    id: str
+    title: str
+    status: Optional[str] = None
+    department: Optional[int] = None
+    barangay_id: Optional[int] = None
+    address: Optional[str] = None
+    created_at: Optional[datetime] = None
+    rank: Optional[float] = None
+    snippet: Optional[str] = Field(None, description="HTML-escaped excerpt; matches wrapped in <b>...</b>")
+
+class IncidentSearchPage(BaseModel):
+    items: List[IncidentSearchHit]
+    next_cursor: Optional[str] = None
+
+class AnnouncementSearchHit(BaseModel):
+    id: str
+    title: str
+    image_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    rank: Optional[float] = None
+    snippet: Optional[str] = Field(None, description="HTML-escaped excerpt; matches wrapped in <b>...</b>")
+
+class AnnouncementSearchPage(BaseModel):
+    items: List[AnnouncementSearchHit]
+    next_cursor: Optional[str] = None
+
+# --- Media (app/core/storage.py) ---
+class MediaUploadRequest(BaseModel):
+    kind: Literal["incident_photo", "announcement_image"]
+    content_type: str = Field(..., regex=r"^image/[\w.+-]+$")
+    size: int = Field(..., gt=0)
+    filename: Optional[str] = None
+
+class MediaUploadTicket(BaseModel):
+    key: str
+    method: str
+    url: str
+    fields: Dict[str, str] = {}
+    expires_at: datetime
+
+class ResumableUploadOut(BaseModel):
+    id: str
+    offset: int
+    length: int
+    expires_at: datetime
+
+class MediaUploadDone(BaseModel):
+    key: str
+    url: str
+
+class IncidentPhotoAttach(BaseModel):
+    keys: List[str] = Field(..., min_items=1, max_items=10)
+
+# --- Home screen aggregate (GET /home) ---
+class HomeAlerts(BaseModel):
+    items: List[AlertOut]
+    read_ids: List[str]
+    unread: int
+
+class HomeAppointment(BaseModel):
+    appointment: AppointmentOut
+    queue: QueueNowOut
+    ticket: Optional[QueueTicketEtaOut] = None
+
+class HomeOut(BaseModel):
+    profile: Optional[UserOut] = None
+    announcements: Optional[List[AnnouncementOut]] = None
+    alerts: Optional[HomeAlerts] = None
+    notifications: Optional[Dict[str, int]] = None
+    appointment: Optional[HomeAppointment] = None
+    etags: Dict[str, str]  # per section; send back as ?have=section:etag
+    unchanged: List[str] = []  # sections left out because the client's etag matched
+    errors: List[str] = []  # sections that failed (null)
+
+# --- Batch requests (POST /batch) ---
+class BatchRequestItem(BaseModel):
+    method: Literal["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str  # relative to /api/v1, query string allowed
+    body: Optional[Any] = None  # sent as JSON
+    headers: Optional[Dict[str, str]] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
+class BatchResponseItem(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+class BatchOut(BaseModel):
+    responses: List[BatchResponseItem]  # same order as the requests
@@ -0,0 +1,36 @@
+# app/scripts/manage_partitions.py
+"""
+Create upcoming monthly partitions (and detach old ones) for the tables that
+are partitioned on Postgres (app/db/partitions.py). Run it daily from cron;
+it does nothing on other databases.
+
+Usage:
+  python -m app.scripts.manage_partitions
+  python -m app.scripts.manage_partitions --detach-after 24   # detach months older than 2 years
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.core.log import setup_logging
+from app.db import partitions
+from app.db.session import engine
+from app import models
+
+logger = logging.getLogger("app.scripts.manage_partitions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions")
+    parser.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--detach-after", type=int, default=settings.PARTITION_DETACH_AFTER_MONTHS,
+                        help="Detach partitions older than N months (0 = never)")
+    args = parser.parse_args()
+
+    setup_logging()
+    result = partitions.maintain(engine, models.Base.metadata, args.months_ahead, args.detach_after)
+    logger.info("partitions: %s", result or "nothing to do (not Postgres)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# app/scripts/media.py
+"""
+Media storage maintenance (app/core/storage.py).
+
+  check         save / read / url / presign / delete a probe object against the
+                configured backend (creates the bucket on S3 if missing)
+  import-local  copy files from a local upload dir into the configured backend,
+                keeping their keys; run it once when switching local -> s3
+  purge-uploads delete resumable upload sessions idle past RESUMABLE_EXPIRE_SECONDS
+                (app/core/resumable.py); run it from cron
+
+Usage:
+  python -m app.scripts.media check
+  python -m app.scripts.media import-local
+  python -m app.scripts.media import-local --from app/api/uploads --dry-run
+  python -m app.scripts.media purge-uploads
+"""
+import argparse
+import io
+import logging
+import mimetypes
+import os
+import sys
+import uuid
+
+from app.core import resumable, storage
+from app.core.config import settings
+from app.core.log import setup_logging
+
+logger = logging.getLogger("app.scripts.media")
+
+
+def check(store: storage.Storage) -> int:
+    key = f"_check/{uuid.uuid4().hex}.txt"
+    payload = b"mobo media check"
+    try:
+        n = store.save(key, io.BytesIO(payload), "text/plain")
+        assert n == len(payload), f"wrote {n} bytes"
+        assert store.read(key) == payload, "read back differs"
+        assert store.size(key) == len(payload), "size differs"
+        logger.info("url: %s", store.url(key))
+        form = store.presign_upload(key, "image/jpeg", settings.MEDIA_UPLOAD_MAX_BYTES, 60)
+        logger.info("direct uploads: %s", form["url"] if form else "not supported")
+    except Exception:
+        logger.exception("storage check failed (%s)", store.name)
+        return 1
+    finally:
+        store.delete(key)
+    if store.exists(key):
+        logger.error("delete did not remove %s", key)
+        return 1
+    logger.info("storage %s: ok", store.name)
+    return 0
+
+
+def import_local(store: storage.Storage, src: str, dry_run: bool) -> int:
+    src = os.path.abspath(src)
+    if isinstance(store, storage.LocalStorage) and store.root == src:
+        logger.error("source is the configured upload dir already")
+        return 1
+    copied = skipped = 0
+    for dirpath, _, files in os.walk(src):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, src).replace(os.sep, "/")
+            if store.exists(key):
+                skipped += 1
+                continue
+            if not dry_run:
+                with open(path, "rb") as f:
+                    store.save(key, f, mimetypes.guess_type(name)[0])
+            copied += 1
+    logger.info("%s %d files from %s (%d already present)", "would copy" if dry_run else "copied", copied, src, skipped)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Media storage maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check", help="Round-trip a probe object")
+    imp = sub.add_parser("import-local", help="Copy a local upload dir into the configured backend")
+    imp.add_argument("--from", dest="src", default=settings.UPLOAD_DIR)
+    imp.add_argument("--dry-run", action="store_true")
+    sub.add_parser("purge-uploads", help="Delete expired resumable upload sessions")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.cmd == "purge-uploads":
+        logger.info("purged %d resumable uploads", resumable.purge_expired())
+        return
+    store = storage.get_storage()
+    if isinstance(store, storage.S3Storage):
+        store.ensure_bucket()
+    if args.cmd == "check":
+        sys.exit(check(store))
+    sys.exit(import_local(store, args.src, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# app/scripts/rebuild_rollups.py
+"""
+Recompute the daily reporting rollups from the source tables.
+
+Usage:
+  python -m app.scripts.rebuild_rollups --days 2           # yesterday + today (nightly cron)
+  python -m app.scripts.rebuild_rollups --start 2024-01-01  # backfill up to today
+  python -m app.scripts.rebuild_rollups --start 2024-01-01 --end 2024-12-31
+"""
+import argparse
+import logging
+from datetime import date, timedelta
+
+from app.core import rollups
+from app.core.log import setup_logging
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("app.scripts.rebuild_rollups")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild reporting rollups")
+    parser.add_argument("--days", type=int, default=None, help="Rebuild the last N days (including today)")
+    parser.add_argument("--start", type=date.fromisoformat, default=None)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    setup_logging()
+    end = args.end or date.today()
+    if args.start is not None:
+        start = args.start
+    else:
+        start = end - timedelta(days=max(1, args.days or 1) - 1)
+
+    db = SessionLocal()
+    try:
+        written = rollups.rebuild(db, start, end)
+    finally:
+        db.close()
+    logger.info("rollups rebuilt for %s..%s: %s", start, end, written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# app/scripts/run_retention.py
+"""
+Archive cold rows per the retention policies (app/core/retention.py).
+
+Usage:
+  python -m app.scripts.run_retention                       # all policies
+  python -m app.scripts.run_retention --only notifications
+  python -m app.scripts.run_retention --dry-run             # just count what would move
+"""
+import argparse
+import logging
+
+from app.core import retention
+from app.core.log import setup_logging
+from app.db.session import engine
+
+logger = logging.getLogger("app.scripts.run_retention")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply retention policies")
+    parser.add_argument("--only", default="", help="Comma-separated policy names")
+    parser.add_argument("--limit", type=int, default=None, help="Move at most N rows per policy")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.dry_run:
+        logger.info("retention pending: %s", retention.count_pending(engine))
+        return
+    only = [s.strip() for s in args.only.split(",") if s.strip()] or None
+    logger.info("retention done: %s", retention.run(engine, only=only, limit=args.limit))
+
+
+if __name__ == "__main__":
+    main()
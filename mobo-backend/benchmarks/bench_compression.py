@@ -0,0 +1,98 @@
+# benchmarks/bench_compression.py
+"""
+Response compression: CPU cost vs bytes saved, for the JSON the app really
+serves (incident lists, alert feeds, comment trees) at realistic sizes.
+
+For each payload x encoder it reports compress time (ms, from the shared
+latency table) plus raw/compressed bytes, the ratio and the transfer time
+saved on a slow mobile link (--link-kbps), which is what the CPU buys.
+
+No database needed; payloads are built like bench_serialization's rows and
+serialized with app.core.serialization.dumps.
+
+Usage:
+  python -m benchmarks.bench_compression
+  python -m benchmarks.bench_compression --rows 20,100,500 --link-kbps 1000 --json comp.json
+"""
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks import common
+from benchmarks.bench_serialization import build_rows
+
+from app.api.api_v1.endpoints import alerts, incidents
+from app.core import compression, serialization
+
+
+def _comment_tree(n: int):
+    now = datetime.utcnow()
+
+    def node(i, depth):
+        return {
+            "id": str(uuid.uuid4()), "author_id": str(uuid.uuid4()), "author_name": f"Resident {i}",
+            "comment": "Salamat po, na-report na namin ito sa barangay." if i % 2 else "Thanks, a crew is on the way.",
+            "created_at": (now - timedelta(minutes=i)).isoformat(), "parent_id": None,
+            "replies": [node(i * 10 + j, depth + 1) for j in range(2)] if depth < 1 else [],
+        }
+    return [node(i, 0) for i in range(max(1, n // 3))]
+
+
+def payloads(sizes):
+    out = {}
+    for n in sizes:
+        alert_rows, _, _, incident_dicts = build_rows(n)
+        out[f"incidents.{n}"] = serialization.dumps(incidents._INCIDENT_OUT.many(incident_dicts))
+        out[f"alerts.{n}"] = serialization.dumps(alerts._ALERT_OUT.many(alert_rows))
+        out[f"comments.{n}"] = serialization.dumps(_comment_tree(n))
+    return out
+
+
+def encoders():
+    out = {f"gzip{lvl}": ("gzip", lvl) for lvl in (1, 6, 9)}
+    if compression.brotli is not None:
+        for q in (1, 4, 11):
+            out[f"br{q}"] = ("br", q)
+    return out
+
+
+def _compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return compression.brotli.compress(data, quality=level)
+    return compression.compress(data, "gzip", gzip_level=level)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression CPU vs bytes saved")
+    parser.add_argument("--rows", default="5,20,100,500", help="Comma-separated list sizes")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--link-kbps", type=float, default=1000.0, help="Link speed for transfer-time savings")
+    common.add_report_args(parser)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.rows.split(",") if s.strip()]
+    summaries, sizes_table = [], []
+    for pname, data in payloads(sizes).items():
+        for ename, (encoding, level) in encoders().items():
+            sample = common.Sample(f"{pname}.{ename}")
+            for _ in range(args.iterations):
+                t0 = time.process_time()
+                out = _compress(data, encoding, level)
+                sample.add((time.process_time() - t0) * 1000.0)
+            s = sample.summary()
+            summaries.append(s)
+            saved = len(data) - len(out)
+            sizes_table.append((s["name"], len(data), len(out), s["p50_ms"], saved * 8 / args.link_kbps))
+
+    code = common.report(summaries, args)
+    print(f"\n{'case':<28} {'raw':>9} {'compressed':>11} {'ratio':>6} {'cpu p50':>9} {'saved @ %.0fkbps' % args.link_kbps:>18}")
+    for name, raw, comp, cpu_ms, saved_ms in sizes_table:
+        flag = "" if raw >= compression.settings.COMPRESSION_MIN_BYTES else "  (below COMPRESSION_MIN_BYTES)"
+        print(f"{name:<28} {raw:>9} {comp:>11} {raw / comp:>6.1f} {cpu_ms:>7.2f}ms {saved_ms:>16.1f}ms{flag}")
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
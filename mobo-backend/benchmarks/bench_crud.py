@@ -0,0 +1,150 @@
+# benchmarks/bench_crud.py
+"""
+Microbenchmarks for the CRUD helpers and endpoint functions on the hot paths.
+
+Each iteration runs with a fresh Session (as a request would), and reports
+latency percentiles plus the number of SQL statements per call (counted by
+app.core.instrumentation).
+
+Usage (after `python -m benchmarks.seed`):
+  python -m benchmarks.bench_crud --iterations 200
+  python -m benchmarks.bench_crud --only slots,alerts --json bench_crud.json
+  python -m benchmarks.bench_crud --baseline bench_crud.json   # exit 1 on regression
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+from fastapi import HTTPException
+
+from app import crud, models, schemas
+from app.api.api_v1.endpoints import alerts, announcements, appointments
+from app.db import session
+from benchmarks.seed import BENCH_ADMIN_EMAIL, BENCH_USER_EMAIL
+
+
+def _fixtures(db):
+    user = db.query(models.User).filter(models.User.email == BENCH_USER_EMAIL).first()
+    admin = db.query(models.User).filter(models.User.email == BENCH_ADMIN_EMAIL).first()
+    if not user or not admin:
+        sys.exit("benchmark accounts missing - run `python -m benchmarks.seed` first")
+    svc = db.query(models.AppointmentService).order_by(models.AppointmentService.id).first()
+    dept_id = db.query(models.Department.id).order_by(models.Department.id).first()[0]
+    residents = [
+        uid for (uid,) in db.query(models.User.id).filter(models.User.email.like("resident%")).limit(500).all()
+    ]
+    return {
+        "user_id": user.id, "admin_id": admin.id, "service_id": svc.id,
+        "department_id": dept_id, "resident_ids": residents or [user.id],
+    }
+
+
+def build_cases(fx):
+    rnd = random.Random(42)
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).date()
+
+    def _user(db):
+        return db.query(models.User).get(fx["user_id"])
+
+    def list_incidents_all(db):
+        crud.list_incidents_all(db, skip=0, limit=100)
+
+    def list_incidents_dept(db):
+        crud.list_incidents_all(db, skip=0, limit=100, department_id=fx["department_id"])
+
+    def get_slots(db):
+        appointments.get_slots(service_id=fx["service_id"], day=tomorrow, db=db)
+
+    def list_alerts(db):
+        alerts.list_alerts(
+            db=db, current_user=_user(db), limit=20, since=None,
+            category=None, severity=None, barangay=None, barangay_id=None,
+        )
+
+    def notifications(db):
+        crud.list_notifications_for_user(db, fx["user_id"], skip=0, limit=50)
+
+    def queue_now(db):
+        appointments.queue_now(department_id=fx["department_id"], db=db)
+
+    def latest_announcements(db):
+        announcements.latest(db=db, limit=5)
+
+    def book(db):
+        # random resident + future slot; a full slot (409) is a valid, measured outcome
+        booker = db.query(models.User).get(rnd.choice(fx["resident_ids"]))
+        day = tomorrow + timedelta(days=rnd.randint(0, 6))
+        start = datetime.combine(day, datetime.min.time()) + timedelta(hours=8, minutes=15 * rnd.randint(0, 35))
+        payload = schemas.AppointmentCreate(service_id=fx["service_id"], slot_start=start)
+        try:
+            appointments.book(payload=payload, db=db, user=booker)
+        except HTTPException as e:
+            if e.status_code != 409:
+                raise
+            db.rollback()
+
+    return {
+        "incidents.list_all": list_incidents_all,
+        "incidents.list_all[dept]": list_incidents_dept,
+        "appointments.get_slots": get_slots,
+        "alerts.list_alerts": list_alerts,
+        "notifications.list_for_user": notifications,
+        "appointments.queue_now": queue_now,
+        "announcements.latest": latest_announcements,
+        "appointments.book": book,
+    }
+
+
+def run_case(name, fn, iterations, warmup):
+    sample = common.Sample(name)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for i in range(warmup + iterations):
+            db = session.SessionLocal()
+            try:
+                with common.count_queries() as qc:
+                    t0 = time.perf_counter()
+                    ok = True
+                    try:
+                        fn(db)
+                    except Exception:
+                        ok = False
+                    ms = (time.perf_counter() - t0) * 1000.0
+            finally:
+                db.close()
+            if i >= warmup:
+                sample.add(ms, qc.count, ok)
+    return sample.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRUD / endpoint microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="Comma-separated substrings of case names to run")
+    common.add_report_args(parser)
+    args = parser.parse_args()
+
+    common.instrumentation.install(session.engine)  # no-op unless QUERY_INSTRUMENTATION=false
+    db = session.SessionLocal()
+    try:
+        fx = _fixtures(db)
+    finally:
+        db.close()
+
+    cases = build_cases(fx)
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",") if w.strip()]
+        cases = {k: v for k, v in cases.items() if any(w in k for w in wanted)}
+
+    summaries = [run_case(name, fn, args.iterations, args.warmup) for name, fn in cases.items()]
+    sys.exit(common.report(summaries, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# benchmarks/bench_serialization.py
+"""
+Response serialization CPU: the old response_model path vs the encoders in
+app.core.serialization, per 1000 rows.
+
+  <case>.before  what the endpoint used to do (build pydantic models, or
+                 return dicts/ORM rows) + FastAPI's response_model
+                 validation + jsonable_encoder + json.dumps
+  <case>.after   the endpoint's Encoder + DefaultResponse (orjson)
+
+Rows are built in memory (transient ORM objects / dicts), so no database or
+seed is needed. Times are process CPU ms per 1000 rows.
+
+Usage:
+  python -m benchmarks.bench_serialization
+  python -m benchmarks.bench_serialization --rows 500 --iterations 50 --json ser.json
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from benchmarks import common
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+from app.api.api_v1.endpoints import alerts, announcements, incidents, notifications
+from app.core import serialization
+
+
+def _validate(model_type, content):
+    """FastAPI's response_model step, driven synchronously (nothing in it awaits)."""
+    field = create_response_field(name="Response_bench", type_=model_type)
+    coro = serialize_response(field=field, response_content=content, is_coroutine=True)
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def _old_path(model_type, content) -> bytes:
+    return JSONResponse(content=_validate(model_type, content)).body
+
+
+def _new_path(content) -> bytes:
+    return serialization.respond(content).body
+
+
+def build_rows(n: int):
+    now = datetime.utcnow()
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    alert_rows = [
+        models.Alert(
+            id=ids[i], title=f"Flood warning {i}", body="Water level rising near the river" * 3,
+            severity="warning", category="baha", barangay="Poblacion", purok=str(i % 7),
+            source="PDRRMO", valid_until=now + timedelta(hours=6), created_at=now, updated_at=now,
+        )
+        for i in range(n)
+    ]
+    announcement_rows = [
+        models.Announcement(
+            id=ids[i], author_id=ids[0], title=f"Announcement {i}", body="Scheduled maintenance " * 20,
+            image_url=None, created_at=now,
+        )
+        for i in range(n)
+    ]
+    notification_rows = [
+        models.Notification(
+            id=ids[i], user_id=ids[0], incident_id=ids[i], read=bool(i % 2),
+            created_at=now, message=f"Incident {i} updated",
+        )
+        for i in range(n)
+    ]
+    incident_dicts = [
+        {
+            "id": ids[i], "reporter_id": ids[0], "title": f"Broken pipe {i}", "type": 3,
+            "type_name": "Water", "description": "Leaking since morning " * 5, "address": "Rizal St.",
+            "purok": "3", "barangay": "Poblacion", "street": "Rizal", "landmark": "church",
+            "department": 2, "department_name": "Engineering", "status": "Submitted",
+            "created_at": now, "photos": [], "reporterName": "Juan", "reporterPhone": "0917",
+            "reportedAt": now,
+        }
+        for i in range(n)
+    ]
+    return alert_rows, announcement_rows, notification_rows, incident_dicts
+
+
+def build_cases(n: int):
+    alert_rows, announcement_rows, notification_rows, incident_dicts = build_rows(n)
+
+    def alerts_before():
+        out = [
+            schemas.AlertOut(
+                id=r.id, title=r.title, body=r.body, severity=r.severity, category=r.category,
+                barangay=r.barangay, barangay_id=None, purok=r.purok, source=r.source,
+                valid_until=r.valid_until, created_at=r.created_at, updated_at=r.updated_at,
+            )
+            for r in alert_rows
+        ]
+        return _old_path(List[schemas.AlertOut], out)
+
+    def alerts_after():
+        return _new_path(alerts._ALERT_OUT.many(alert_rows))
+
+    def announcements_before():
+        out = []
+        for a in announcement_rows:
+            d = schemas.AnnouncementOut.from_orm(a).dict()
+            d["image_data_uri"] = None
+            out.append(schemas.AnnouncementOut(**d))
+        return _old_path(List[schemas.AnnouncementOut], out)
+
+    def announcements_after():
+        return _new_path(announcements._ANNOUNCEMENT_OUT.many(announcement_rows))
+
+    def notifications_before():
+        return _old_path(List[schemas.NotificationOut], notification_rows)
+
+    def notifications_after():
+        return _new_path(notifications._NOTIFICATION_OUT.many(notification_rows))
+
+    def incidents_before():
+        return _old_path(List[schemas.IncidentOut], incident_dicts)
+
+    def incidents_after():
+        return _new_path(incidents._INCIDENT_OUT.many(incident_dicts))
+
+    return {
+        "alerts.list": (alerts_before, alerts_after),
+        "announcements.latest": (announcements_before, announcements_after),
+        "notifications.list": (notifications_before, notifications_after),
+        "incidents.admin_all": (incidents_before, incidents_after),
+    }
+
+
+def run(fn, iterations: int, warmup: int, rows: int, name: str) -> common.Sample:
+    for _ in range(warmup):
+        fn()
+    sample = common.Sample(name)
+    scale = 1000.0 / rows
+    for _ in range(iterations):
+        t0 = time.process_time()
+        fn()
+        sample.add((time.process_time() - t0) * 1000.0 * scale)
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", help="Comma-separated substrings of case names to run")
+    common.add_report_args(parser)
+    args = parser.parse_args()
+
+    cases = build_cases(args.rows)
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",") if w.strip()]
+        cases = {k: v for k, v in cases.items() if any(w in k for w in wanted)}
+
+    # same bytes either way (modulo key order/whitespace), or the comparison is meaningless
+    for name, (before, after) in cases.items():
+        if json.loads(before()) != json.loads(after()):
+            sys.exit(f"{name}: fast path output differs from the response_model path")
+
+    summaries, speedups = [], []
+    for name, (before, after) in cases.items():
+        b = run(before, args.iterations, args.warmup, args.rows, f"{name}.before").summary()
+        a = run(after, args.iterations, args.warmup, args.rows, f"{name}.after").summary()
+        summaries += [b, a]
+        speedups.append((name, b["mean_ms"], a["mean_ms"]))
+
+    print(f"CPU ms per 1000 rows (orjson: {'yes' if serialization.orjson else 'no'})\n")
+    code = common.report(summaries, args)
+    print()
+    for name, b, a in speedups:
+        print(f"{name:<28} {b:8.2f} -> {a:7.2f} ms/1k rows  ({b / a if a else float('inf'):.1f}x)")
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
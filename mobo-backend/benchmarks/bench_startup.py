@@ -0,0 +1,76 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark: how long a fresh worker takes to become ready.
+
+Each run is a new interpreter (nothing cached in-process) that imports
+app.main and runs the startup handlers, reporting:
+  startup.import   - module import (routes, models, middleware)
+  startup.handlers - schema check + seeding
+  startup.total    - both; compared against STARTUP_BUDGET_MS
+
+Usage:
+  python -m benchmarks.bench_startup --runs 10
+  STARTUP_MODE=full python -m benchmarks.bench_startup
+  python -m benchmarks.bench_startup --json startup.json --baseline startup_prev.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import common
+
+from app.core.config import settings
+
+_CHILD = r"""
+import time, json, asyncio
+t0 = time.perf_counter()
+import app.main as m
+t1 = time.perf_counter()
+asyncio.run(m.app.router.startup())
+t2 = time.perf_counter()
+print("@@" + json.dumps({"import": (t1 - t0) * 1000.0, "handlers": (t2 - t1) * 1000.0}))
+"""
+
+
+def run_once(env) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=common.PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@"):
+            return json.loads(line[2:])
+    raise RuntimeError(f"startup run failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=settings.STARTUP_BUDGET_MS,
+                        help="Fail if p95 total exceeds this (default: STARTUP_BUDGET_MS)")
+    common.add_report_args(parser)
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    samples = {k: common.Sample(f"startup.{k}") for k in ("import", "handlers", "total")}
+    for _ in range(args.runs):
+        r = run_once(env)
+        samples["import"].add(r["import"])
+        samples["handlers"].add(r["handlers"])
+        samples["total"].add(r["import"] + r["handlers"])
+
+    summaries = [s.summary() for s in samples.values()]
+    code = common.report(summaries, args)
+    p95 = samples["total"].summary()["p95_ms"]
+    if p95 > args.budget_ms:
+        print(f"\nOVER BUDGET: p95 cold start {p95:.0f}ms > {args.budget_ms:.0f}ms")
+        code = code or 1
+    else:
+        print(f"\nwithin budget: p95 cold start {p95:.0f}ms <= {args.budget_ms:.0f}ms")
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts: DB selection, latency
+percentiles and baseline comparison.
+
+Every script imports this module *before* anything from `app`, so the
+DATABASE_URL override below is what `app.db.session` sees.
+"""
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(THIS_DIR, ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Never benchmark against the dev database by accident.
+DEFAULT_BENCH_DB = "sqlite:///./bench.sqlite"
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", DEFAULT_BENCH_DB)
+
+from app.core import instrumentation  # noqa: E402
+
+# Query counting comes from the app's own instrumentation, so benchmark numbers
+# match the Server-Timing / X-Query-Count headers and admin diagnostics.
+count_queries = instrumentation.count_queries
+queries_from_response = instrumentation.queries_from_response
+
+
+# ---------------------------
+# Stats
+# ---------------------------
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile on an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class Sample:
+    """Collects latencies (ms) and query counts for one benchmark case."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.errors = 0
+
+    def add(self, ms: float, queries: Optional[int] = None, ok: bool = True):
+        self.latencies.append(ms)
+        if queries is not None:
+            self.queries.append(queries)
+        if not ok:
+            self.errors += 1
+
+    def summary(self) -> Dict:
+        lat = sorted(self.latencies)
+        n = len(lat)
+        return {
+            "name": self.name,
+            "n": n,
+            "errors": self.errors,
+            "mean_ms": round(sum(lat) / n, 3) if n else 0.0,
+            "p50_ms": round(percentile(lat, 50), 3),
+            "p95_ms": round(percentile(lat, 95), 3),
+            "p99_ms": round(percentile(lat, 99), 3),
+            "queries_per_call": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+        }
+
+
+def print_table(summaries: Iterable[Dict]) -> None:
+    rows = list(summaries)
+    header = f"{'case':<40} {'n':>6} {'err':>5} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'q/call':>7}"
+    print(header)
+    print("-" * len(header))
+    for s in rows:
+        qpc = "-" if s["queries_per_call"] is None else f"{s['queries_per_call']:.1f}"
+        print(
+            f"{s['name']:<40} {s['n']:>6} {s['errors']:>5} "
+            f"{s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {qpc:>7}"
+        )
+
+
+def write_json(path: str, summaries: List[Dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": time.time(), "results": summaries}, f, indent=2)
+
+
+def compare_to_baseline(summaries: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Return human-readable regressions vs a previous --json output.
+    A case regresses if its p95 grew by more than `tolerance` (0.2 = +20%)
+    or it now issues more queries per call.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+
+    problems: List[str] = []
+    for s in summaries:
+        b = base.get(s["name"])
+        if not b:
+            continue
+        if b["p95_ms"] and s["p95_ms"] > b["p95_ms"] * (1.0 + tolerance):
+            problems.append(f"{s['name']}: p95 {b['p95_ms']:.2f}ms -> {s['p95_ms']:.2f}ms")
+        if b.get("queries_per_call") is not None and s.get("queries_per_call") is not None:
+            if s["queries_per_call"] > b["queries_per_call"]:
+                problems.append(
+                    f"{s['name']}: queries/call {b['queries_per_call']} -> {s['queries_per_call']}"
+                )
+    return problems
+
+
+def add_report_args(parser) -> None:
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file and fail on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth vs baseline (0.2 = 20%%)")
+
+
+def report(summaries: List[Dict], args) -> int:
+    print_table(summaries)
+    if args.json_out:
+        write_json(args.json_out, summaries)
+        print(f"\nwrote {args.json_out}")
+    if args.baseline:
+        problems = compare_to_baseline(summaries, args.baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print("\nno regressions vs baseline")
+    return 0
@@ -0,0 +1,135 @@
+# benchmarks/load_http.py
+"""
+HTTP load scenario for the top endpoints, driven by an asyncio client.
+
+By default the FastAPI app is driven in-process through httpx's ASGI transport.
+Point it at a running server with --base-url to measure the real stack
+(uvicorn, network, workers). In both modes SQL statements per request come from
+the X-Query-Count header added by QueryStatsMiddleware.
+
+Usage (after `python -m benchmarks.seed`):
+  python -m benchmarks.load_http --concurrency 20 --duration 30
+  python -m benchmarks.load_http --base-url http://127.0.0.1:8000 --concurrency 50
+  python -m benchmarks.load_http --json load.json --baseline load_prev.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+import httpx
+
+from benchmarks.seed import BENCH_ADMIN_EMAIL, BENCH_PASSWORD, BENCH_USER_EMAIL
+
+API = "/api/v1"
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> str:
+    r = await client.post(f"{API}/auth/token", data={"username": email, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _pick_ids(client: httpx.AsyncClient, user_headers) -> dict:
+    r = await client.get(f"{API}/appointments/services", headers=user_headers)
+    r.raise_for_status()
+    services = r.json()
+    if not services:
+        sys.exit("no appointment services - run `python -m benchmarks.seed` first")
+    return {"service_ids": [s["id"] for s in services], "department_ids": sorted({s["department_id"] for s in services})}
+
+
+def build_scenario(ids, user_h, admin_h, rnd: random.Random):
+    """(weight, name, request factory) - weights follow what the mobile app hits most."""
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).date().isoformat()
+
+    def slots():
+        return "GET", f"{API}/appointments/services/{rnd.choice(ids['service_ids'])}/slots?day={tomorrow}", user_h, None
+
+    def book():
+        day = datetime.utcnow().date() + timedelta(days=rnd.randint(1, 7))
+        start = datetime.combine(day, datetime.min.time()) + timedelta(hours=8, minutes=15 * rnd.randint(0, 35))
+        body = {"service_id": rnd.choice(ids["service_ids"]), "slot_start": start.isoformat()}
+        return "POST", f"{API}/appointments", user_h, body
+
+    return [
+        (20, "GET /alerts/", lambda: ("GET", f"{API}/alerts/?limit=20", user_h, None)),
+        (15, "GET /announcements/latest", lambda: ("GET", f"{API}/announcements/latest", user_h, None)),
+        (15, "GET /notifications/unread_count", lambda: ("GET", f"{API}/notifications/unread_count", user_h, None)),
+        (10, "GET /notifications/", lambda: ("GET", f"{API}/notifications/?limit=50", user_h, None)),
+        (10, "GET /appointments/queue/now", lambda: (
+            "GET", f"{API}/appointments/queue/now?department_id={rnd.choice(ids['department_ids'])}", user_h, None)),
+        (10, "GET /appointments/services/{id}/slots", slots),
+        (8, "GET /appointments/me/current", lambda: ("GET", f"{API}/appointments/me/current", user_h, None)),
+        (7, "GET /incidents/admin/all", lambda: ("GET", f"{API}/incidents/admin/all?limit=50", admin_h, None)),
+        (5, "POST /appointments", book),
+    ]
+
+
+async def run(args) -> int:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60.0)
+    else:
+        from app.main import app
+
+        # app errors come back as 500s (counted) instead of aborting the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0)
+
+    async with client:
+        user_h = {"Authorization": f"Bearer {await _login(client, BENCH_USER_EMAIL)}"}
+        admin_h = {"Authorization": f"Bearer {await _login(client, BENCH_ADMIN_EMAIL)}"}
+        ids = await _pick_ids(client, user_h)
+
+        rnd = random.Random(7)
+        scenario = build_scenario(ids, user_h, admin_h, rnd)
+        weights = [w for w, _, _ in scenario]
+        samples = {name: common.Sample(name) for _, name, _ in scenario}
+        deadline = time.perf_counter() + args.duration
+        sent = 0
+
+        async def worker():
+            nonlocal sent
+            while time.perf_counter() < deadline and (not args.requests or sent < args.requests):
+                sent += 1
+                _, name, make = rnd.choices(scenario, weights=weights)[0]
+                method, url, headers, body = make()
+                queries = None
+                t0 = time.perf_counter()
+                try:
+                    r = await client.request(method, url, headers=headers, json=body)
+                    # 409 = slot full on booking; that's an expected answer under load
+                    ok = r.status_code < 400 or r.status_code == 409
+                    queries = common.queries_from_response(r)
+                except httpx.HTTPError:
+                    ok = False
+                ms = (time.perf_counter() - t0) * 1000.0
+                samples[name].add(ms, queries, ok)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    summaries = [s.summary() for s in samples.values() if s.latencies]
+    total = sum(s["n"] for s in summaries)
+    print(f"{total} requests in {elapsed:.1f}s -> {total / elapsed:.1f} req/s (concurrency={args.concurrency})\n")
+    return common.report(summaries, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load scenario for the top endpoints")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    common.add_report_args(parser)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# tests/test_app.py
+def test_unauthenticated_requests_are_rejected(client):
+    assert client.get("/api/v1/incidents/me").status_code == 401
+
+
+def test_authenticated_request(client, resident, auth_headers):
+    r = client.get("/api/v1/incidents/me", headers=auth_headers(resident))
+    assert r.status_code == 200
+    assert r.json() == []
+
+
+def test_mounted_routes_keep_prefix_tags_and_operation_ids(client):
+    spec = client.get("/openapi.json").json()
+    op = spec["paths"]["/api/v1/incidents/me"]["get"]
+    assert op["tags"] == ["incidents"]
+    assert op["operationId"] == "my_incidents_api_v1_incidents_me_get"
+    schema = op["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema["title"] == "Response My Incidents Api V1 Incidents Me Get"
+    assert "/api/v1/admin/diagnostics/queries" in spec["paths"]
@@ -0,0 +1,47 @@
+# tests/test_batch.py
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def announcement(db):
+    a = models.Announcement(title="Water interruption", body="Sitio 2, 9am to 3pm.")
+    db.add(a)
+    db.commit()
+    return a
+
+
+def _batch(client, headers, *requests):
+    r = client.post("/api/v1/batch", json={"requests": list(requests)}, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()["responses"]
+
+
+def test_responses_come_back_in_request_order(client, resident, auth_headers, announcement):
+    comments = f"/announcements/{announcement.id}/comments"
+    out = _batch(
+        client, auth_headers(resident),
+        {"path": comments},
+        {"path": "/announcements/no-such-id"},
+        {"method": "POST", "path": comments, "body": {"comment": "Thanks for the notice"}},
+        {"path": comments},
+        {"path": "/incidents/me"},
+    )
+    assert [r["status"] for r in out] == [200, 404, 200, 200, 200]
+    assert out[0]["body"] == []  # read before the write
+    assert [c["comment"] for c in out[3]["body"]] == ["Thanks for the notice"]  # the write is visible after it
+    assert out[4]["body"] == []
+
+
+def test_sub_requests_keep_their_own_permission_checks(client, resident, auth_headers):
+    (out,) = _batch(client, auth_headers(resident), {"path": "/reports/incidents"})
+    assert out["status"] == 403
+
+
+def test_invalid_batches(client, resident, auth_headers):
+    h = auth_headers(resident)
+    assert client.post("/api/v1/batch", json={"requests": []}, headers=h).status_code == 422
+    assert client.post("/api/v1/batch", json={"requests": [{"path": "/incidents/me"}]}).status_code == 401
+    (nested,) = _batch(client, h, {"method": "POST", "path": "/batch", "body": {"requests": []}})
+    assert nested["status"] == 400
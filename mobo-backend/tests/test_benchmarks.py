@@ -0,0 +1,39 @@
+# tests/test_benchmarks.py
+import json
+
+from benchmarks import common
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert common.percentile(values, 50) == 50.0
+    assert common.percentile(values, 95) == 95.0
+    assert common.percentile(values, 100) == 100.0
+    assert common.percentile([], 95) == 0.0
+
+
+def test_sample_summary():
+    s = common.Sample("case")
+    for ms, q in ((1.0, 2), (3.0, 2), (2.0, 4)):
+        s.add(ms, q)
+    s.add(10.0, ok=False)
+    summary = s.summary()
+    assert summary["n"] == 4 and summary["errors"] == 1
+    assert summary["p50_ms"] == 2.0
+    assert summary["queries_per_call"] == 2.67
+
+
+def test_baseline_comparison_flags_latency_and_query_regressions(tmp_path):
+    base = tmp_path / "base.json"
+    base.write_text(json.dumps({"results": [
+        {"name": "a", "p95_ms": 10.0, "queries_per_call": 2},
+        {"name": "b", "p95_ms": 10.0, "queries_per_call": 2},
+    ]}))
+    now = [
+        {"name": "a", "p95_ms": 11.0, "queries_per_call": 2},  # within 20%
+        {"name": "b", "p95_ms": 13.0, "queries_per_call": 3},
+        {"name": "new", "p95_ms": 99.0, "queries_per_call": 9},  # not in the baseline
+    ]
+    problems = common.compare_to_baseline(now, str(base), tolerance=0.2)
+    assert len(problems) == 2
+    assert all(p.startswith("b:") for p in problems)
@@ -0,0 +1,72 @@
+# tests/test_exports.py
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.core import storage
+
+WINDOW = {"start": "2002-05-01T00:00:00", "end": "2002-05-02T00:00:00"}
+
+
+@pytest.fixture
+def old_incident(db, resident):
+    inc = models.Incident(reporter_id=str(resident.id), title="Pothole, Purok 3", status="submitted",
+                          created_at=datetime(2002, 5, 1, 8, 30))
+    db.add(inc)
+    db.commit()
+    yield inc
+    db.delete(inc)
+    db.commit()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/incidents/admin/export", "/api/v1/admin_appointments/export"])
+@pytest.mark.parametrize("fmt", ["xlsx", "CSV", "csv;ndjson"])
+def test_unknown_format_is_rejected(client, admin, auth_headers, path, fmt):
+    r = client.get(path, params={"format": fmt}, headers=auth_headers(admin))
+    assert r.status_code == 422
+
+
+def test_incident_export_csv(client, admin, auth_headers, old_incident):
+    r = client.get("/api/v1/incidents/admin/export", params=WINDOW, headers=auth_headers(admin))
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"].endswith('.csv"')
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [(row["id"], row["title"]) for row in rows] == [(old_incident.id, "Pothole, Purok 3")]
+
+
+def test_incident_export_ndjson(client, admin, auth_headers, old_incident):
+    params = dict(WINDOW, format="ndjson")
+    r = client.get("/api/v1/incidents/admin/export", params=params, headers=auth_headers(admin))
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in rows] == [old_incident.id]
+    assert rows[0]["photo_urls"] == []
+
+
+def test_incident_export_signs_photo_urls(client, db, admin, auth_headers, old_incident):
+    key = storage.new_key("incidents", old_incident.reporter_id, "photo.jpg")
+    storage.get_storage().save(key, io.BytesIO(b"\xff\xd8jpeg"), "image/jpeg")
+    photo = models.IncidentPhoto(incident_id=old_incident.id, storage_path=key)  # url is never stored
+    db.add(photo)
+    db.commit()
+    try:
+        params = dict(WINDOW, format="ndjson")
+        (row,) = [json.loads(line) for line in client.get(
+            "/api/v1/incidents/admin/export", params=params, headers=auth_headers(admin)).text.splitlines()]
+        (url,) = row["photo_urls"]
+        assert url.startswith("http://testserver/media/incidents/")
+        assert client.get(url).content == b"\xff\xd8jpeg"
+    finally:
+        db.delete(photo)
+        db.commit()
+        storage.get_storage().delete(key)
+
+
+def test_appointment_export_is_admin_only(client, resident, auth_headers):
+    assert client.get("/api/v1/admin_appointments/export", headers=auth_headers(resident)).status_code == 403
@@ -0,0 +1,44 @@
+# tests/test_fields.py
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def reported(db, resident):
+    inc = models.Incident(reporter_id=str(resident.id), title="Clogged canal", description="Near the chapel")
+    db.add(inc)
+    db.add(models.Notification(user_id=resident.id, title="Received", message="We got your report"))
+    db.commit()
+    yield resident
+    db.query(models.Notification).filter_by(user_id=resident.id).delete()
+    db.delete(inc)
+    db.commit()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/incidents/me", "/api/v1/notifications/", "/api/v1/announcements/latest"])
+def test_unknown_fields_are_rejected(client, reported, auth_headers, path):
+    r = client.get(path, params={"fields": "id,password"}, headers=auth_headers(reported))
+    assert r.status_code == 422
+    assert "Unknown fields: password" in r.json()["detail"]
+
+
+def test_only_requested_fields_are_returned(client, reported, auth_headers):
+    h = auth_headers(reported)
+    (inc,) = client.get("/api/v1/incidents/me", params={"fields": "title, status"}, headers=h).json()
+    assert inc == {"id": inc["id"], "title": "Clogged canal", "status": "submitted"}  # id always included
+
+    (n,) = client.get("/api/v1/notifications/", params={"fields": "message"}, headers=h).json()
+    assert set(n) == {"id", "message"}
+
+
+def test_computed_fields(client, reported, auth_headers):
+    (inc,) = client.get("/api/v1/incidents/me", params={"fields": "photos,reportedAt"},
+                        headers=auth_headers(reported)).json()
+    assert set(inc) == {"id", "photos", "reportedAt"}
+    assert inc["photos"] == []
+
+
+def test_no_fields_means_every_field(client, reported, auth_headers):
+    (inc,) = client.get("/api/v1/incidents/me", params={"fields": ""}, headers=auth_headers(reported)).json()
+    assert {"description", "barangay", "type_name", "reporterName"} <= set(inc)
@@ -0,0 +1,42 @@
+# tests/test_home.py
+import uuid
+
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def alert(db):
+    b = models.Barangay(name=f"Poblacion {uuid.uuid4().hex[:6]}")
+    db.add(b)
+    db.flush()
+    a = models.Alert(title="Flood warning", severity="warning", barangay=b.name.upper())
+    db.add(a)
+    db.commit()
+    yield a, b
+    db.delete(a)
+    db.delete(b)
+    db.commit()
+
+
+def test_home_sections(client, resident, auth_headers, alert):
+    a, b = alert
+    r = client.get("/api/v1/home", headers=auth_headers(resident))
+    assert r.status_code == 200
+    doc = r.json()
+    assert doc["errors"] == []
+    assert doc["profile"]["id"] == str(resident.id)
+    (item,) = [i for i in doc["alerts"]["items"] if i["id"] == a.id]
+    assert item["barangay_id"] == b.id  # matched by name, case-insensitively
+    assert isinstance(doc["announcements"], list)
+
+
+def test_home_etags(client, resident, auth_headers, alert):
+    h = auth_headers(resident)
+    first = client.get("/api/v1/home", headers=h)
+    have = ",".join(f"{k}:{v}" for k, v in first.json()["etags"].items())
+    again = client.get("/api/v1/home", params={"have": have}, headers=h).json()
+    assert sorted(again["unchanged"]) == sorted(first.json()["etags"])
+    assert again["alerts"] is None
+    assert client.get("/api/v1/home", headers=dict(h, **{"If-None-Match": first.headers["etag"]})).status_code == 304
@@ -0,0 +1,69 @@
+# tests/test_idempotency.py
+import uuid
+
+import pytest
+
+from app import models
+from app.core import idempotency
+
+
+@pytest.fixture
+def announcement(db):
+    a = models.Announcement(title="Clean-up drive", body="Saturday 7am at the plaza.")
+    db.add(a)
+    db.commit()
+    return a
+
+
+def _comment(client, headers, announcement, key, text="See you there"):
+    return client.post(f"/api/v1/announcements/{announcement.id}/comments", json={"comment": text},
+                       headers=dict(headers, **{"Idempotency-Key": key}))
+
+
+def _count(db, announcement):
+    return db.query(models.AnnouncementComment).filter_by(announcement_id=announcement.id).count()
+
+
+def test_retry_replays_the_stored_response(client, db, resident, auth_headers, announcement):
+    h, key = auth_headers(resident), str(uuid.uuid4())
+    first = _comment(client, h, announcement, key)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    retry = _comment(client, h, announcement, key)
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert _count(db, announcement) == 1
+
+
+def test_keys_are_per_user(client, db, make_user, auth_headers, announcement):
+    key = str(uuid.uuid4())
+    assert _comment(client, auth_headers(make_user()), announcement, key).status_code == 200
+    r = _comment(client, auth_headers(make_user()), announcement, key)
+    assert "idempotent-replayed" not in r.headers
+    assert _count(db, announcement) == 2
+
+
+def test_same_key_with_a_different_request_is_rejected(client, db, resident, auth_headers, announcement):
+    h, key = auth_headers(resident), str(uuid.uuid4())
+    _comment(client, h, announcement, key)
+    r = _comment(client, h, announcement, key, text="Changed my mind")
+    assert r.status_code == 422
+    assert _count(db, announcement) == 1
+
+
+def test_retry_while_first_request_runs_is_a_conflict(client, db, resident, auth_headers, announcement):
+    h, key = auth_headers(resident), str(uuid.uuid4())
+    first = _comment(client, h, announcement, key)
+    # put the key back in its "claimed, no response yet" state
+    db.query(models.IdempotencyKey).filter_by(user_id=resident.id, key=key).update({"status_code": None})
+    db.commit()
+
+    r = _comment(client, h, announcement, key)
+    assert r.status_code == 409
+    assert "retry-after" in r.headers
+
+    idempotency._release(resident.id, key)  # what a failed first attempt does
+    r = _comment(client, h, announcement, key)
+    assert r.status_code == 200 and r.json()["id"] != first.json()["id"]
@@ -0,0 +1,70 @@
+# tests/test_instrumentation.py
+import pytest
+from sqlalchemy import text
+
+from app.core import instrumentation
+from app.db.session import SessionLocal
+
+
+def test_query_stats_rejects_unknown_sort(client, admin, auth_headers):
+    r = client.get("/api/v1/admin/diagnostics/queries?sort=bogus", headers=auth_headers(admin))
+    assert r.status_code == 422
+
+
+def test_query_stats_sorts(client, admin, auth_headers):
+    headers = auth_headers(admin)
+    client.get("/api/v1/incidents/me", headers=headers)
+    r = client.get("/api/v1/admin/diagnostics/queries?sort=avg_db_ms", headers=headers)
+    assert r.status_code == 200
+    assert any(row["route"].endswith("/incidents/me") for row in r.json()["routes"])
+
+
+def test_query_stats_is_admin_only(client, resident, auth_headers):
+    r = client.get("/api/v1/admin/diagnostics/queries", headers=auth_headers(resident))
+    assert r.status_code == 403
+
+
+def test_assert_max_queries(client):
+    db = SessionLocal()
+    try:
+        with instrumentation.assert_max_queries(2) as stats:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+        assert stats.count == 2
+        with pytest.raises(AssertionError, match="ran 3 queries"):
+            with instrumentation.assert_max_queries(2):
+                for _ in range(3):
+                    db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+def test_endpoint_query_budget(client, resident, auth_headers):
+    r = instrumentation.assert_endpoint_max_queries(
+        client, "GET", "/api/v1/incidents/me", 3, headers=auth_headers(resident)
+    )
+    assert r.status_code == 200
+    assert instrumentation.queries_from_response(r) >= 1
+
+
+def test_lazy_load_policy_raises_on_n_plus_one(db, resident):
+    from app import models
+    from app.db import loading
+
+    incidents = [models.Incident(reporter_id=str(resident.id), title=f"N+1 {i}") for i in range(2)]
+    db.add_all(incidents)
+    db.commit()
+    try:
+        with instrumentation.count_queries():
+            rows = db.query(models.Incident).filter(models.Incident.title.like("N+1 %")).all()
+            rows[0].photos  # one lazy load is allowed (LAZY_LOAD_MAX_PER_RELATIONSHIP=1)
+            with pytest.raises(loading.LazyLoadError):
+                rows[1].photos
+            # bulk writes are not loads and must not trip the hook
+            db.query(models.Incident).filter(models.Incident.title.like("N+1 %")).update(
+                {"status": "acknowledged"}, synchronize_session=False)
+    finally:
+        db.rollback()
+        for inc in incidents:
+            db.delete(inc)
+        db.commit()
@@ -0,0 +1,93 @@
+# tests/test_login.py
+import uuid
+
+import pytest
+
+from app import models
+from app.core import login
+from app.core.config import settings
+
+TOKEN_URL = "/api/v1/auth/token"
+
+
+def _login(client, email, password="secret123"):
+    return client.post(TOKEN_URL, data={"username": email, "password": password})
+
+
+def test_token_bucket_trips_and_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(login.time, "monotonic", lambda: clock[0])
+    bucket = login.TokenBucketLimiter(capacity=2, per_minute=6)  # one token every 10s
+
+    assert bucket.acquire("a") == 0 and bucket.acquire("a") == 0
+    assert bucket.acquire("a") == pytest.approx(10.0)
+    assert bucket.acquire("b") == 0  # keys are independent
+
+    clock[0] += 10
+    assert bucket.acquire("a") == 0
+    assert bucket.acquire("a") > 0
+
+
+def test_account_limit_returns_429_with_retry_after(client, resident):
+    for _ in range(settings.LOGIN_RATE_ACCOUNT_BURST):
+        assert _login(client, resident.email, "wrong").status_code == 400
+    r = _login(client, resident.email)  # even the right password waits
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
+
+    login.account_limiter.reset()  # bucket refilled
+    assert _login(client, resident.email).status_code == 200
+
+
+def test_ip_limit_spans_accounts(client, monkeypatch):
+    monkeypatch.setattr(login, "ip_limiter", login.TokenBucketLimiter(capacity=3, per_minute=1))
+    for _ in range(3):
+        assert _login(client, f"{uuid.uuid4().hex[:8]}@test.mobo").status_code == 400
+    r = _login(client, f"{uuid.uuid4().hex[:8]}@test.mobo")
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) == 60
+
+
+def test_login_rehashes_a_hash_with_another_cost(client, db, resident):
+    legacy = login._context(settings.BCRYPT_ROUNDS + 1).hash("secret123")
+    user = db.get(models.User, resident.id)
+    user.password = legacy
+    db.commit()
+
+    assert _login(client, resident.email).status_code == 200
+    db.expire_all()
+    stored = db.get(models.User, resident.id).password
+    assert stored != legacy
+    assert login._hash_rounds(stored) == settings.BCRYPT_ROUNDS
+    assert _login(client, resident.email).status_code == 200  # the new hash verifies
+
+
+def test_current_hash_is_left_alone(client, db, resident):
+    before = resident.password
+    assert _login(client, resident.email).status_code == 200
+    db.expire_all()
+    assert db.get(models.User, resident.id).password == before
+
+
+def test_wrong_password_does_not_rehash(client, db, resident):
+    legacy = login._context(settings.BCRYPT_ROUNDS + 1).hash("secret123")
+    db.get(models.User, resident.id).password = legacy
+    db.commit()
+    assert _login(client, resident.email, "wrong").status_code == 400
+    db.expire_all()
+    assert db.get(models.User, resident.id).password == legacy
+
+
+def test_email_case_and_whitespace_are_ignored(client, resident):
+    assert _login(client, f"  {resident.email.upper()} ").status_code == 200
+
+
+def test_signup_normalizes_email(client):
+    email = f"Juan.{uuid.uuid4().hex[:6]}@Example.PH"
+    body = {"name": "Juan", "email": email, "password": "secret123", "role": "user"}
+    r = client.post("/api/v1/auth/register", json=body)
+    assert r.status_code == 201
+    assert r.json()["email"] == email.lower()
+
+    assert client.post("/api/v1/auth/register", json=dict(body, email=email.upper())).status_code == 400
+    assert _login(client, email.upper()).status_code == 200
@@ -0,0 +1,80 @@
+# tests/test_media.py
+import io
+from urllib.parse import urlsplit
+
+import pytest
+
+from app import models
+from app.core import storage
+
+BODY = bytes(range(256)) * 4  # 1 KiB
+
+
+@pytest.fixture
+def photo_incident(db, resident):
+    key = storage.new_key("incidents", resident.id, "photo.jpg")
+    storage.get_storage().save(key, io.BytesIO(BODY), "image/jpeg")
+    inc = models.Incident(reporter_id=str(resident.id), title="Broken streetlight")
+    inc.photos.append(models.IncidentPhoto(storage_path=key))
+    db.add(inc)
+    db.commit()
+    yield inc
+    for p in inc.photos:
+        db.delete(p)
+    db.delete(inc)
+    db.commit()
+    storage.get_storage().delete(key)
+
+
+def _photo_url(client, headers, incident_id):
+    r = client.get(f"/api/v1/incidents/{incident_id}", headers=headers)
+    assert r.status_code == 200
+    (url,) = r.json()["photos"]
+    return url
+
+
+def test_photo_urls_are_absolute(client, resident, auth_headers, photo_incident):
+    url = _photo_url(client, auth_headers(resident), photo_incident.id)
+    assert url.startswith("http://testserver/media/incidents/")
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.content == BODY
+    assert r.headers["content-type"] == "image/jpeg"
+
+
+def test_bad_or_missing_signature_is_forbidden(client, resident, auth_headers, photo_incident):
+    url = _photo_url(client, auth_headers(resident), photo_incident.id)
+    parts = urlsplit(url)
+    assert client.get(url.replace("sig=", "sig=x")).status_code == 403
+    assert client.get(parts.path).status_code == 403
+    other_key = parts.path.replace(".jpg", "0.jpg")  # signature made for a different key
+    assert client.get(f"{other_key}?{parts.query}").status_code == 403
+
+
+def test_range_requests(client, resident, auth_headers, photo_incident):
+    url = _photo_url(client, auth_headers(resident), photo_incident.id)
+    r = client.get(url, headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == BODY[10:20]
+    assert r.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+
+    r = client.get(url, headers={"Range": "bytes=-16"})
+    assert r.status_code == 206 and r.content == BODY[-16:]
+
+    r = client.get(url, headers={"Range": f"bytes={len(BODY)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_etag_revalidation(client, resident, auth_headers, photo_incident):
+    url = _photo_url(client, auth_headers(resident), photo_incident.id)
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_own_incident_list_signs_photo_urls(client, resident, auth_headers, photo_incident):
+    (inc,) = [i for i in client.get("/api/v1/incidents/me", headers=auth_headers(resident)).json()
+              if i["id"] == photo_incident.id]
+    (url,) = inc["photos"]
+    assert url.startswith("http://testserver/media/incidents/")
+    assert client.get(url).content == BODY
@@ -0,0 +1,45 @@
+# tests/test_notifications.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.core.config import settings
+
+
+@pytest.fixture
+def notified(db, resident):
+    now = datetime.utcnow()
+    for days, read in ((400, False), (200, True), (1, False)):
+        db.add(models.Notification(user_id=resident.id, message=f"{days}d", read=read,
+                                   created_at=now - timedelta(days=days)))
+    db.commit()
+    return resident
+
+
+def _list(client, headers, **params):
+    r = client.get("/api/v1/notifications/", params=params, headers=headers)
+    assert r.status_code == 200
+    return [n["message"] for n in r.json()]
+
+
+def test_old_notifications_are_listed_and_counted(client, notified, auth_headers):
+    h = auth_headers(notified)
+    assert _list(client, h) == ["1d", "200d", "400d"]
+    assert client.get("/api/v1/notifications/unread_count", headers=h).json() == {"count": 2}
+
+
+def test_window_applies_only_to_partitioned_tables(client, notified, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "PG_PARTITIONING", True)
+    h = auth_headers(notified)
+    assert _list(client, h) == ["1d"]
+    assert client.get("/api/v1/notifications/unread_count", headers=h).json() == {"count": 1}
+    since = (datetime.utcnow() - timedelta(days=500)).isoformat()
+    assert _list(client, h, since=since) == ["1d", "200d", "400d"]
+
+
+def test_keyset_paging(client, notified, auth_headers):
+    h = auth_headers(notified)
+    first = client.get("/api/v1/notifications/", params={"limit": 2}, headers=h).json()
+    rest = _list(client, h, before=first[-1]["created_at"])
+    assert [n["message"] for n in first] + rest == ["1d", "200d", "400d"]
@@ -0,0 +1,61 @@
+# tests/test_reports.py
+from datetime import date
+
+import pytest
+
+from app import models
+from app.core import rollups
+
+DAY1, DAY2 = date(2001, 3, 1), date(2001, 3, 2)
+RANGE = {"start": "2001-03-01", "end": "2001-03-02"}
+
+
+@pytest.fixture
+def incident_rollups(db):
+    key = {"department_id": 1, "barangay_id": 0, "category_id": 0}
+    rollups.bump(db, models.IncidentDailyRollup, dict(key, day=DAY1), created=2, resolved=1, resolution_seconds=7200)
+    rollups.bump(db, models.IncidentDailyRollup, dict(key, day=DAY1), created=1)  # same row: counters add up
+    rollups.bump(db, models.IncidentDailyRollup, dict(key, day=DAY2, department_id=2), created=4)
+    db.commit()
+    yield
+    db.query(models.IncidentDailyRollup).filter(models.IncidentDailyRollup.day.in_([DAY1, DAY2])).delete(
+        synchronize_session=False)
+    db.commit()
+
+
+@pytest.mark.parametrize("report,group_by", [
+    ("incidents", "service_id"),
+    ("appointments", "barangay_id"),
+    ("queues", "bogus"),
+    ("queues", "day; drop table users"),
+])
+def test_unknown_group_by_is_rejected(client, admin, auth_headers, report, group_by):
+    r = client.get(f"/api/v1/reports/{report}", params={"group_by": group_by}, headers=auth_headers(admin))
+    assert r.status_code == 422
+
+
+@pytest.mark.parametrize("report", ["incidents", "appointments", "queues"])
+def test_reports_are_admin_only(client, resident, auth_headers, report):
+    assert client.get(f"/api/v1/reports/{report}", headers=auth_headers(resident)).status_code == 403
+
+
+def test_incident_report_groups_rollup_rows(client, admin, auth_headers, incident_rollups):
+    h = auth_headers(admin)
+    by_day = client.get("/api/v1/reports/incidents", params=RANGE, headers=h).json()["rows"]
+    assert [(r["day"], r["created"]) for r in by_day] == [("2001-03-01", 3), ("2001-03-02", 4)]
+    assert by_day[0]["avg_resolution_hours"] == 2.0
+    assert by_day[1]["avg_resolution_hours"] is None
+
+    by_dept = client.get("/api/v1/reports/incidents", params=dict(RANGE, group_by="department_id"), headers=h)
+    assert [(r["department_id"], r["created"]) for r in by_dept.json()["rows"]] == [(1, 3), (2, 4)]
+
+    total = client.get("/api/v1/reports/incidents", params=dict(RANGE, group_by="total"), headers=h)
+    assert total.json()["rows"][0]["created"] == 7
+
+
+def test_report_range_is_validated(client, admin, auth_headers):
+    h = auth_headers(admin)
+    r = client.get("/api/v1/reports/queues", params={"start": "2001-03-02", "end": "2001-03-01"}, headers=h)
+    assert r.status_code == 400
+    r = client.get("/api/v1/reports/queues", params={"start": "2000-01-01", "end": "2001-03-01"}, headers=h)
+    assert r.status_code == 400
@@ -0,0 +1,74 @@
+# tests/test_resumable.py
+import pytest
+
+from app.core import storage
+
+BODY = b"\xff\xd8" + bytes(range(256)) * 8
+URL = "/api/v1/media/resumable"
+
+
+@pytest.fixture
+def upload(client, resident, auth_headers):
+    h = auth_headers(resident)
+    r = client.post(URL, json={"kind": "incident_photo", "content_type": "image/jpeg", "size": len(BODY)}, headers=h)
+    assert r.status_code == 201
+    assert r.headers["Upload-Offset"] == "0"
+    return r.json()["id"], h
+
+
+def _patch(client, upload_id, h, offset, data):
+    return client.patch(f"{URL}/{upload_id}", content=data, headers=dict(h, **{"Upload-Offset": str(offset)}))
+
+
+def test_resume_from_reported_offset(client, upload):
+    upload_id, h = upload
+    assert _patch(client, upload_id, h, 0, BODY[:700]).status_code == 204
+
+    r = client.head(f"{URL}/{upload_id}", headers=h)  # reconnect: where to go on from
+    assert r.headers["Upload-Offset"] == "700"
+    assert r.headers["Upload-Length"] == str(len(BODY))
+
+    r = _patch(client, upload_id, h, 700, BODY[700:])
+    assert r.status_code == 204
+    assert r.headers["Upload-Offset"] == str(len(BODY))
+
+    done = client.post(f"{URL}/{upload_id}/complete", headers=h).json()
+    assert storage.get_storage().read(done["key"]) == BODY
+    assert client.get(f"{URL}/{upload_id}", headers=h).status_code == 404  # session is gone
+
+
+def test_wrong_offset_is_a_conflict(client, upload):
+    upload_id, h = upload
+    _patch(client, upload_id, h, 0, BODY[:100])
+    r = _patch(client, upload_id, h, 50, BODY[50:200])  # resent bytes the server already has
+    assert r.status_code == 409
+    assert client.get(f"{URL}/{upload_id}", headers=h).json()["offset"] == 100
+
+
+def test_more_than_declared_size_is_rejected(client, upload):
+    upload_id, h = upload
+    assert _patch(client, upload_id, h, 0, BODY + b"extra").status_code == 413
+
+
+def test_incomplete_upload_cannot_complete(client, upload):
+    upload_id, h = upload
+    _patch(client, upload_id, h, 0, BODY[:10])
+    assert client.post(f"{URL}/{upload_id}/complete", headers=h).status_code == 409
+
+
+def test_other_users_cannot_see_an_upload(client, upload, make_user, auth_headers):
+    upload_id, _ = upload
+    other = auth_headers(make_user())
+    assert client.head(f"{URL}/{upload_id}", headers=other).status_code == 404
+    assert _patch(client, upload_id, other, 0, BODY).status_code == 404
+
+
+def test_abort(client, upload):
+    upload_id, h = upload
+    assert client.delete(f"{URL}/{upload_id}", headers=h).status_code == 204
+    assert client.get(f"{URL}/{upload_id}", headers=h).status_code == 404
+
+
+def test_get_and_head_have_their_own_operation_ids(client):
+    ops = client.get("/openapi.json").json()["paths"][URL + "/{upload_id}"]
+    assert ops["get"]["operationId"] != ops["head"]["operationId"]
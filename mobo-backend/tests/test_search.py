@@ -0,0 +1,52 @@
+# tests/test_search.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def announcements(db):
+    now = datetime.utcnow()
+    rows = [
+        models.Announcement(title="Flood advisory", body='<img src=x onerror="alert(1)"> Floodwater & debris on Rizal St.',
+                            created_at=now - timedelta(hours=1)),
+        models.Announcement(title="Road works", body="Flood drains are being cleared this week.",
+                            created_at=now - timedelta(hours=2)),
+        models.Announcement(title="Zumba", body="Flood of sign-ups for Saturday.", created_at=now - timedelta(hours=3)),
+    ]
+    db.add_all(rows)
+    db.commit()
+    yield rows
+    for a in rows:
+        db.delete(a)
+    db.commit()
+
+
+def _search(client, **params):
+    r = client.get("/api/v1/announcements/search", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_unknown_sort_is_rejected(client, admin, auth_headers):
+    assert client.get("/api/v1/announcements/search", params={"q": "x", "sort": "title"}).status_code == 422
+    r = client.get("/api/v1/incidents/search", params={"q": "x", "sort": "oldest"}, headers=auth_headers(admin))
+    assert r.status_code == 422
+
+
+def test_snippet_escapes_text_and_marks_matches(client, announcements):
+    hit = _search(client, q="floodwater")["items"][0]
+    assert hit["id"] == announcements[0].id
+    assert "<img" not in hit["snippet"]
+    assert "&lt;img" in hit["snippet"] and "&amp; debris" in hit["snippet"]
+    assert "<b>Floodwater</b>" in hit["snippet"]
+
+
+def test_recent_sort_pages_with_cursor(client, announcements):
+    first = _search(client, q="flood", sort="recent", limit=2)
+    assert [h["id"] for h in first["items"]] == [a.id for a in announcements[:2]]
+    rest = _search(client, q="flood", sort="recent", limit=2, cursor=first["next_cursor"])
+    assert [h["id"] for h in rest["items"]] == [announcements[2].id]
+    assert rest["next_cursor"] is None
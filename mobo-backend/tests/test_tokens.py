@@ -0,0 +1,92 @@
+# tests/test_tokens.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.core import security
+
+
+class _Earlier(datetime):
+    """Access tokens issued 2s ago: iat has 1s resolution, and a token from
+    a revocation's own second is deliberately let through."""
+
+    @classmethod
+    def utcnow(cls):
+        return datetime.utcnow() - timedelta(seconds=2)
+
+
+@pytest.fixture
+def login(client, monkeypatch):
+    def do(user, password="secret123", earlier=False):
+        with monkeypatch.context() as m:
+            if earlier:
+                m.setattr(security, "datetime", _Earlier)
+            r = client.post("/api/v1/auth/token", data={"username": user.email, "password": password})
+        assert r.status_code == 200, r.text
+        return r.json()
+    return do
+
+
+def _bearer(tok):
+    return {"Authorization": f"Bearer {tok['access_token']}"}
+
+
+def test_login_refresh_logout(client, resident, login):
+    tok = login(resident)
+    assert client.get("/api/v1/notifications/", headers=_bearer(tok)).status_code == 200
+
+    new = client.post("/api/v1/auth/refresh", json={"refresh_token": tok["refresh_token"]})
+    assert new.status_code == 200
+    # the rotated-out refresh token is dead, and reusing it kills the family
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tok["refresh_token"]}).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": new.json()["refresh_token"]}).status_code == 401
+
+    tok = login(resident)
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": tok["refresh_token"]},
+                       headers=_bearer(tok)).status_code == 204
+    assert client.get("/api/v1/notifications/", headers=_bearer(tok)).status_code == 401
+
+
+def test_deactivation_revokes_access_and_refresh_tokens(client, db, resident, login):
+    tok = login(resident, earlier=True)
+    user = db.get(models.User, resident.id)
+    user.is_active = False
+    db.commit()
+
+    # notifications authorizes from token claims alone, without loading the user
+    assert client.get("/api/v1/notifications/", headers=_bearer(tok)).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tok["refresh_token"]}).status_code == 401
+
+
+def test_role_change_revokes_access_tokens_only(client, db, admin, login):
+    tok = login(admin, earlier=True)
+    assert client.get("/api/v1/admin/diagnostics/queries", headers=_bearer(tok)).status_code == 200
+
+    user = db.get(models.User, admin.id)
+    user.role_id = db.query(models.Role).filter(models.Role.name == "user").one().id
+    db.commit()
+
+    assert client.get("/api/v1/admin/diagnostics/queries", headers=_bearer(tok)).status_code == 401
+    # the refresh token still works and its access token carries the new role
+    r = client.post("/api/v1/auth/refresh", json={"refresh_token": tok["refresh_token"]})
+    assert r.status_code == 200
+    assert client.get("/api/v1/admin/diagnostics/queries", headers=_bearer(r.json())).status_code == 403
+
+
+def test_unrelated_user_edits_do_not_revoke(client, db, resident, login):
+    tok = login(resident)
+    user = db.get(models.User, resident.id)
+    user.name = "Renamed"
+    db.commit()
+    assert db.query(models.RevokedToken).filter(models.RevokedToken.user_id == resident.id).count() == 0
+    assert client.get("/api/v1/notifications/", headers=_bearer(tok)).status_code == 200
+
+
+def test_rolled_back_deactivation_does_not_revoke(client, db, resident, login):
+    tok = login(resident, earlier=True)
+    user = db.get(models.User, resident.id)
+    user.is_active = False
+    db.flush()  # the flush hook queues the revocation...
+    db.rollback()  # ...and the rollback drops it
+    assert client.get("/api/v1/notifications/", headers=_bearer(tok)).status_code == 200